@@ -0,0 +1,151 @@
+"""story progress index
+
+Revision ID: b7e4d2a91c05
+Revises: ac52c3318924
+Create Date: 2026-10-16 10:12:41.118203
+
+"""
+from collections import deque
+from types import SimpleNamespace
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4d2a91c05'
+down_revision = 'ac52c3318924'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of app.services.progress_index.build_progress_index (version 1)
+# so later changes to the app don't change what this migration writes.
+def _story_successors(nodes, choices):
+    by_order = {node.display_order: str(node.id) for node in nodes}
+    targets = {}
+    for choice in choices:
+        if choice.next_node_id:
+            targets.setdefault(str(choice.node_id), []).append(str(choice.next_node_id))
+
+    successors = {}
+    for node in nodes:
+        node_id = str(node.id)
+        if node.is_end:
+            successors[node_id] = []
+        elif node.node_type == "choice" and targets.get(node_id):
+            successors[node_id] = targets[node_id]
+        else:
+            following = by_order.get(node.display_order + 1)
+            successors[node_id] = [following] if following else []
+
+    starts = {str(node.id) for node in nodes if node.is_start}
+    if not starts and nodes:
+        starts = {str(min(nodes, key=lambda n: n.display_order).id)}
+    ends = {str(node.id) for node in nodes if node.is_end}
+    max_order = max((node.display_order for node in nodes), default=1) or 1
+    return successors, starts, ends, max_order
+
+
+def _bfs(sources, edges):
+    distance = {source: 0 for source in sources}
+    queue = deque(sources)
+    while queue:
+        current = queue.popleft()
+        for following in edges.get(current, []):
+            if following not in distance:
+                distance[following] = distance[current] + 1
+                queue.append(following)
+    return distance
+
+
+def _longest_remaining(successors, ends):
+    longest = {}
+    visiting = set()
+
+    for root in successors:
+        if root in longest:
+            continue
+        stack = [(root, iter(successors[root]))]
+        visiting.add(root)
+        while stack:
+            node_id, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                visiting.discard(node_id)
+                best = 0 if node_id in ends else None
+                for following in successors[node_id]:
+                    if longest.get(following) is not None:
+                        candidate = longest[following] + 1
+                        best = candidate if best is None else max(best, candidate)
+                longest[node_id] = best
+            elif child not in longest and child not in visiting and child in successors:
+                visiting.add(child)
+                stack.append((child, iter(successors[child])))
+    return {node_id: steps for node_id, steps in longest.items() if steps is not None}
+
+
+def _build_progress_index(nodes, choices):
+    successors, starts, ends, max_order = _story_successors(nodes, choices)
+
+    predecessors = {}
+    for node_id, following in successors.items():
+        for target in following:
+            predecessors.setdefault(target, []).append(node_id)
+
+    depth = _bfs(starts, successors)
+    shortest = _bfs(ends, predecessors)
+    longest = _longest_remaining(successors, ends)
+
+    return {
+        "version": 1,
+        "max_order": max_order,
+        "nodes": {
+            node_id: {
+                "depth": depth.get(node_id),
+                "min_remaining": shortest.get(node_id),
+                "max_remaining": longest.get(node_id),
+            }
+            for node_id in successors
+        },
+    }
+
+
+def upgrade() -> None:
+    op.add_column('stories', sa.Column('progress_index', sa.JSON(), nullable=True))
+
+    # Backfill existing stories so progress updates never need the fallback query
+    bind = op.get_bind()
+    story_ids = [row.id for row in bind.execute(sa.text("SELECT id FROM stories"))]
+    for story_id in story_ids:
+        nodes = [
+            SimpleNamespace(**row._mapping)
+            for row in bind.execute(
+                sa.text(
+                    "SELECT id, node_type, display_order, is_start, is_end "
+                    "FROM story_nodes WHERE story_id = :story_id"
+                ),
+                {"story_id": story_id},
+            )
+        ]
+        choices = [
+            SimpleNamespace(**row._mapping)
+            for row in bind.execute(
+                sa.text(
+                    "SELECT c.node_id, c.next_node_id FROM story_choices c "
+                    "JOIN story_nodes n ON n.id = c.node_id WHERE n.story_id = :story_id"
+                ),
+                {"story_id": story_id},
+            )
+        ]
+        bind.execute(
+            sa.text("UPDATE stories SET progress_index = :index WHERE id = :story_id").bindparams(
+                sa.bindparam("index", type_=sa.JSON())
+            ),
+            {"index": _build_progress_index(nodes, choices), "story_id": story_id},
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('stories', 'progress_index')
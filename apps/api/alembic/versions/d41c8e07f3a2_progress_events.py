@@ -0,0 +1,77 @@
+"""progress events
+
+Revision ID: d41c8e07f3a2
+Revises: b7e4d2a91c05
+Create Date: 2026-10-16 14:03:27.502941
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41c8e07f3a2'
+down_revision = 'b7e4d2a91c05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('progress_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('story_id', sa.UUID(), nullable=False),
+    sa.Column('node_id', sa.UUID(), nullable=True),
+    sa.Column('choice_key', sa.String(length=10), nullable=False),
+    sa.Column('made_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['node_id'], ['story_nodes.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_progress_events_user_story_id', 'progress_events', ['user_id', 'story_id', 'id'], unique=False)
+    op.create_index('ix_progress_events_user_id', 'progress_events', ['user_id', 'id'], unique=False)
+    op.add_column('user_progress', sa.Column('choices_count', sa.Integer(), nullable=True))
+
+    # Move the JSON history into event rows, oldest first so ids keep order.
+    # Node ids that no longer exist become NULL, as the FK would have done.
+    op.execute("""
+        INSERT INTO progress_events (user_id, story_id, node_id, choice_key, made_at)
+        SELECT p.user_id, p.story_id, n.id, c.value->>'choice_key',
+               COALESCE((c.value->>'made_at')::timestamptz, p.updated_at, now())
+        FROM user_progress p
+        CROSS JOIN LATERAL json_array_elements(
+            CASE WHEN json_typeof(p.choices_made) = 'array' THEN p.choices_made ELSE '[]'::json END
+        ) WITH ORDINALITY AS c(value, position)
+        LEFT JOIN story_nodes n ON n.id::text = c.value->>'node_id'
+        WHERE c.value->>'choice_key' IS NOT NULL
+        ORDER BY p.id, c.position
+    """)
+    op.execute("""
+        UPDATE user_progress p
+        SET choices_count = (
+            SELECT count(*) FROM progress_events e
+            WHERE e.user_id = p.user_id AND e.story_id = p.story_id
+        )
+    """)
+    op.drop_column('user_progress', 'choices_made')
+
+
+def downgrade() -> None:
+    op.add_column('user_progress', sa.Column('choices_made', sa.JSON(), nullable=True))
+    op.execute("""
+        UPDATE user_progress p
+        SET choices_made = COALESCE((
+            SELECT json_agg(
+                json_build_object(
+                    'node_id', e.node_id, 'choice_key', e.choice_key, 'made_at', e.made_at
+                ) ORDER BY e.id
+            )
+            FROM progress_events e
+            WHERE e.user_id = p.user_id AND e.story_id = p.story_id
+        ), '[]'::json)
+    """)
+    op.drop_column('user_progress', 'choices_count')
+    op.drop_index('ix_progress_events_user_id', table_name='progress_events')
+    op.drop_index('ix_progress_events_user_story_id', table_name='progress_events')
+    op.drop_table('progress_events')
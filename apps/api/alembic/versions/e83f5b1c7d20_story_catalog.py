@@ -0,0 +1,84 @@
+"""story catalog
+
+Revision ID: e83f5b1c7d20
+Revises: d41c8e07f3a2
+Create Date: 2026-10-16 16:47:09.331870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e83f5b1c7d20'
+down_revision = 'd41c8e07f3a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('story_catalog',
+    sa.Column('story_id', sa.UUID(), nullable=False),
+    sa.Column('slug', sa.String(length=100), nullable=False),
+    sa.Column('age_range', sa.String(length=20), nullable=False),
+    sa.Column('region', sa.String(length=50), nullable=False),
+    sa.Column('moral', sa.Text(), nullable=True),
+    sa.Column('duration_min', sa.Integer(), nullable=False),
+    sa.Column('cover_image', sa.String(length=500), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('character_count', sa.Integer(), nullable=False),
+    sa.Column('choice_count', sa.Integer(), nullable=False),
+    sa.Column('available_languages', postgresql.ARRAY(sa.String(length=10)), nullable=False),
+    sa.Column('translations', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('story_id'),
+    sa.UniqueConstraint('slug')
+    )
+    op.create_index('ix_story_catalog_created', 'story_catalog', ['is_active', 'created_at', 'story_id'], unique=False)
+    op.create_index('ix_story_catalog_duration', 'story_catalog', ['is_active', 'duration_min', 'story_id'], unique=False)
+    op.create_index('ix_story_catalog_region', 'story_catalog', ['region'], unique=False)
+    op.create_index('ix_story_catalog_languages', 'story_catalog', ['available_languages'], unique=False, postgresql_using='gin')
+
+    # Populate from existing stories; later refreshes go through
+    # app.services.story_catalog.refresh_story_catalog
+    op.execute("""
+        INSERT INTO story_catalog (
+            story_id, slug, age_range, region, moral, duration_min, cover_image,
+            is_active, character_count, choice_count, available_languages,
+            translations, created_at
+        )
+        SELECT s.id, s.slug, s.age_range, s.region, s.moral, COALESCE(s.duration_min, 0),
+               s.cover_image, COALESCE(s.is_active, true), COALESCE(cc.n, 0), COALESCE(ch.n, 0),
+               COALESCE(t.languages, '{}'::varchar[]), COALESCE(t.texts, '{}'::jsonb),
+               COALESCE(s.created_at, now())
+        FROM stories s
+        LEFT JOIN (
+            SELECT story_id, count(*) AS n FROM characters GROUP BY story_id
+        ) cc ON cc.story_id = s.id
+        LEFT JOIN (
+            SELECT n.story_id, count(c.id) AS n
+            FROM story_nodes n JOIN story_choices c ON c.node_id = n.id
+            GROUP BY n.story_id
+        ) ch ON ch.story_id = s.id
+        LEFT JOIN (
+            SELECT story_id,
+                   array_agg(language_code ORDER BY language_code) AS languages,
+                   jsonb_object_agg(language_code, jsonb_build_object(
+                       'title', title,
+                       'description', description,
+                       'is_complete', COALESCE(is_complete, false)
+                   )) AS texts
+            FROM story_translations GROUP BY story_id
+        ) t ON t.story_id = s.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_story_catalog_languages', table_name='story_catalog', postgresql_using='gin')
+    op.drop_index('ix_story_catalog_region', table_name='story_catalog')
+    op.drop_index('ix_story_catalog_duration', table_name='story_catalog')
+    op.drop_index('ix_story_catalog_created', table_name='story_catalog')
+    op.drop_table('story_catalog')
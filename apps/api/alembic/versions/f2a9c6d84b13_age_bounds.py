@@ -0,0 +1,46 @@
+"""age bounds
+
+Revision ID: f2a9c6d84b13
+Revises: e83f5b1c7d20
+Create Date: 2026-10-16 17:32:51.604218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a9c6d84b13'
+down_revision = 'e83f5b1c7d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('stories', 'story_catalog'):
+        op.add_column(table, sa.Column('age_min', sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column('age_max', sa.Integer(), nullable=True))
+        # Same rule as app.utils.age_range.parse_age_range: "low-high" in
+        # either order, anything else keeps NULL bounds
+        op.execute(f"""
+            UPDATE {table}
+            SET age_min = least(
+                    trim(split_part(age_range, '-', 1))::int,
+                    trim(split_part(age_range, '-', 2))::int
+                ),
+                age_max = greatest(
+                    trim(split_part(age_range, '-', 1))::int,
+                    trim(split_part(age_range, '-', 2))::int
+                )
+            WHERE age_range ~ '^\\s*\\d+\\s*-\\s*\\d+\\s*$'
+        """)
+    op.create_index('ix_stories_age_bounds', 'stories', ['age_min', 'age_max'], unique=False)
+    op.create_index('ix_story_catalog_age', 'story_catalog', ['age_min', 'age_max'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_story_catalog_age', table_name='story_catalog')
+    op.drop_index('ix_stories_age_bounds', table_name='stories')
+    for table in ('story_catalog', 'stories'):
+        op.drop_column(table, 'age_max')
+        op.drop_column(table, 'age_min')
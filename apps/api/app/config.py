@@ -8,6 +8,23 @@ class Settings(BaseSettings):
 
     # Redis
     redis_url: str = "redis://localhost:6379"
+    # In-process LRU in front of Redis, kept coherent via pub/sub; 0 disables
+    local_cache_max_entries: int = 512
+    local_cache_ttl_sec: float = 60.0
+    # Pre-serialized responses larger than this are gzipped in Redis; 0 disables
+    response_cache_gzip_min_bytes: int = 4096
+    # Server-side story list/detail entries; the TTL is spread by +/- jitter
+    # (a fraction) and entries are rewritten on publish, see story_publish
+    story_cache_ttl_sec: int = 600
+    story_cache_ttl_jitter: float = 0.1
+    # How long past that TTL a stale entry may still be served while one
+    # worker recomputes it (CacheService.get_or_compute)
+    story_cache_stale_sec: int = 600
+    # get_or_compute: XFetch eagerness (>1 refreshes earlier), the recompute
+    # lock's lifetime, and how long a hard miss waits for another worker
+    cache_xfetch_beta: float = 1.0
+    cache_lock_ttl_sec: int = 30
+    cache_lock_wait_sec: float = 2.0
 
     # Cloudflare R2 (optional - can use Supabase instead)
     r2_account_id: str = ""
@@ -29,6 +46,15 @@ class Settings(BaseSettings):
     # Sarvam Bulbul
     sarvam_api_key: str = ""
     sarvam_base_url: str = "https://api.sarvam.ai"
+    sarvam_requests_per_sec: float = 5.0  # per process; 0 disables limiting
+    sarvam_rate_burst: int = 5
+
+    # Outbound HTTP (shared client for Sarvam + storage)
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_sec: float = 60.0
+    http_timeout_sec: float = 30.0
+    http2_enabled: bool = False  # requires: pip install "httpx[http2]"
 
     # Security
     secret_key: str = "your-super-secret-key-change-this-in-production"
@@ -36,8 +62,50 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 60 * 24  # 24 hours
     cors_origins: str = "http://localhost:3000,http://127.0.0.1:3000"
 
+    # Client/CDN caching; responses also carry ETags for revalidation
+    story_cache_control: str = "public, max-age=60, stale-while-revalidate=600"
+    audio_cache_control: str = "public, max-age=300"
+
     # Audio
     audio_cache_ttl_days: int = 30
+    # Cached audio lookups are re-checked against audio_files this often
+    audio_entry_refresh_sec: int = 86400
+    # A variant with no audio yet is remembered as missing this long
+    audio_miss_cache_sec: float = 5.0
+    # Single-flight TTS: lock lifetime across workers, and how long concurrent
+    # requests wait for the in-process synthesis before returning 202.
+    audio_flight_lock_ttl_sec: int = 120
+    audio_flight_wait_sec: float = 20.0
+    audio_retry_after_sec: int = 5
+    # "queue": misses enqueue a background job and return 202 right away.
+    # "inline": misses synthesize within the request (single-flighted).
+    audio_generation_mode: str = "queue"
+    audio_job_backend: str = "memory"  # "redis" to share jobs across workers
+    audio_job_concurrency: int = 2
+    audio_job_status_ttl_sec: int = 3600
+    # A failed variant isn't re-enqueued (requests get 503) for this long
+    audio_job_failure_backoff_sec: int = 300
+    # Compiled story graphs shared via Redis (invalidated on publish)
+    story_graph_cache_ttl_sec: int = 3600
+    # User progress: "buffer" merges writes per (user, story) and flushes
+    # them in batches; "direct" writes within the request. The redis buffer
+    # backend shares pending writes across workers.
+    progress_write_mode: str = "buffer"
+    progress_buffer_backend: str = "memory"
+    progress_buffer_max_keys: int = 10000
+    progress_flush_interval_sec: float = 2.0
+    progress_flush_max_pending: int = 500
+    progress_flush_max_attempts: int = 3
+    # Database circuit breaker: opens after this many consecutive connection
+    # failures, then short-circuits queries and probes every reset interval
+    db_breaker_failure_threshold: int = 5
+    db_breaker_reset_timeout_sec: float = 10.0
+    db_breaker_probe_timeout_sec: float = 3.0
+    # Story JSON fallback: how often to check the files for changes
+    fallback_reload_interval_sec: float = 5.0
+    # Full-story audio: parallel node synthesis
+    full_story_concurrency: int = 4
+    full_story_max_retries: int = 2
 
     class Config:
         env_file = ".env"
@@ -1,20 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 import time
 
 from app.config import get_settings
 from app.routers import auth, stories, audio, users, choices
+from app.services.cache_service import get_cache_service
+from app.services.db_circuit import get_db_breaker
+from app.services.http_client import close_http_client
+from app.services.progress_buffer import get_progress_buffer
 
 settings = get_settings()
 allowed_origins = [origin.strip() for origin in settings.cors_origins.split(",") if origin.strip()]
 allow_credentials = "*" not in allowed_origins
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background workers that drain queued audio generation jobs
+    await audio.audio_job_worker.start()
+    await get_cache_service().start()
+    await get_progress_buffer().start()
+    await get_db_breaker().start()
+    try:
+        yield
+    finally:
+        # Flushes buffered progress before the DB/cache go away
+        await get_progress_buffer().stop()
+        await get_db_breaker().stop()
+        await get_cache_service().stop()
+        await audio.audio_job_worker.stop()
+        await close_http_client()
+
+
 app = FastAPI(
     title="Bhasha Kahani API",
     description="Multilingual Interactive Folktale Storytelling API",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 
@@ -54,4 +79,9 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "cache": get_cache_service().stats(),
+        "progress_buffer": get_progress_buffer().stats(),
+        "database": get_db_breaker().stats(),
+    }
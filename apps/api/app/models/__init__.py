@@ -1,7 +1,7 @@
 from app.database import Base
 from app.models.user import User
-from app.models.story import Story, StoryTranslation, Character, StoryNode, StoryChoice
-from app.models.progress import UserProgress, Bookmark
+from app.models.story import Story, StoryTranslation, Character, StoryNode, StoryChoice, StoryCatalog
+from app.models.progress import UserProgress, ProgressEvent, Bookmark
 from app.models.audio import AudioFile
 
 __all__ = [
@@ -12,7 +12,9 @@ __all__ = [
     "Character",
     "StoryNode",
     "StoryChoice",
+    "StoryCatalog",
     "UserProgress",
+    "ProgressEvent",
     "Bookmark",
     "AudioFile",
 ]
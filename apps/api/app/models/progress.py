@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, JSON, Boolean, Integer, Text, ForeignKey, UniqueConstraint, Numeric
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, BigInteger, Text, ForeignKey, UniqueConstraint, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.database import Base
@@ -12,7 +12,8 @@ class UserProgress(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     story_id = Column(UUID(as_uuid=True), ForeignKey("stories.id", ondelete="CASCADE"), nullable=False)
     current_node_id = Column(UUID(as_uuid=True), ForeignKey("story_nodes.id", ondelete="SET NULL"))
-    choices_made = Column(JSON, default=list)
+    # Full history lives in progress_events; this is just its length
+    choices_count = Column(Integer, default=0)
     is_completed = Column(Boolean, default=False)
     completion_percentage = Column(Numeric(5, 2), default=0.00)
     play_count = Column(Integer, default=0)
@@ -26,6 +27,24 @@ class UserProgress(Base):
     )
 
 
+class ProgressEvent(Base):
+    """One choice made while playing a story; rows are only ever appended"""
+    __tablename__ = "progress_events"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    story_id = Column(UUID(as_uuid=True), ForeignKey("stories.id", ondelete="CASCADE"), nullable=False)
+    node_id = Column(UUID(as_uuid=True), ForeignKey("story_nodes.id", ondelete="SET NULL"))
+    choice_key = Column(String(10), nullable=False)
+    made_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Keyset paging newest-first, per story or across all stories
+        Index('ix_progress_events_user_story_id', 'user_id', 'story_id', 'id'),
+        Index('ix_progress_events_user_id', 'user_id', 'id'),
+    )
+
+
 class Bookmark(Base):
     __tablename__ = "bookmarks"
     
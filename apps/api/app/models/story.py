@@ -8,12 +8,14 @@ from sqlalchemy import (
     Integer,
     Text,
     ForeignKey,
+    Index,
     UniqueConstraint,
 )
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.database import Base
+from app.utils.age_range import parse_age_range
 
 
 class Story(Base):
@@ -22,11 +24,16 @@ class Story(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     slug = Column(String(100), unique=True, nullable=False, index=True)
     age_range = Column(String(20), nullable=False, index=True)
+    # Integer bounds of age_range, NULL when it isn't "low-high"
+    age_min = Column(Integer)
+    age_max = Column(Integer)
     region = Column(String(50), nullable=False, index=True)
     moral = Column(Text)
     duration_min = Column(Integer)
     cover_image = Column(String(500))
     is_active = Column(Boolean, default=True)
+    # Per-node depth / remaining-path index, see app.services.progress_index
+    progress_index = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -43,6 +50,13 @@ class Story(Base):
         "StoryNode", back_populates="story", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (Index("ix_stories_age_bounds", "age_min", "age_max"),)
+
+    @validates("age_range")
+    def _set_age_bounds(self, key, value):
+        self.age_min, self.age_max = parse_age_range(value) or (None, None)
+        return value
+
 
 class StoryTranslation(Base):
     __tablename__ = "story_translations"
@@ -145,3 +159,43 @@ class StoryChoice(Base):
 
     node = relationship("StoryNode", back_populates="choices", foreign_keys=[node_id])
     next_node = relationship("StoryNode", foreign_keys=[next_node_id])
+
+
+class StoryCatalog(Base):
+    """
+    Denormalized listing row per story, maintained by
+    app.services.story_catalog.refresh_story_catalog
+    """
+
+    __tablename__ = "story_catalog"
+
+    story_id = Column(
+        UUID(as_uuid=True), ForeignKey("stories.id", ondelete="CASCADE"), primary_key=True
+    )
+    slug = Column(String(100), unique=True, nullable=False)
+    age_range = Column(String(20), nullable=False)
+    age_min = Column(Integer)
+    age_max = Column(Integer)
+    region = Column(String(50), nullable=False)
+    moral = Column(Text)
+    duration_min = Column(Integer, nullable=False, default=0)
+    cover_image = Column(String(500))
+    is_active = Column(Boolean, nullable=False, default=True)
+    character_count = Column(Integer, nullable=False, default=0)
+    choice_count = Column(Integer, nullable=False, default=0)
+    available_languages = Column(ARRAY(String(10)), nullable=False, default=list)
+    # {"en": {"title": ..., "description": ..., "is_complete": ...}, ...}
+    translations = Column(JSONB, nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Keyset scans for each listing order
+        Index("ix_story_catalog_created", "is_active", "created_at", "story_id"),
+        Index("ix_story_catalog_duration", "is_active", "duration_min", "story_id"),
+        Index("ix_story_catalog_region", "region"),
+        Index("ix_story_catalog_age", "age_min", "age_max"),
+        Index(
+            "ix_story_catalog_languages", "available_languages", postgresql_using="gin"
+        ),
+    )
@@ -1,102 +1,509 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    BackgroundTasks,
+    status,
+)
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from uuid import UUID
 import uuid as uuid_module
-from typing import Union
-import io
+from typing import Optional, Union
+from datetime import datetime, timezone
+import asyncio
+import hashlib
+import math
 from decimal import Decimal
 
 from app.database import get_db, AsyncSessionLocal
 from app.models.audio import AudioFile
 from app.models.story import StoryNode, Story, StoryTranslation
-from app.schemas.audio import AudioResponse, AudioGeneratingResponse
+from app.schemas.audio import (
+    AudioResponse,
+    AudioGeneratingResponse,
+    AudioJobStatusResponse,
+    AudioManifestEntry,
+    AudioManifestResponse,
+)
+from app.services.audio_encoder import (
+    AudioEncodingError,
+    EncoderUnavailable,
+    PCMFormat,
+    encode_mp3_stream,
+    iter_pcm_chunks,
+)
+from app.services.audio_jobs import (
+    AudioJob,
+    AudioJobWorker,
+    JobDeferred,
+    build_audio_job_queue,
+    retry_wait,
+)
 from app.services.bulbul_service import BulbulService
-from app.services.cache_service import CacheService
+from app.services.cache_service import (
+    audio_cache_entry,
+    audio_cache_key,
+    get_cache_service,
+)
+from app.services.db_circuit import DatabaseUnavailable, get_db_breaker
 from app.services.r2_service import R2Service
-from pydub import AudioSegment
+from app.services.response_cache import etag_matches, not_modified
+from app.services.singleflight import FlightInProgress, SingleFlight
+from app.services.story_audio import (
+    SOURCE_REUSED,
+    SOURCE_SYNTHESIZED,
+    SegmentRequest,
+    SegmentResult,
+    StoryAudioPipeline,
+)
+from app.utils.wav import wav_duration_sec
+from app.config import get_settings
 
 router = APIRouter()
+settings = get_settings()
 bulbul_service = BulbulService()
-cache_service = CacheService()
+cache_service = get_cache_service()
 r2_service = R2Service()
+audio_flight = SingleFlight(
+    cache_service,
+    prefix="audio:flight",
+    lock_ttl=settings.audio_flight_lock_ttl_sec,
+)
+audio_job_queue = build_audio_job_queue(
+    settings.audio_job_backend,
+    cache_service,
+    status_ttl=settings.audio_job_status_ttl_sec,
+)
 
 
 async def execute_with_db_guard(db: AsyncSession, statement):
     try:
-        return await db.execute(statement)
-    except (SQLAlchemyError, OSError) as exc:
+        return await get_db_breaker().execute(db, statement)
+    except DatabaseUnavailable as exc:
         raise HTTPException(
             status_code=503, detail="Database unavailable. Please try again."
         ) from exc
 
 
-async def generate_story_audio_for_language(story_id: UUID, language: str):
-    """Background task to generate full story audio for a specific language"""
-    async with AsyncSessionLocal() as db:
-        # Get story and nodes
-        story_result = await db.execute(select(Story).where(Story.id == story_id))
-        story = story_result.scalar_one_or_none()
+# (node_id, language, speaker, code_mix_ratio)
+AudioVariant = tuple[UUID, str, str, Decimal]
+
+
+def resolve_node_speaker(node: StoryNode) -> str:
+    """Character's voice for a node, or the default narrator voice"""
+    if node.character and node.character.bulbul_speaker:
+        return node.character.bulbul_speaker.strip().lower()
+    return "meera"
+
+
+def audio_file_response(
+    node_id: UUID, language: str, speaker: str, audio_file: AudioFile
+) -> AudioResponse:
+    return AudioResponse(
+        node_id=node_id,
+        language=language,
+        code_mix_ratio=float(audio_file.code_mix_ratio or 0.0),
+        speaker=speaker,
+        audio_url=audio_file.r2_url,
+        duration_sec=float(audio_file.duration_sec)
+        if audio_file.duration_sec
+        else None,
+        file_size=audio_file.file_size,
+        is_cached=True,
+        checksum=audio_file.checksum,
+    )
+
+
+def audio_metadata_response(audio: AudioResponse, if_none_match: Optional[str]):
+    """Stored audio metadata with Cache-Control, ETag and 304 support"""
+    headers = {"Cache-Control": settings.audio_cache_control}
+    if audio.checksum:
+        etag = f'"{audio.checksum}"'
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, headers)
+        headers["ETag"] = etag
+    return JSONResponse(content=audio.model_dump(mode="json"), headers=headers)
 
-        if not story:
-            return
 
-        # Get all narration nodes in order
-        nodes_result = await db.execute(
-            select(StoryNode)
-            .options(joinedload(StoryNode.character))
-            .where(StoryNode.story_id == story_id)
-            .where(StoryNode.node_type == "narration")
-            .order_by(StoryNode.display_order)
+async def load_audio_entry(db: AsyncSession, variant: AudioVariant) -> Optional[dict]:
+    """The stored audio_files row of one variant as a cache entry, if any"""
+    node_id, language, speaker, code_mix_ratio = variant
+    result = await execute_with_db_guard(
+        db,
+        select(AudioFile)
+        .where(
+            AudioFile.node_id == node_id,
+            AudioFile.language_code == language,
+            AudioFile.speaker_id == speaker,
+            AudioFile.code_mix_ratio == code_mix_ratio,
         )
-        nodes = nodes_result.scalars().all()
+        .limit(1),
+    )
+    audio_file = result.scalar_one_or_none()
+    if audio_file is None:
+        return None
+    return audio_file_entry(audio_file)
+
+
+def audio_file_entry(audio_file: AudioFile) -> dict:
+    """An audio_files row as cached by CacheService.set_audio_url"""
+    return audio_cache_entry(
+        audio_file.r2_url,
+        audio_file.checksum,
+        float(audio_file.duration_sec) if audio_file.duration_sec else None,
+        audio_file.file_size,
+    )
 
-        if not nodes:
-            return
 
-        # Generate audio for each node
-        audio_segments = []
+def audio_entry_response(variant: AudioVariant, entry) -> AudioResponse:
+    node_id, language, speaker, code_mix_ratio = variant
+    if isinstance(entry, str):
+        # Entries cached before checksums were stored hold just the URL
+        entry = {"url": entry}
+    return AudioResponse(
+        node_id=node_id,
+        language=language,
+        code_mix_ratio=float(code_mix_ratio),
+        speaker=speaker,
+        audio_url=entry["url"],
+        duration_sec=entry.get("duration_sec"),
+        file_size=entry.get("file_size"),
+        is_cached=True,
+        checksum=entry.get("checksum"),
+    )
+
+
+async def lookup_audio_variants(
+    db: AsyncSession, variants: list[AudioVariant]
+) -> dict[AudioVariant, AudioResponse]:
+    """
+    Resolve stored audio for (node_id, language, speaker, code_mix) variants:
+    one Redis MGET, then one audio_files query for the misses (which are cached).
+    Variants with no stored audio are absent from the result.
+    """
+    found: dict[AudioVariant, AudioResponse] = {}
+    misses: list[AudioVariant] = []
+
+    # One MGET for every variant
+    entries = await cache_service.get_audio_entries(
+        [
+            (str(node_id), language, speaker, float(code_mix_ratio))
+            for node_id, language, speaker, code_mix_ratio in variants
+        ]
+    )
+    for variant, cached in zip(variants, entries):
+        if cached:
+            found[variant] = audio_entry_response(variant, cached)
+        else:
+            misses.append(variant)
+
+    if not misses:
+        return found
 
-        for node in nodes:
-            speaker = (
-                node.character.bulbul_speaker
-                if node.character and node.character.bulbul_speaker
-                else "meera"
+    result = await execute_with_db_guard(
+        db,
+        select(AudioFile).where(
+            AudioFile.node_id.in_({variant[0] for variant in misses}),
+            AudioFile.language_code.in_({variant[1] for variant in misses}),
+            AudioFile.speaker_id.in_({variant[2] for variant in misses}),
+            AudioFile.code_mix_ratio.in_({variant[3] for variant in misses}),
+        )
+    )
+    wanted = set(misses)
+    stored = []
+    for audio_file in result.scalars().all():
+        variant = (
+            audio_file.node_id,
+            audio_file.language_code,
+            audio_file.speaker_id,
+            Decimal(audio_file.code_mix_ratio or 0),
+        )
+        if variant not in wanted:
+            continue
+        stored.append(
+            (
+                (str(audio_file.node_id), variant[1], variant[2], float(variant[3])),
+                audio_file_entry(audio_file),
             )
+        )
+        found[variant] = audio_file_response(
+            audio_file.node_id, audio_file.language_code, audio_file.speaker_id, audio_file
+        )
 
-            text = node.text_content.get(language, node.text_content.get("en", ""))
-            if not text:
-                continue
+    # Write the database hits back in one round trip, like the MGET above
+    await cache_service.set_audio_entries(stored)
+    return found
 
-            audio_bytes = await bulbul_service.synthesize(text, language, speaker)
-            if audio_bytes:
-                audio_segments.append(audio_bytes)
 
-        if not audio_segments:
-            return
+async def upload_segment(
+    story: Story, request: SegmentRequest, audio_bytes: bytes
+) -> Optional[dict]:
+    """Upload one node's audio; returns its audio_files row values on success"""
+    url = await r2_service.upload_audio(
+        audio_bytes=audio_bytes,
+        story_slug=str(story.slug),
+        node_id=str(request.node_id),
+        language=request.language,
+        speaker=request.speaker,
+    )
+    if not url:
+        return None
+    return {
+        "node_id": request.node_id,
+        "language_code": request.language,
+        "code_mix_ratio": Decimal("0.00"),
+        "speaker_id": request.speaker,
+        "r2_url": url,
+        "duration_sec": wav_duration_sec(audio_bytes),
+        "file_size": len(audio_bytes),
+        "checksum": hashlib.sha256(audio_bytes).hexdigest(),
+    }
+
+
+async def record_uploaded_segments(db: AsyncSession, rows: list[dict]):
+    """Insert audio_files rows for uploaded node audio and cache their URLs"""
+    if not rows:
+        return
+
+    # Concurrent single-node requests may have stored some variants already.
+    await execute_with_db_guard(
+        db,
+        pg_insert(AudioFile)
+        .values(rows)
+        .on_conflict_do_nothing(constraint="uq_audio_variant"),
+    )
+    await cache_service.set_audio_entries(
+        [
+            (
+                (
+                    str(row["node_id"]),
+                    row["language_code"],
+                    row["speaker_id"],
+                    float(row["code_mix_ratio"]),
+                ),
+                audio_cache_entry(
+                    row["r2_url"], row["checksum"], row["duration_sec"], row["file_size"]
+                ),
+            )
+            for row in rows
+        ]
+    )
 
-        # Concatenate all audio segments using pydub
-        combined_audio = AudioSegment.empty()
-        for segment_bytes in audio_segments:
-            segment = AudioSegment.from_wav(io.BytesIO(segment_bytes))
-            combined_audio += segment
 
-        # Export as MP3
-        mp3_buffer = io.BytesIO()
-        combined_audio.export(mp3_buffer, format="mp3", bitrate="128k")
-        full_audio = mp3_buffer.getvalue()
+async def build_full_story_audio(db: AsyncSession, story: Story, language: str) -> dict:
+    """
+    Synthesize narration nodes concurrently, stitch them in display_order
+    and upload the combined track. Failed nodes are skipped and reported.
+    """
+    # Nothing to write the combined track to; don't synthesize for nothing
+    if not r2_service.is_configured():
+        raise HTTPException(status_code=503, detail="Audio storage not configured")
 
-        # Upload combined audio
-        await r2_service.upload_audio(
-            audio_bytes=full_audio,
+    nodes_result = await execute_with_db_guard(
+        db,
+        select(StoryNode)
+        .options(joinedload(StoryNode.character))
+        .where(StoryNode.story_id == story.id)
+        .where(StoryNode.node_type == "narration")
+        .order_by(StoryNode.display_order)
+    )
+    nodes = nodes_result.scalars().all()
+
+    if not nodes:
+        raise HTTPException(status_code=404, detail="No narration nodes found")
+
+    segment_requests = []
+    for node in nodes:
+        # Get text for requested language, fallback to English
+        text = node.text_content.get(language, node.text_content.get("en", ""))
+        if not text:
+            print(f"Warning: No text for node {node.id} in language {language}")
+            continue
+        segment_requests.append(
+            SegmentRequest(
+                node_id=node.id,
+                display_order=node.display_order,
+                text=text,
+                language=language,
+                speaker=resolve_node_speaker(node),
+            )
+        )
+
+    existing_audio = await lookup_audio_variants(
+        db,
+        [
+            (request.node_id, language, request.speaker, Decimal("0.00"))
+            for request in segment_requests
+        ],
+    )
+
+    async def fetch_existing(request: SegmentRequest) -> Optional[bytes]:
+        existing = existing_audio.get(
+            (request.node_id, language, request.speaker, Decimal("0.00"))
+        )
+        if not existing:
+            return None
+        return await r2_service.download_audio(existing.audio_url)
+
+    async def synthesize(request: SegmentRequest) -> Optional[bytes]:
+        print(
+            f"Generating audio for node {request.display_order}: "
+            f"{request.speaker} voice, {len(request.text)} chars"
+        )
+        return await bulbul_service.synthesize(
+            request.text, request.language, request.speaker
+        )
+
+    pipeline = StoryAudioPipeline(
+        synthesize,
+        fetch_existing=fetch_existing,
+        concurrency=settings.full_story_concurrency,
+        max_retries=settings.full_story_max_retries,
+    )
+    segments = pipeline.stream(segment_requests)
+    results: list[SegmentResult] = []
+    upload_tasks: list[asyncio.Task] = []
+    # Each pending upload holds its segment's WAV; at most this many at once,
+    # and the stream waits for a free slot rather than piling them up
+    upload_slots = asyncio.Semaphore(settings.full_story_concurrency)
+    pcm_format = PCMFormat()
+    total_frames = 0
+
+    async def upload_in_slot(request: SegmentRequest, audio_bytes: bytes) -> Optional[dict]:
+        try:
+            return await upload_segment(story, request, audio_bytes)
+        finally:
+            upload_slots.release()
+
+    async def track(result: SegmentResult):
+        results.append(result)
+        if result.source == SOURCE_SYNTHESIZED:
+            await upload_slots.acquire()
+            upload_tasks.append(
+                asyncio.create_task(upload_in_slot(result.request, result.audio_bytes))
+            )
+
+    # Don't start an upload until at least one segment exists
+    first_segment = None
+    async for result in segments:
+        await track(result)
+        if result.ok:
+            first_segment = result
+            break
+
+    if first_segment is None:
+        raise HTTPException(
+            status_code=500, detail="Failed to generate any audio segments"
+        )
+
+    async def pcm_chunks():
+        nonlocal total_frames
+        segment = first_segment
+        while segment is not None:
+            for chunk in iter_pcm_chunks(segment.audio_bytes, pcm_format):
+                total_frames += len(chunk) // pcm_format.frame_size
+                yield chunk
+            # Encoded; drop the WAV so only the in-flight window stays in memory
+            segment.audio_bytes = None
+
+            segment = None
+            async for result in segments:
+                await track(result)
+                if result.ok:
+                    segment = result
+                    break
+
+    file_size = 0
+
+    async def counted(chunks):
+        nonlocal file_size
+        async for chunk in chunks:
+            file_size += len(chunk)
+            yield chunk
+
+    # Decode -> ffmpeg -> chunked upload, one segment in memory at a time
+    try:
+        combined_url = await r2_service.upload_audio_stream(
+            counted(encode_mp3_stream(pcm_chunks(), pcm_format)),
             story_slug=str(story.slug),
             node_id="full-story",
             language=language,
             speaker="combined",
         )
+    except EncoderUnavailable as exc:
+        print(f"Full story audio encoder unavailable: {exc}")
+        raise HTTPException(
+            status_code=503, detail="Audio encoding unavailable"
+        ) from exc
+    except (AudioEncodingError, OSError) as exc:
+        print(f"Full story audio encoding failed: {exc}")
+        raise HTTPException(
+            status_code=500, detail="Failed to encode full story audio"
+        ) from exc
+    finally:
+        await segments.aclose()
+        rows = await asyncio.gather(*upload_tasks)
+        await record_uploaded_segments(db, [row for row in rows if row])
+
+    if not combined_url:
+        raise HTTPException(
+            status_code=502, detail="Failed to upload full story audio"
+        )
+
+    failed_nodes = [
+        {
+            "node_id": str(result.request.node_id),
+            "display_order": result.request.display_order,
+            "attempts": result.attempts,
+            "error": result.error,
+        }
+        for result in results
+        if not result.ok
+    ]
+
+    return {
+        "story_id": story.id,
+        "language": language,
+        "audio_url": combined_url,
+        "status": "partial" if failed_nodes else "complete",
+        "total_nodes": len(nodes),
+        "segments_reused": sum(1 for r in results if r.source == SOURCE_REUSED),
+        "segments_synthesized": sum(
+            1 for r in results if r.source == SOURCE_SYNTHESIZED
+        ),
+        "failed_nodes": failed_nodes,
+        "total_duration_sec": total_frames / pcm_format.sample_rate,
+        "file_size": file_size,
+    }
+
+
+async def generate_story_audio_for_language(story_id: UUID, language: str):
+    """Background task to generate full story audio for a specific language"""
+    async with AsyncSessionLocal() as db:
+        story_result = await db.execute(select(Story).where(Story.id == story_id))
+        story = story_result.scalar_one_or_none()
+
+        if not story:
+            return
+
+        try:
+            result = await build_full_story_audio(db, story, language)
+        except HTTPException as exc:
+            print(f"Full story audio for {story.slug} ({language}) failed: {exc.detail}")
+            return
+
+        if result["failed_nodes"]:
+            print(
+                f"Full story audio for {story.slug} ({language}) is missing "
+                f"{len(result['failed_nodes'])} segments"
+            )
 
 
 @router.post("/story/{story_id}/pre-generate")
@@ -133,175 +540,153 @@ async def pre_generate_all_languages(
     }
 
 
-@router.post("/story/{story_id}/full")
-async def generate_full_story_audio(
+@router.get("/story/{story_id}/manifest", response_model=AudioManifestResponse)
+async def get_story_audio_manifest(
     story_id: UUID,
     language: str = Query(..., description="Language code: en, hi, kn"),
+    speaker: Optional[str] = Query(
+        None, description="Voice for every node (default: each node's character voice)"
+    ),
+    code_mix: float = Query(0.0, ge=0.0, le=1.0),
+    enqueue: bool = Query(False, description="Queue generation of pending variants"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Generate full story audio by concatenating all narration nodes"""
+    """
+    Audio for every node of a story in one response, so the player can
+    prefetch ahead: one node query, one Redis MGET and one audio_files query
+    """
     language = language.strip().lower()
-
-    # Get story and nodes
-    story_result = await execute_with_db_guard(
-        db, select(Story).where(Story.id == story_id)
-    )
-    story = story_result.scalar_one_or_none()
-
-    if not story:
-        raise HTTPException(status_code=404, detail="Story not found")
+    speaker = (speaker or "").strip().lower() or None
+    code_mix_ratio = Decimal(f"{code_mix:.2f}")
 
     nodes_result = await execute_with_db_guard(
         db,
         select(StoryNode)
         .options(joinedload(StoryNode.character))
         .where(StoryNode.story_id == story_id)
-        .where(StoryNode.node_type == "narration")
         .order_by(StoryNode.display_order)
     )
-    nodes = nodes_result.scalars().all()
-
+    # Nodes without text in the language (or English) have no audio to fetch
+    nodes = [
+        node
+        for node in nodes_result.scalars().all()
+        if node.text_content.get(language, node.text_content.get("en", ""))
+    ]
     if not nodes:
-        raise HTTPException(status_code=404, detail="No narration nodes found")
+        raise HTTPException(status_code=404, detail="No narrated nodes for this story")
+
+    variants = [
+        (node.id, language, speaker or resolve_node_speaker(node), code_mix_ratio)
+        for node in nodes
+    ]
+    found = await lookup_audio_variants(db, variants)
+
+    entries, queued = [], 0
+    for node, variant in zip(nodes, variants):
+        audio = found.get(variant)
+        if audio is None and enqueue:
+            try:
+                # False when the variant is already queued or running
+                if await audio_job_queue.enqueue(
+                    AudioJob(str(node.id), language, variant[2], str(code_mix_ratio))
+                ):
+                    queued += 1
+            except Exception as e:
+                print(f"Audio job enqueue error: {e}")
+        entries.append(
+            AudioManifestEntry(
+                node_id=node.id,
+                display_order=node.display_order,
+                speaker=variant[2],
+                status="ready" if audio else "pending",
+                audio_url=audio.audio_url if audio else None,
+                duration_sec=audio.duration_sec if audio else None,
+                file_size=audio.file_size if audio else None,
+            )
+        )
 
-    # Generate audio for each node with character-specific voices
-    audio_segments = []
+    ready = sum(1 for entry in entries if entry.status == "ready")
+    return AudioManifestResponse(
+        story_id=story_id,
+        language=language,
+        code_mix_ratio=float(code_mix_ratio),
+        nodes=entries,
+        ready=ready,
+        pending=len(entries) - ready,
+        queued=queued,
+    )
 
-    for node in nodes:
-        # Get character's voice or default to "meera"
-        speaker = "meera"  # default narrator voice
-        if (
-            node.character
-            and hasattr(node.character, "bulbul_speaker")
-            and node.character.bulbul_speaker
-        ):
-            speaker = node.character.bulbul_speaker
 
-        # Get text for requested language, fallback to English
-        text = node.text_content.get(language, node.text_content.get("en", ""))
-        if not text:
-            print(f"Warning: No text for node {node.id} in language {language}")
-            continue
+@router.post("/story/{story_id}/full")
+async def generate_full_story_audio(
+    story_id: UUID,
+    language: str = Query(..., description="Language code: en, hi, kn"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Generate full story audio by concatenating all narration nodes"""
+    language = language.strip().lower()
 
-        print(
-            f"Generating audio for node {node.display_order}: {speaker} voice, {len(text)} chars"
-        )
-        audio_bytes = await bulbul_service.synthesize(text, language, speaker)
-        if audio_bytes:
-            audio_segments.append(audio_bytes)
+    story_result = await execute_with_db_guard(
+        db, select(Story).where(Story.id == story_id)
+    )
+    story = story_result.scalar_one_or_none()
 
-    if not audio_segments:
-        raise HTTPException(
-            status_code=500, detail="Failed to generate any audio segments"
-        )
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
 
-    # Concatenate all audio segments using pydub
-    combined_audio = AudioSegment.empty()
-    for segment_bytes in audio_segments:
-        segment = AudioSegment.from_wav(io.BytesIO(segment_bytes))
-        combined_audio += segment
+    return await build_full_story_audio(db, story, language)
 
-    # Export as MP3
-    mp3_buffer = io.BytesIO()
-    combined_audio.export(mp3_buffer, format="mp3", bitrate="128k")
-    full_audio = mp3_buffer.getvalue()
 
-    # Upload combined audio
-    combined_url = await r2_service.upload_audio(
-        audio_bytes=full_audio,
-        story_slug=str(story.slug),
-        node_id="full-story",
+def audio_generating_response(
+    node_id: UUID, language: str, speaker: str, code_mix_ratio: Decimal
+) -> JSONResponse:
+    """202 telling the client the variant is being generated and to retry"""
+    retry_after = settings.audio_retry_after_sec
+    payload = AudioGeneratingResponse(
+        node_id=node_id,
         language=language,
-        speaker="combined",
+        code_mix_ratio=float(code_mix_ratio),
+        speaker=speaker,
+        estimated_wait_sec=retry_after,
+        retry_after=retry_after,
+    )
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=payload.model_dump(mode="json"),
+        headers={"Retry-After": str(retry_after)},
     )
-
-    return {
-        "story_id": story_id,
-        "language": language,
-        "audio_url": combined_url,
-        "total_nodes": len(nodes),
-        "total_duration_sec": len(combined_audio) / 1000,
-        "file_size": len(full_audio),
-    }
 
 
-@router.get("/{node_id}", response_model=Union[AudioResponse, AudioGeneratingResponse])
-async def get_audio(
-    node_id: UUID,
-    language: str = Query(..., description="Language code: en, hi, kn"),
-    speaker: str = Query("meera", description="Speaker voice"),
-    code_mix: float = Query(0.0, ge=0.0, le=1.0),
-    db: AsyncSession = Depends(get_db),
-):
-    """Get audio URL for a story node"""
-    language = language.strip().lower()
-    speaker = (speaker or "meera").strip().lower() or "meera"
-    code_mix_ratio = Decimal(f"{code_mix:.2f}")
+async def synthesize_and_store_audio(
+    db: AsyncSession,
+    node: StoryNode,
+    text: str,
+    language: str,
+    speaker: str,
+    code_mix_ratio: Decimal,
+) -> AudioResponse:
+    """Synthesize one audio variant, upload it and persist its AudioFile row"""
+    node_id = node.id
 
-    # Check cache first
-    cached_url = await cache_service.get_audio_url(
+    # Another worker may have finished this variant while we waited for the lock
+    cached = await cache_service.get_audio_entry(
         str(node_id), language, speaker, float(code_mix_ratio)
     )
-    if cached_url:
+    if cached:
         return AudioResponse(
             node_id=node_id,
             language=language,
             code_mix_ratio=float(code_mix_ratio),
             speaker=speaker,
-            audio_url=cached_url,
-            is_cached=True,
-        )
-
-    # Check database
-    result = await execute_with_db_guard(
-        db,
-        select(AudioFile).where(
-            AudioFile.node_id == node_id,
-            AudioFile.language_code == language,
-            AudioFile.speaker_id == speaker,
-            AudioFile.code_mix_ratio == code_mix_ratio,
-        )
-    )
-    audio_file = result.scalar_one_or_none()
-
-    if audio_file:
-        # Cache and return
-        await cache_service.set_audio_url(
-            str(node_id),
-            language,
-            speaker,
-            audio_file.r2_url,
-            float(audio_file.code_mix_ratio or 0.0),
-        )
-        return AudioResponse(
-            node_id=node_id,
-            language=language,
-            code_mix_ratio=float(audio_file.code_mix_ratio or 0.0),
-            speaker=speaker,
-            audio_url=audio_file.r2_url,
-            duration_sec=float(audio_file.duration_sec)
-            if audio_file.duration_sec
-            else None,
-            file_size=audio_file.file_size,
+            audio_url=cached["url"],
             is_cached=True,
+            checksum=cached.get("checksum"),
         )
 
-    # Get node text
-    result = await execute_with_db_guard(
-        db, select(StoryNode).where(StoryNode.id == node_id)
-    )
-    node = result.scalar_one_or_none()
-
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
-
-    text = node.text_content.get(language, node.text_content.get("en", ""))
-
-    if not text:
-        raise HTTPException(status_code=404, detail="Text not found for language")
-
     # Generate audio on-the-fly
-    audio_bytes = await bulbul_service.synthesize(text, language, speaker, code_mix)
+    audio_bytes = await bulbul_service.synthesize(
+        text, language, speaker, float(code_mix_ratio)
+    )
 
     if not audio_bytes:
         raise HTTPException(
@@ -333,13 +718,17 @@ async def get_audio(
         )
 
     # Save to database
+    checksum = hashlib.sha256(audio_bytes).hexdigest()
+    duration_sec = wav_duration_sec(audio_bytes)
     new_audio = AudioFile(
         node_id=node_id,
         language_code=language,
         code_mix_ratio=code_mix_ratio,
         speaker_id=speaker,
         r2_url=audio_url,
+        duration_sec=duration_sec,
         file_size=len(audio_bytes),
+        checksum=checksum,
     )
     db.add(new_audio)
     try:
@@ -364,19 +753,13 @@ async def get_audio(
                 speaker,
                 existing_audio.r2_url,
                 float(existing_audio.code_mix_ratio or 0.0),
-            )
-            return AudioResponse(
-                node_id=node_id,
-                language=language,
-                code_mix_ratio=float(existing_audio.code_mix_ratio or 0.0),
-                speaker=speaker,
-                audio_url=existing_audio.r2_url,
+                checksum=existing_audio.checksum,
                 duration_sec=float(existing_audio.duration_sec)
                 if existing_audio.duration_sec
                 else None,
                 file_size=existing_audio.file_size,
-                is_cached=True,
             )
+            return audio_file_response(node_id, language, speaker, existing_audio)
         raise HTTPException(status_code=500, detail="Failed to persist generated audio")
     except (SQLAlchemyError, OSError) as exc:
         raise HTTPException(
@@ -385,7 +768,14 @@ async def get_audio(
 
     # Cache
     await cache_service.set_audio_url(
-        str(node_id), language, speaker, audio_url, float(code_mix_ratio)
+        str(node_id),
+        language,
+        speaker,
+        audio_url,
+        float(code_mix_ratio),
+        checksum=checksum,
+        duration_sec=duration_sec,
+        file_size=len(audio_bytes),
     )
 
     return AudioResponse(
@@ -394,6 +784,158 @@ async def get_audio(
         code_mix_ratio=float(code_mix_ratio),
         speaker=speaker,
         audio_url=audio_url,
+        duration_sec=duration_sec,
         file_size=len(audio_bytes),
         is_cached=False,
+        checksum=checksum,
     )
+
+
+async def process_audio_job(job: AudioJob):
+    """Worker handler: generate and persist one queued audio variant"""
+    async with AsyncSessionLocal() as db:
+        result = await execute_with_db_guard(
+            db, select(StoryNode).where(StoryNode.id == UUID(job.node_id))
+        )
+        node = result.scalar_one_or_none()
+        if not node:
+            raise ValueError("Node not found")
+
+        text = node.text_content.get(job.language, node.text_content.get("en", ""))
+        if not text:
+            raise ValueError("Text not found for language")
+
+        try:
+            await audio_flight.run(
+                job.key,
+                lambda: synthesize_and_store_audio(
+                    db, node, text, job.language, job.speaker, Decimal(job.code_mix)
+                ),
+            )
+        except FlightInProgress as exc:
+            # Another worker is producing this variant; check back once it's
+            # done (the re-run finds the cached entry) rather than report done
+            raise JobDeferred(
+                settings.audio_retry_after_sec, "Generating in another worker"
+            ) from exc
+        await db.commit()
+
+
+audio_job_worker = AudioJobWorker(
+    audio_job_queue,
+    process_audio_job,
+    concurrency=settings.audio_job_concurrency,
+    failure_backoff=settings.audio_job_failure_backoff_sec,
+)
+
+
+@router.get("/{node_id}/status", response_model=AudioJobStatusResponse)
+async def get_audio_job_status(
+    node_id: UUID,
+    language: str = Query(..., description="Language code: en, hi, kn"),
+    speaker: str = Query("meera", description="Speaker voice"),
+    code_mix: float = Query(0.0, ge=0.0, le=1.0),
+):
+    """Report the generation job state for one audio variant"""
+    language = language.strip().lower()
+    speaker = (speaker or "meera").strip().lower() or "meera"
+    code_mix_ratio = Decimal(f"{code_mix:.2f}")
+
+    job = AudioJob(str(node_id), language, speaker, str(code_mix_ratio))
+    try:
+        job_status = await audio_job_queue.get_status(job)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=503, detail="Audio job queue unavailable."
+        ) from exc
+
+    if not job_status:
+        raise HTTPException(status_code=404, detail="No generation job for this audio")
+
+    return AudioJobStatusResponse(
+        node_id=node_id,
+        language=language,
+        code_mix_ratio=float(code_mix_ratio),
+        speaker=speaker,
+        status=job_status["status"],
+        detail=job_status.get("detail"),
+        updated_at=datetime.fromtimestamp(job_status["updated_at"], tz=timezone.utc),
+        retry_after=math.ceil(retry_wait(job_status)) or None,
+    )
+
+
+@router.get("/{node_id}", response_model=Union[AudioResponse, AudioGeneratingResponse])
+async def get_audio(
+    node_id: UUID,
+    language: str = Query(..., description="Language code: en, hi, kn"),
+    speaker: str = Query("meera", description="Speaker voice"),
+    code_mix: float = Query(0.0, ge=0.0, le=1.0),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get audio URL for a story node"""
+    language = language.strip().lower()
+    speaker = (speaker or "meera").strip().lower() or "meera"
+    code_mix_ratio = Decimal(f"{code_mix:.2f}")
+
+    # Cache, then database; a hot variant whose entry is due for a re-check
+    # is looked up by one worker while the rest keep serving the cached URL
+    variant = (node_id, language, speaker, code_mix_ratio)
+    entry = await cache_service.get_or_compute(
+        audio_cache_key(str(node_id), language, speaker, float(code_mix_ratio)),
+        lambda: load_audio_entry(db, variant),
+        settings.audio_entry_refresh_sec,
+        settings.audio_cache_ttl_days * 86400,
+        # Not generated yet: cache the miss briefly so concurrent requests
+        # and 202 polls don't wait out the recompute lock
+        negative_ttl=settings.audio_miss_cache_sec,
+    )
+    if entry:
+        return audio_metadata_response(audio_entry_response(variant, entry), if_none_match)
+
+    # Get node text
+    result = await execute_with_db_guard(
+        db, select(StoryNode).where(StoryNode.id == node_id)
+    )
+    node = result.scalar_one_or_none()
+
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    text = node.text_content.get(language, node.text_content.get("en", ""))
+
+    if not text:
+        raise HTTPException(status_code=404, detail="Text not found for language")
+
+    if settings.audio_generation_mode == "queue":
+        job = AudioJob(str(node_id), language, speaker, str(code_mix_ratio))
+        try:
+            queued = await audio_job_queue.enqueue(job)
+            job_status = None if queued else await audio_job_queue.get_status(job)
+        except Exception as exc:
+            raise HTTPException(
+                status_code=503,
+                detail="Audio generation unavailable. Use browser speech as fallback.",
+            ) from exc
+        # A recent failure is reported until its retry_at, not retried per poll
+        wait = retry_wait(job_status)
+        if wait > 0:
+            raise HTTPException(
+                status_code=503,
+                detail="Audio generation failed. Use browser speech as fallback.",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        return audio_generating_response(node_id, language, speaker, code_mix_ratio)
+
+    # Only one synthesis/upload runs per variant; concurrent callers share it.
+    variant_key = f"{node_id}:{language}:{speaker}:{code_mix_ratio}"
+    try:
+        return await audio_flight.run(
+            variant_key,
+            lambda: synthesize_and_store_audio(
+                db, node, text, language, speaker, code_mix_ratio
+            ),
+            wait_timeout=settings.audio_flight_wait_sec,
+        )
+    except FlightInProgress:
+        return audio_generating_response(node_id, language, speaker, code_mix_ratio)
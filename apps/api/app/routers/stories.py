@@ -1,304 +1,111 @@
-import json
-from datetime import datetime, timezone
-from functools import lru_cache
-from pathlib import Path
-from typing import Any, Optional
-from uuid import NAMESPACE_URL, UUID, uuid5
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.exc import SQLAlchemyError
 
 from app.database import get_db
-from app.models.story import Story, StoryTranslation, Character, StoryNode, StoryChoice
+from app.models.story import Story
 from app.schemas.story import (
     StoryListResponse,
     StoryDetailResponse,
     StoryResponse,
-    StoryNodeResponse,
-    CharacterResponse,
-    ChoiceResponse,
 )
-from app.services.cache_service import CacheService
+from app.config import get_settings
+from app.utils.age_range import parse_age_range, ranges_overlap
+from app.services.cache_service import RESPONSE_CODEC, get_cache_service
+from app.services.db_circuit import DatabaseUnavailable, get_db_breaker
+from app.services.fallback_catalog import get_fallback_catalog
+from app.services.response_cache import (
+    CachedResponse,
+    build_cached_response,
+    etag_matches,
+    not_modified,
+)
+from app.services.story_graph import (
+    compile_loaded_story,
+    story_aggregate_query,
+    story_nodes_query,
+)
+from app.services.story_listing import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_STORY_SORT,
+    STORY_LIST_TAG,
+    STORY_SORTS,
+    StoryCursor,
+    fetch_story_page,
+    list_pagination,
+    story_list_cache_key,
+)
+from app.services.story_publish import story_cache_ttls
+from app.services.story_snapshot import (
+    current_snapshot,
+    render_story_detail,
+    snapshot_query,
+    story_detail_cache_key,
+    story_detail_etag,
+    story_detail_tag,
+)
 
 router = APIRouter()
-cache_service = CacheService()
-
-
-def translation_priority(language_code: str, requested_language: str) -> int:
-    if language_code == requested_language:
-        return 0
-    if language_code == "en":
-        return 1
-    return 2
-
-
-def parse_age_range(value: Optional[str]) -> Optional[tuple[int, int]]:
-    if not value or "-" not in value:
-        return None
-    low, high = value.split("-", 1)
-    try:
-        low_i = int(low.strip())
-        high_i = int(high.strip())
-        if low_i > high_i:
-            low_i, high_i = high_i, low_i
-        return low_i, high_i
-    except ValueError:
-        return None
-
-
-def ranges_overlap(a: tuple[int, int], b: tuple[int, int]) -> bool:
-    return a[0] <= b[1] and b[0] <= a[1]
-
-
-def get_localized_text(content: Optional[dict], language: str) -> str:
-    if not isinstance(content, dict):
-        return ""
-    return content.get(language, content.get("en", ""))
-
-
-def stable_uuid(*parts: str) -> UUID:
-    return uuid5(NAMESPACE_URL, ":".join(parts))
-
-
-def select_translation(
-    translations: dict[str, Any], requested_language: str
-) -> tuple[Optional[str], Optional[dict[str, Any]]]:
-    if not translations:
-        return None, None
-
-    if requested_language in translations:
-        return requested_language, translations[requested_language]
-    if "en" in translations:
-        return "en", translations["en"]
-
-    first_language = sorted(translations.keys())[0]
-    return first_language, translations[first_language]
-
-
-@lru_cache(maxsize=1)
-def load_fallback_stories() -> list[dict[str, Any]]:
-    scripts_dir = Path(__file__).resolve().parents[2] / "scripts"
-    stories: list[dict[str, Any]] = []
-    for json_path in sorted(scripts_dir.glob("story_*.json")):
-        try:
-            with json_path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                stories.append(data)
-        except Exception:
-            continue
-    return stories
+settings = get_settings()
+cache_service = get_cache_service()
 
 
 def build_story_list_from_fallback(
-    requested_language: str, age_range: Optional[str]
+    requested_language: str,
+    age_range: Optional[str],
+    region: Optional[str] = None,
+    available_language: Optional[str] = None,
+    sort: str = DEFAULT_STORY_SORT,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
 ) -> StoryListResponse:
+    story_sort = STORY_SORTS[sort]
+    page_cursor = StoryCursor.decode(cursor, story_sort) if cursor else None
     requested_range = parse_age_range(age_range)
-    now = datetime.now(timezone.utc)
     data: list[StoryResponse] = []
 
-    for story in load_fallback_stories():
-        story_age_range = story.get("age_range", "")
+    for story in get_fallback_catalog().index().stories:
+        if region and story.region != region:
+            continue
         if age_range:
-            story_range = parse_age_range(story_age_range)
-            if requested_range and story_range:
-                if not ranges_overlap(requested_range, story_range):
+            if requested_range and story.age_bounds:
+                if not ranges_overlap(requested_range, story.age_bounds):
                     continue
-            elif story_age_range != age_range:
+            elif story.age_range != age_range:
                 continue
-
-        translations = story.get("translations")
-        if not isinstance(translations, dict):
-            continue
-
-        selected_language, selected_translation = select_translation(
-            translations, requested_language
-        )
-        if not selected_translation:
-            continue
-
-        raw_nodes = story.get("nodes")
-        nodes = raw_nodes if isinstance(raw_nodes, list) else []
-        choices_count = 0
-        for node in nodes:
-            if isinstance(node, dict) and isinstance(node.get("choices"), list):
-                choices_count += len(node["choices"])
-
-        slug = str(story.get("slug", "")).strip()
-        if not slug:
+        if available_language and available_language not in story.translations:
             continue
 
-        data.append(
-            StoryResponse(
-                id=stable_uuid("fallback", "story", slug),
-                slug=slug,
-                title=str(selected_translation.get("title", slug)),
-                description=str(selected_translation.get("description", "")),
-                language=selected_language or requested_language,
-                age_range=story_age_range or "all",
-                region=str(story.get("region", "unknown")),
-                moral=story.get("moral"),
-                duration_min=int(story.get("duration_min", 0) or 0),
-                cover_image=str(story.get("cover_image", "")),
-                character_count=len(story.get("characters", [])),
-                choice_count=choices_count,
-                is_completed_translation=True,
-                created_at=now,
-            )
-        )
+        summary = story.summary(requested_language)
+        if summary is not None:
+            data.append(summary)
 
-    response = StoryListResponse(
-        data=data,
-        pagination={
-            "page": 1,
-            "limit": len(data),
-            "total": len(data),
-            "total_pages": 1,
-            "has_next": False,
-            "has_prev": False,
-        },
+    data.sort(
+        key=lambda story: (story_sort.value(story), story.id), reverse=story_sort.descending
+    )
+    if page_cursor:
+        data = [story for story in data if page_cursor.precedes(story_sort, story)]
+    page, next_cursor = data[:limit], None
+    if len(data) > limit:
+        next_cursor = StoryCursor(story_sort.value(page[-1]), page[-1].id).encode(story_sort)
+
+    return StoryListResponse(
+        data=page, pagination=list_pagination(sort, limit, cursor, next_cursor)
     )
-    return response
 
 
 def build_story_detail_from_fallback(
     slug: str, requested_language: str
 ) -> Optional[StoryDetailResponse]:
-    match = None
-    for story in load_fallback_stories():
-        if str(story.get("slug", "")).strip() == slug:
-            match = story
-            break
-
-    if match is None:
-        return None
-
-    translations = match.get("translations")
-    if not isinstance(translations, dict):
-        return None
-
-    selected_language, selected_translation = select_translation(
-        translations, requested_language
-    )
-    if not selected_translation:
-        return None
-
-    character_map: dict[str, CharacterResponse] = {}
-    characters: list[CharacterResponse] = []
-    for char in match.get("characters", []):
-        if not isinstance(char, dict):
-            continue
-        char_slug = str(char.get("slug", "")).strip()
-        if not char_slug:
-            continue
-        char_id = stable_uuid("fallback", "story", slug, "character", char_slug)
-        response = CharacterResponse(
-            id=char_id,
-            slug=char_slug,
-            name=str(char.get("name", char_slug)),
-            voice_profile=str(char.get("voice_profile", "narrator")),
-            bulbul_speaker=str(char.get("bulbul_speaker", "meera")),
-            avatar_url=char.get("avatar_url"),
-        )
-        characters.append(response)
-        character_map[char_slug] = response
-
-    raw_nodes = match.get("nodes")
-    nodes_data = raw_nodes if isinstance(raw_nodes, list) else []
-    sorted_nodes = sorted(
-        [n for n in nodes_data if isinstance(n, dict)],
-        key=lambda x: int(x.get("display_order", 0) or 0),
-    )
-    if not sorted_nodes:
-        return None
-
-    node_id_by_order: dict[int, UUID] = {}
-    for node in sorted_nodes:
-        order = int(node.get("display_order", 0) or 0)
-        node_id_by_order[order] = stable_uuid("fallback", "story", slug, "node", str(order))
-
-    nodes: list[StoryNodeResponse] = []
-    start_node_id: Optional[UUID] = None
-    for node in sorted_nodes:
-        order = int(node.get("display_order", 0) or 0)
-        node_id = node_id_by_order[order]
-        if bool(node.get("is_start")):
-            start_node_id = node_id
-
-        choice_responses: Optional[list[ChoiceResponse]] = None
-        raw_choices = node.get("choices")
-        if node.get("node_type") == "choice" and isinstance(raw_choices, list):
-            choice_responses = []
-            for idx, choice in enumerate(raw_choices):
-                if not isinstance(choice, dict):
-                    continue
-                choice_key = str(choice.get("choice_key", f"C{idx+1}"))
-                next_order = choice.get("next_node_order")
-                next_node_id = (
-                    node_id_by_order.get(int(next_order))
-                    if isinstance(next_order, int)
-                    else None
-                )
-                choice_responses.append(
-                    ChoiceResponse(
-                        id=stable_uuid(
-                            "fallback",
-                            "story",
-                            slug,
-                            "node",
-                            str(order),
-                            "choice",
-                            choice_key,
-                        ),
-                        choice_key=choice_key,
-                        text=get_localized_text(choice.get("text"), selected_language or "en"),
-                        next_node_id=next_node_id,
-                    )
-                )
-
-        nodes.append(
-            StoryNodeResponse(
-                id=node_id,
-                node_type=str(node.get("node_type", "narration")),
-                display_order=order,
-                is_start=bool(node.get("is_start")),
-                is_end=bool(node.get("is_end")),
-                text=get_localized_text(node.get("text"), selected_language or "en"),
-                character=character_map.get(str(node.get("character_slug", ""))),
-                choices=choice_responses,
-            )
-        )
-
-    if start_node_id is None:
-        start_node_id = nodes[0].id
-
-    now = datetime.now(timezone.utc)
-    return StoryDetailResponse(
-        id=stable_uuid("fallback", "story", slug),
-        slug=slug,
-        title=str(selected_translation.get("title", slug)),
-        description=str(selected_translation.get("description", "")),
-        language=selected_language or requested_language,
-        age_range=str(match.get("age_range", "all")),
-        region=str(match.get("region", "unknown")),
-        moral=match.get("moral"),
-        duration_min=int(match.get("duration_min", 0) or 0),
-        cover_image=str(match.get("cover_image", "")),
-        available_languages=sorted(translations.keys()),
-        characters=characters,
-        nodes=nodes,
-        start_node_id=start_node_id,
-        created_at=now,
-        updated_at=now,
-    )
+    story = get_fallback_catalog().index().by_slug.get(slug)
+    return story.detail(requested_language) if story is not None else None
 
 
 async def execute_with_db_guard(db: AsyncSession, statement):
     try:
-        return await db.execute(statement)
-    except (SQLAlchemyError, OSError) as exc:
+        return await get_db_breaker().execute(db, statement)
+    except DatabaseUnavailable as exc:
         raise HTTPException(
             status_code=503, detail="Database unavailable. Please try again."
         ) from exc
@@ -308,295 +115,144 @@ async def execute_with_db_guard(db: AsyncSession, statement):
 async def list_stories(
     language: Optional[str] = Query("en", description="Language code"),
     age_range: Optional[str] = None,
+    region: Optional[str] = None,
+    available_language: Optional[str] = Query(
+        None, description="Only stories translated into this language"
+    ),
+    sort: str = Query(DEFAULT_STORY_SORT, description=f"One of: {', '.join(STORY_SORTS)}"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all stories with pagination"""
+    """List stories a page at a time, newest first by default"""
     requested_language = (language or "en").strip().lower()
-
-    # Check cache first
-    cache_key = f"stories:v2:list:{requested_language}:{age_range or 'all'}"
-    cached = await cache_service.get(cache_key)
-    if cached:
-        return StoryListResponse(**cached)
-    try:
-        # Subquery for character count per story
-        char_count_subq = (
-            select(Character.story_id, func.count(Character.id).label("char_count"))
-            .group_by(Character.story_id)
-            .subquery()
-        )
-
-        # Subquery for choice count per story (via StoryNode)
-        choice_count_subq = (
-            select(StoryNode.story_id, func.count(StoryChoice.id).label("choice_count"))
-            .join(StoryChoice, StoryNode.id == StoryChoice.node_id)
-            .group_by(StoryNode.story_id)
-            .subquery()
-        )
-
-        # Get active stories with counts
-        query = (
-            select(
-                Story,
-                char_count_subq.c.char_count,
-                choice_count_subq.c.choice_count,
-            )
-            .outerjoin(char_count_subq, Story.id == char_count_subq.c.story_id)
-            .outerjoin(choice_count_subq, Story.id == choice_count_subq.c.story_id)
-            .where(Story.is_active == True)
-        )
-
-        result = await execute_with_db_guard(db, query)
-        rows = result.all()
-        requested_range = parse_age_range(age_range)
-        story_ids = [story.id for story, _, _ in rows]
-
-        translations_by_story = {}
-        if story_ids:
-            translation_result = await execute_with_db_guard(
+    available_language = (available_language or "").strip().lower() or None
+    story_sort = STORY_SORTS.get(sort)
+    if story_sort is None:
+        raise HTTPException(status_code=400, detail="Invalid sort")
+    page_cursor = StoryCursor.decode(cursor, story_sort) if cursor else None
+    if cursor and page_cursor is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async def compute() -> CachedResponse:
+        try:
+            response = await fetch_story_page(
                 db,
-                select(StoryTranslation).where(
-                    StoryTranslation.story_id.in_(story_ids),
-                )
+                requested_language,
+                age_range,
+                region,
+                available_language,
+                sort,
+                limit,
+                cursor,
+                execute=execute_with_db_guard,
             )
-            for translation in translation_result.scalars().all():
-                existing = translations_by_story.get(translation.story_id)
-                if existing is None:
-                    translations_by_story[translation.story_id] = translation
-                    continue
-
-                if translation_priority(
-                    translation.language_code, requested_language
-                ) < translation_priority(existing.language_code, requested_language):
-                    translations_by_story[translation.story_id] = translation
-
-        stories = []
-        for story, char_count, choice_count in rows:
-            if age_range:
-                story_range = parse_age_range(story.age_range)
-                if requested_range and story_range:
-                    if not ranges_overlap(requested_range, story_range):
-                        continue
-                elif story.age_range != age_range:
-                    continue
-
-            translation = translations_by_story.get(story.id)
-            if not translation:
-                continue
-
-            stories.append(
-                StoryResponse(
-                    id=story.id,
-                    slug=story.slug,
-                    title=translation.title,
-                    description=translation.description or "",
-                    language=translation.language_code,
-                    age_range=story.age_range,
-                    region=story.region,
-                    moral=story.moral,
-                    duration_min=story.duration_min or 0,
-                    cover_image=story.cover_image or "",
-                    character_count=char_count or 0,
-                    choice_count=choice_count or 0,
-                    is_completed_translation=translation.is_complete,
-                    created_at=story.created_at,
-                )
+        except HTTPException as exc:
+            if exc.status_code != 503:
+                raise
+            response = build_story_list_from_fallback(
+                requested_language,
+                age_range,
+                region=region,
+                available_language=available_language,
+                sort=sort,
+                limit=limit,
+                cursor=cursor,
             )
+        # Cached as encoded bytes; hits skip model validation
+        return build_cached_response(response)
+
+    # One worker refreshes a stale page while the rest serve it; publishing
+    # a story rewrites or drops every tagged page
+    cached = await cache_service.get_or_compute(
+        story_list_cache_key(
+            requested_language, age_range, region, available_language, sort, limit, cursor
+        ),
+        compute,
+        *story_cache_ttls(),
+        codec=RESPONSE_CODEC,
+        tags=[STORY_LIST_TAG],
+    )
+    return cached.render()
 
-        response = StoryListResponse(
-            data=stories,
-            pagination={
-                "page": 1,
-                "limit": len(stories),
-                "total": len(stories),
-                "total_pages": 1,
-                "has_next": False,
-                "has_prev": False,
-            },
-        )
-    except HTTPException as exc:
-        if exc.status_code != 503:
-            raise
-        response = build_story_list_from_fallback(requested_language, age_range)
 
-    # Cache for 10 minutes
-    await cache_service.set(cache_key, response.model_dump(mode="json"), ttl=600)
+async def assemble_story_detail(
+    db: AsyncSession, slug: str, requested_language: str
+) -> tuple[Story, StoryDetailResponse]:
+    """Render a story's detail from its rows in two round trips"""
+    # Story, translations and characters, then nodes with their choices
+    result = await execute_with_db_guard(
+        db, story_aggregate_query(slug).where(Story.is_active == True)
+    )
+    story = result.unique().scalar_one_or_none()
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+
+    translations = list(story.translations)
+    translations_by_lang = {t.language_code: t for t in translations}
+    translation = (
+        translations_by_lang.get(requested_language)
+        or translations_by_lang.get("en")
+        or (translations[0] if translations else None)
+    )
+    if not translation:
+        raise HTTPException(status_code=404, detail="Story translation not found")
+
+    result = await execute_with_db_guard(db, story_nodes_query(story.id))
+    node_rows = result.unique().scalars().all()
+    if not node_rows:
+        raise HTTPException(status_code=404, detail="Story has no nodes")
 
-    return response
+    # Nodes come back sorted by display_order; characters are keyed by id
+    graph = compile_loaded_story(story, node_rows)
+    available_languages = sorted(translations_by_lang.keys())
+    return story, render_story_detail(story, graph, translation, available_languages)
 
 
 @router.get("/{slug}", response_model=StoryDetailResponse)
 async def get_story(
     slug: str,
     language: Optional[str] = Query("en", description="Language code"),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
 ):
     """Get story details with nodes and choices"""
     requested_language = (language or "en").strip().lower()
+    cache_headers = {"Cache-Control": settings.story_cache_control}
 
-    # Check cache first
-    cache_key = f"stories:v2:detail:{slug}:{requested_language}"
-    cached = await cache_service.get(cache_key)
-    if cached:
-        return StoryDetailResponse(**cached)
-
-    try:
-        # Get story
-        result = await execute_with_db_guard(
-            db,
-            select(Story).where(Story.slug == slug, Story.is_active == True)
-        )
-        story = result.scalar_one_or_none()
-
-        if not story:
-            raise HTTPException(status_code=404, detail="Story not found")
-
-        # Get all translations once (for fallback + available languages)
-        result = await execute_with_db_guard(
-            db,
-            select(StoryTranslation).where(StoryTranslation.story_id == story.id)
-        )
-        translations = result.scalars().all()
-        translations_by_lang = {t.language_code: t for t in translations}
-        translation = (
-            translations_by_lang.get(requested_language)
-            or translations_by_lang.get("en")
-            or (translations[0] if translations else None)
-        )
-        selected_language = (
-            translation.language_code if translation else requested_language
-        )
-        available_languages = sorted(translations_by_lang.keys()) or ["en"]
-
-        if not translation:
-            raise HTTPException(status_code=404, detail="Story translation not found")
-
-        # Get characters directly
-        result = await execute_with_db_guard(
-            db, select(Character).where(Character.story_id == story.id)
-        )
-        char_rows = result.scalars().all()
-
-        characters = []
-        for char in char_rows:
-            # Use translated name if available, fallback to DB name
-            translated_name = char.name
-            if char.name_translations and isinstance(char.name_translations, dict):
-                translated_name = char.name_translations.get(
-                    selected_language, char.name_translations.get("en", char.name)
-                )
-
-            characters.append(
-                CharacterResponse(
-                    id=char.id,
-                    slug=char.slug,
-                    name=translated_name,
-                    voice_profile=char.voice_profile,
-                    bulbul_speaker=char.bulbul_speaker,
-                    avatar_url=char.avatar_url,
-                )
-            )
-
-        # Get nodes directly
-        result = await execute_with_db_guard(
-            db, select(StoryNode).where(StoryNode.story_id == story.id)
-        )
-        node_rows = result.scalars().all()
-
-        # Get ALL choices for this story in one query (avoid N+1)
-        node_ids = [node.id for node in node_rows]
-        choices_by_node = {}
-        if node_ids:
-            result = await execute_with_db_guard(
-                db,
-                select(StoryChoice).where(StoryChoice.node_id.in_(node_ids))
-            )
-            for choice in result.scalars().all():
-                choices_by_node.setdefault(choice.node_id, []).append(choice)
-
-        sorted_nodes = sorted(node_rows, key=lambda x: x.display_order)
-        if not sorted_nodes:
-            raise HTTPException(status_code=404, detail="Story has no nodes")
-
-        nodes = []
-        start_node_id = None
-
-        for node in sorted_nodes:
-            if node.is_start:
-                start_node_id = node.id
-
-            # Get text for current language
-            text_content = get_localized_text(node.text_content, selected_language)
-
-            # Get character for this node
-            character = None
-            if node.character_id:
-                for char in characters:
-                    if str(char.id) == str(node.character_id):
-                        character = char
-                        break
-
-            # Get choices from pre-fetched map
-            choices = None
-            choice_rows = choices_by_node.get(node.id, [])
-            if node.node_type == "choice" and choice_rows:
-                choices = []
-                for choice in choice_rows:
-                    choice_text = get_localized_text(
-                        choice.text_content, selected_language
-                    )
-                    choices.append(
-                        ChoiceResponse(
-                            id=choice.id,
-                            choice_key=choice.choice_key,
-                            text=choice_text,
-                            next_node_id=choice.next_node_id,
-                        )
-                    )
-
-            nodes.append(
-                StoryNodeResponse(
-                    id=node.id,
-                    node_type=node.node_type,
-                    display_order=node.display_order,
-                    is_start=node.is_start,
-                    is_end=node.is_end,
-                    text=text_content,
-                    character=character,
-                    choices=choices,
-                )
-            )
-
-        if start_node_id is None:
-            start_node_id = sorted_nodes[0].id
-
-        response = StoryDetailResponse(
-            id=story.id,
-            slug=story.slug,
-            title=translation.title if translation else story.slug,
-            description=translation.description if translation else "",
-            language=selected_language,
-            age_range=story.age_range,
-            region=story.region,
-            moral=story.moral,
-            duration_min=story.duration_min or 0,
-            cover_image=story.cover_image or "",
-            available_languages=available_languages,
-            characters=characters,
-            nodes=nodes,
-            start_node_id=start_node_id,
-            created_at=story.created_at,
-            updated_at=story.updated_at,
-        )
-    except HTTPException as exc:
-        if exc.status_code != 503:
-            raise
-        fallback_response = build_story_detail_from_fallback(slug, requested_language)
-        if fallback_response is None:
-            raise HTTPException(status_code=404, detail="Story not found") from exc
-        response = fallback_response
-
-    # Cache for 10 minutes
-    await cache_service.set(cache_key, response.model_dump(mode="json"), ttl=600)
-
-    return response
+    async def compute() -> CachedResponse:
+        try:
+            # The published snapshot of the selected language, sent as stored
+            result = await execute_with_db_guard(db, snapshot_query(slug, requested_language))
+            row = result.first()
+            if row is None:
+                raise HTTPException(status_code=404, detail="Story not found")
+            body = current_snapshot(row)
+            if body is not None:
+                etag = story_detail_etag(row.id, row.updated_at, requested_language)
+                return CachedResponse(body=body, etag=etag)
+            # Not published for this version yet: render from the tables
+            story, response = await assemble_story_detail(db, slug, requested_language)
+            etag = story_detail_etag(story.id, story.updated_at, requested_language)
+            return build_cached_response(response, etag=etag)
+        except HTTPException as exc:
+            if exc.status_code != 503:
+                raise
+            fallback_response = build_story_detail_from_fallback(slug, requested_language)
+            if fallback_response is None:
+                raise HTTPException(status_code=404, detail="Story not found") from exc
+            # Fallback content isn't versioned by the database; tag the body
+            return build_cached_response(fallback_response)
+
+    # Tagged per slug so publishing can rewrite every requested-language key;
+    # a miss costs one snapshot query, so revalidation goes through it too
+    cached = await cache_service.get_or_compute(
+        story_detail_cache_key(slug, requested_language),
+        compute,
+        *story_cache_ttls(),
+        codec=RESPONSE_CODEC,
+        tags=[story_detail_tag(slug)],
+    )
+    if etag_matches(if_none_match, cached.etag):
+        return not_modified(cached.etag, cache_headers)
+    return cached.render(cache_headers)
@@ -4,12 +4,24 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 
 from app.database import get_db
-from app.models.progress import UserProgress
+from app.models.progress import ProgressEvent, UserProgress
 from app.models.story import Story, StoryNode, StoryTranslation
-from app.schemas.progress import ProgressResponse, ProgressSummary
+from app.schemas.progress import (
+    ChoiceEventResponse,
+    ChoiceHistoryPage,
+    ProgressResponse,
+    ProgressSummary,
+)
+from app.services.progress_buffer import (
+    ProgressDelta,
+    get_progress_buffer,
+    record_progress,
+    user_exists,
+)
+from app.services.progress_index import completion_from_index, refresh_progress_index
 from app.utils.auth import get_optional_user_id
 
 router = APIRouter()
@@ -32,6 +44,9 @@ async def get_user_progress(
             detail="Authentication required",
         )
 
+    # Read-your-writes: persist this user's buffered progress first
+    await get_progress_buffer().flush(user_id=resolved_user_id)
+
     result = await db.execute(
         select(UserProgress, Story).join(
             Story, UserProgress.story_id == Story.id
@@ -66,7 +81,7 @@ async def get_user_progress(
             play_count=progress.play_count,
             total_time_sec=progress.total_time_sec,
             last_played_at=progress.last_played_at,
-            choices_made=progress.choices_made or []
+            choices_made_count=progress.choices_count or 0,
         ))
     
     return ProgressSummary(
@@ -79,6 +94,43 @@ async def get_user_progress(
     )
 
 
+@router.get("/progress/history", response_model=ChoiceHistoryPage)
+async def get_choice_history(
+    user_id: Optional[UUID] = Query(
+        None, description="Backward-compatible user id query param"
+    ),
+    token_user_id: Optional[UUID] = Depends(get_optional_user_id),
+    story_id: Optional[UUID] = Query(None, description="Only choices made in this story"),
+    before: Optional[int] = Query(None, description="Cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """Page through a user's choices, newest first"""
+    resolved_user_id = token_user_id or user_id
+    if resolved_user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+        )
+
+    await get_progress_buffer().flush(user_id=resolved_user_id)
+
+    query = select(ProgressEvent).where(ProgressEvent.user_id == resolved_user_id)
+    if story_id is not None:
+        query = query.where(ProgressEvent.story_id == story_id)
+    if before is not None:
+        query = query.where(ProgressEvent.id < before)
+    # One extra row tells us whether an older page exists
+    result = await db.execute(query.order_by(ProgressEvent.id.desc()).limit(limit + 1))
+    events = result.scalars().all()
+
+    page = events[:limit]
+    return ChoiceHistoryPage(
+        data=[ChoiceEventResponse.model_validate(event) for event in page],
+        next_cursor=page[-1].id if len(events) > limit else None,
+    )
+
+
 @router.post("/progress")
 async def update_progress(
     user_id: Optional[UUID] = Query(
@@ -113,43 +165,39 @@ async def update_progress(
     if not current_node:
         raise HTTPException(status_code=400, detail="Invalid node for story")
 
-    # Find or create progress
-    result = await db.execute(
-        select(UserProgress).where(
-            UserProgress.user_id == resolved_user_id,
-            UserProgress.story_id == story_id
-        )
+    completion_percentage = completion_from_index(
+        story.progress_index,
+        current_node.id,
+        current_node.display_order,
+        bool(current_node.is_end),
     )
-    progress = result.scalar_one_or_none()
-    
-    if not progress:
-        progress = UserProgress(
-            user_id=resolved_user_id,
-            story_id=story_id,
-            current_node_id=current_node_id,
-            play_count=1,
-            total_time_sec=max(0, time_spent_sec),
-            last_played_at=datetime.now(timezone.utc),
+    if completion_percentage is None:
+        # Story predates the index; build it once so later updates skip this
+        await refresh_progress_index(db, story)
+        completion_percentage = completion_from_index(
+            story.progress_index,
+            current_node.id,
+            current_node.display_order,
+            bool(current_node.is_end),
         )
-        db.add(progress)
-    else:
-        progress.current_node_id = current_node_id
-        # Only increment play_count when starting from the beginning
-        if current_node.is_start:
-            progress.play_count += 1
-        progress.total_time_sec += max(0, time_spent_sec)
-        progress.last_played_at = datetime.now(timezone.utc)
-
-    max_order_result = await db.execute(
-        select(func.max(StoryNode.display_order)).where(StoryNode.story_id == story_id)
-    )
-    max_order = max_order_result.scalar() or 1
-    completion_percentage = min(
-        100.0, max(0.0, (current_node.display_order / max_order) * 100.0)
+
+    # Checked up front: a buffered write for an unknown user would only
+    # fail later, in a background flush, after this request returned 200
+    if not await user_exists(db, resolved_user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    delta = ProgressDelta(
+        user_id=resolved_user_id,
+        story_id=story_id,
+        current_node_id=current_node_id,
+        completion_percentage=completion_percentage,
+        completed_sticky=bool(is_completed or current_node.is_end),
+        # Only count a new play when starting from the beginning
+        play_count=1 if current_node.is_start else 0,
+        total_time_sec=max(0, time_spent_sec),
+        last_played_at=datetime.now(timezone.utc),
     )
-    progress.is_completed = bool(progress.is_completed or is_completed or current_node.is_end)
-    progress.completion_percentage = 100.0 if progress.is_completed else completion_percentage
-    
-    await db.flush()
-    
+    await record_progress(db, delta)
+
     return {"success": True}
+
@@ -1,5 +1,5 @@
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
 
@@ -14,6 +14,8 @@ class AudioResponse(BaseModel):
     file_size: Optional[int] = None
     is_cached: bool = True
     expires_at: Optional[datetime] = None
+    # sha256 of the audio; used for the ETag, not part of the payload
+    checksum: Optional[str] = Field(default=None, exclude=True)
     
     class Config:
         from_attributes = True
@@ -28,3 +30,35 @@ class AudioGeneratingResponse(BaseModel):
     status: str = "generating"
     estimated_wait_sec: int = 5
     retry_after: int = 5
+
+
+class AudioManifestEntry(BaseModel):
+    node_id: UUID
+    display_order: int
+    speaker: str
+    status: str  # ready, pending
+    audio_url: Optional[str] = None
+    duration_sec: Optional[float] = None
+    file_size: Optional[int] = None
+
+
+class AudioManifestResponse(BaseModel):
+    story_id: UUID
+    language: str
+    code_mix_ratio: float = 0.0
+    nodes: list[AudioManifestEntry]
+    ready: int
+    pending: int
+    queued: int = 0
+
+
+class AudioJobStatusResponse(BaseModel):
+    node_id: UUID
+    language: str
+    code_mix_ratio: float = 0.0
+    speaker: str = "meera"
+    status: str  # queued, running, done, failed
+    detail: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    # Failed: seconds until the variant will be generated again on request
+    retry_after: Optional[int] = None
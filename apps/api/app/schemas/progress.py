@@ -22,12 +22,29 @@ class ProgressResponse(BaseModel):
     play_count: int
     total_time_sec: int
     last_played_at: Optional[datetime] = None
-    choices_made: List[Dict[str, Any]]
+    choices_made_count: int = 0
     
     class Config:
         from_attributes = True
 
 
+class ChoiceEventResponse(BaseModel):
+    id: int
+    story_id: UUID
+    node_id: Optional[UUID] = None
+    choice_key: str
+    made_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ChoiceHistoryPage(BaseModel):
+    data: List[ChoiceEventResponse]
+    # Pass back as ?before= for the next (older) page; None when exhausted
+    next_cursor: Optional[int] = None
+
+
 class ProgressSummary(BaseModel):
     data: List[ProgressResponse]
     summary: Dict[str, Any]
@@ -1,4 +1,4 @@
 from app.services.bulbul_service import BulbulService
-from app.services.cache_service import CacheService
+from app.services.cache_service import CacheService, get_cache_service
 
-__all__ = ["BulbulService", "CacheService"]
+__all__ = ["BulbulService", "CacheService", "get_cache_service"]
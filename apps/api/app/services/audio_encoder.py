@@ -0,0 +1,146 @@
+"""
+Streaming MP3 encoding for combined story audio.
+
+WAV segments are sliced one at a time into raw PCM and piped into a single
+ffmpeg process; encoded MP3 chunks are yielded as soon as ffmpeg emits them,
+so memory stays bounded no matter how long the story is.
+"""
+
+import asyncio
+import io
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator
+
+from pydub import AudioSegment
+
+from app.utils.wav import WavFormatError, parse_wav_header, pcm_view
+
+# ffmpeg raw PCM input formats by sample width (bytes)
+FFMPEG_PCM_FORMATS = {1: "u8", 2: "s16le", 4: "s32le"}
+
+
+class AudioEncodingError(RuntimeError):
+    """A segment couldn't be decoded or ffmpeg failed"""
+
+
+class EncoderUnavailable(AudioEncodingError):
+    """ffmpeg isn't installed (or can't be started)"""
+
+
+@dataclass(frozen=True)
+class PCMFormat:
+    sample_rate: int = 44100  # matches speech_sample_rate requested from Bulbul
+    channels: int = 1
+    sample_width: int = 2
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+
+def iter_pcm_chunks(
+    wav_bytes: bytes, target: PCMFormat, chunk_frames: int = 44100
+) -> Iterator[bytes]:
+    """Yield the PCM payload of a WAV segment in target format, chunk by chunk"""
+    step = chunk_frames * target.frame_size
+    try:
+        info = parse_wav_header(wav_bytes)
+    except WavFormatError:
+        info = None
+
+    if (
+        info is not None
+        and info.sample_rate == target.sample_rate
+        and info.channels == target.channels
+        and info.sample_width == target.sample_width
+    ):
+        # Zero-copy slices of the original buffer
+        samples = pcm_view(wav_bytes, info)
+        for start in range(0, len(samples), step):
+            yield samples[start : start + step]
+        return
+
+    # Rare: a segment in another format is converted once via pydub
+    try:
+        segment = (
+            AudioSegment.from_wav(io.BytesIO(wav_bytes))
+            .set_frame_rate(target.sample_rate)
+            .set_channels(target.channels)
+            .set_sample_width(target.sample_width)
+        )
+    except FileNotFoundError as exc:
+        raise EncoderUnavailable(f"ffmpeg not found: {exc}") from exc
+    except Exception as exc:
+        # pydub raises CouldntDecodeError, wave.Error, EOFError, ...
+        raise AudioEncodingError(f"Could not decode audio segment: {exc}") from exc
+    raw = segment.raw_data
+    for start in range(0, len(raw), step):
+        yield raw[start : start + step]
+
+
+async def encode_mp3_stream(
+    pcm_chunks: AsyncIterator[bytes],
+    pcm_format: PCMFormat,
+    bitrate: str = "128k",
+    read_size: int = 64 * 1024,
+) -> AsyncIterator[bytes]:
+    """Pipe raw PCM through one ffmpeg process and yield MP3 chunks"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            FFMPEG_PCM_FORMATS[pcm_format.sample_width],
+            "-ar",
+            str(pcm_format.sample_rate),
+            "-ac",
+            str(pcm_format.channels),
+            "-i",
+            "pipe:0",
+            "-f",
+            "mp3",
+            "-b:a",
+            bitrate,
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as exc:
+        raise EncoderUnavailable(f"Could not start ffmpeg: {exc}") from exc
+
+    async def feed():
+        try:
+            async for chunk in pcm_chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+
+    async def drain_stderr() -> bytes:
+        return await process.stderr.read()
+
+    feeder = asyncio.create_task(feed())
+    stderr_reader = asyncio.create_task(drain_stderr())
+    try:
+        while True:
+            chunk = await process.stdout.read(read_size)
+            if not chunk:
+                break
+            yield chunk
+
+        await feeder
+        return_code = await process.wait()
+        if return_code != 0:
+            error = (await stderr_reader).decode(errors="replace").strip()
+            raise AudioEncodingError(f"ffmpeg exited with {return_code}: {error}")
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        if not stderr_reader.done():
+            stderr_reader.cancel()
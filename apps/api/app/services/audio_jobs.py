@@ -0,0 +1,303 @@
+"""
+Background audio generation jobs.
+
+A cache/DB miss in GET /audio/{node_id} enqueues one job per audio variant and
+answers 202 right away; a small pool of workers drains the queue with bounded
+concurrency. Redis backs the queue in production so every uvicorn worker sees
+the same jobs; the in-memory backend is for single-process dev and tests.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from app.services.cache_service import CacheService
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+ACTIVE_STATES = {JOB_QUEUED, JOB_RUNNING}
+
+
+@dataclass(frozen=True)
+class AudioJob:
+    node_id: str
+    language: str
+    speaker: str
+    code_mix: str = "0.00"
+
+    @property
+    def key(self) -> str:
+        return f"{self.node_id}:{self.language}:{self.speaker}:{self.code_mix}"
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "AudioJob":
+        return cls(**json.loads(raw))
+
+
+class JobDeferred(Exception):
+    """Raised by a handler when a job can't run yet; it's re-queued after delay"""
+
+    def __init__(self, delay: float, reason: Optional[str] = None):
+        super().__init__(reason)
+        self.delay = delay
+        self.reason = reason
+
+
+def build_status(
+    state: str, detail: Optional[str] = None, retry_after: Optional[float] = None
+) -> dict[str, Any]:
+    status = {"status": state, "detail": detail, "updated_at": time.time()}
+    if retry_after is not None:
+        status["retry_at"] = status["updated_at"] + retry_after
+    return status
+
+
+def retry_wait(status: Optional[dict[str, Any]]) -> float:
+    """Seconds until a failed variant may be enqueued again (0 if it may now)"""
+    if not status or status["status"] != JOB_FAILED:
+        return 0.0
+    return max(0.0, status.get("retry_at", 0.0) - time.time())
+
+
+class InMemoryJobQueue:
+    """Process-local queue; job state is lost on restart"""
+
+    def __init__(self, status_ttl: int = 3600):
+        self.status_ttl = status_ttl
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._statuses: dict[str, dict[str, Any]] = {}
+
+    def _prune(self):
+        cutoff = time.time() - self.status_ttl
+        expired = [
+            key
+            for key, status in self._statuses.items()
+            if status["status"] not in ACTIVE_STATES and status["updated_at"] < cutoff
+        ]
+        for key in expired:
+            del self._statuses[key]
+
+    async def enqueue(self, job: AudioJob) -> bool:
+        """
+        Queue a job; returns False if the variant is already queued/running
+        or failed recently (until its retry_at)
+        """
+        self._prune()
+        current = self._statuses.get(job.key)
+        if current and (current["status"] in ACTIVE_STATES or retry_wait(current) > 0):
+            return False
+        self._statuses[job.key] = build_status(JOB_QUEUED)
+        await self._queue.put(job)
+        return True
+
+    async def requeue(self, job: AudioJob):
+        """Put a deferred job (still marked queued) back on the queue"""
+        await self._queue.put(job)
+
+    async def dequeue(self, timeout: float = 1.0) -> Optional[AudioJob]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def set_status(
+        self,
+        job: AudioJob,
+        state: str,
+        detail: Optional[str] = None,
+        retry_after: Optional[float] = None,
+    ):
+        self._statuses[job.key] = build_status(state, detail, retry_after)
+
+    async def get_status(self, job: AudioJob) -> Optional[dict[str, Any]]:
+        return self._statuses.get(job.key)
+
+
+class RedisJobQueue:
+    """Queue shared by all workers: a Redis list plus per-variant status keys"""
+
+    def __init__(
+        self,
+        cache_service: CacheService,
+        prefix: str = "audio:jobs",
+        status_ttl: int = 3600,
+        job_timeout: int = 300,
+    ):
+        self.cache_service = cache_service
+        self.queue_key = f"{prefix}:queue"
+        self.prefix = prefix
+        self.status_ttl = status_ttl
+        self.job_timeout = job_timeout
+
+    def _status_key(self, job: AudioJob) -> str:
+        return f"{self.prefix}:status:{job.key}"
+
+    def _pending_key(self, job: AudioJob) -> str:
+        return f"{self.prefix}:pending:{job.key}"
+
+    async def enqueue(self, job: AudioJob) -> bool:
+        r = await self.cache_service.connect()
+        # A recent failure isn't retried on every poll
+        raw = await r.get(self._status_key(job))
+        if raw and retry_wait(json.loads(raw)) > 0:
+            return False
+        # The pending marker dedupes enqueues across workers; it expires on its
+        # own if a worker dies mid-job so the variant can be retried.
+        if not await r.set(self._pending_key(job), "1", nx=True, ex=self.job_timeout):
+            return False
+        await r.setex(
+            self._status_key(job), self.status_ttl, json.dumps(build_status(JOB_QUEUED))
+        )
+        await r.lpush(self.queue_key, job.to_json())
+        return True
+
+    async def requeue(self, job: AudioJob):
+        """Put a deferred job (still marked queued) back on the queue"""
+        r = await self.cache_service.connect()
+        await r.set(self._pending_key(job), "1", ex=self.job_timeout)
+        await r.lpush(self.queue_key, job.to_json())
+
+    async def dequeue(self, timeout: float = 1.0) -> Optional[AudioJob]:
+        r = await self.cache_service.connect()
+        item = await r.brpop(self.queue_key, timeout=max(1, int(timeout)))
+        if not item:
+            return None
+        _, raw = item
+        return AudioJob.from_json(raw)
+
+    async def set_status(
+        self,
+        job: AudioJob,
+        state: str,
+        detail: Optional[str] = None,
+        retry_after: Optional[float] = None,
+    ):
+        r = await self.cache_service.connect()
+        await r.setex(
+            self._status_key(job),
+            self.status_ttl,
+            json.dumps(build_status(state, detail, retry_after)),
+        )
+        if state not in ACTIVE_STATES:
+            await r.delete(self._pending_key(job))
+
+    async def get_status(self, job: AudioJob) -> Optional[dict[str, Any]]:
+        r = await self.cache_service.connect()
+        raw = await r.get(self._status_key(job))
+        return json.loads(raw) if raw else None
+
+
+def build_audio_job_queue(
+    backend: str, cache_service: CacheService, status_ttl: int = 3600
+):
+    if backend == "redis":
+        return RedisJobQueue(cache_service, status_ttl=status_ttl)
+    return InMemoryJobQueue(status_ttl=status_ttl)
+
+
+class AudioJobWorker:
+    """
+    Drains a job queue with a fixed number of concurrent worker tasks. A
+    failed job keeps its status, with a retry_at failure_backoff seconds
+    out before the variant can be enqueued again; a deferred one stays
+    queued and is put back after its delay.
+    """
+
+    def __init__(
+        self,
+        queue,
+        handler: Callable[[AudioJob], Awaitable[None]],
+        concurrency: int = 2,
+        failure_backoff: float = 300.0,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.failure_backoff = failure_backoff
+        self._tasks: list[asyncio.Task] = []
+        self._deferred: set[asyncio.Task] = set()
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"audio-job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        tasks = self._tasks + list(self._deferred)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            try:
+                job = await self.queue.dequeue(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Audio job queue error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+
+            if job is None:
+                continue
+            await self.process(job)
+
+    async def process(self, job: AudioJob):
+        """Run one job and record its outcome"""
+        try:
+            await self.queue.set_status(job, JOB_RUNNING)
+            await self.handler(job)
+        except JobDeferred as deferred:
+            await self._defer(job, deferred)
+            return
+        except asyncio.CancelledError:
+            try:
+                await asyncio.shield(
+                    self.queue.set_status(job, JOB_FAILED, "Worker shut down")
+                )
+            except Exception:
+                pass
+            raise
+        except Exception as e:
+            detail = str(getattr(e, "detail", None) or e) or e.__class__.__name__
+            print(f"Audio job {job.key} failed: {detail}")
+            state, retry_after = JOB_FAILED, self.failure_backoff
+        else:
+            state, detail, retry_after = JOB_DONE, None, None
+
+        try:
+            await self.queue.set_status(job, state, detail, retry_after)
+        except Exception as e:
+            print(f"Audio job status error: {e}")
+
+    async def _defer(self, job: AudioJob, deferred: JobDeferred):
+        """Mark a job queued again and re-queue it once its delay is up"""
+
+        async def requeue_later():
+            await asyncio.sleep(deferred.delay)
+            await self.queue.requeue(job)
+
+        try:
+            await self.queue.set_status(job, JOB_QUEUED, deferred.reason)
+        except Exception as e:
+            print(f"Audio job status error: {e}")
+        task = asyncio.create_task(requeue_later(), name=f"audio-job-requeue-{job.key}")
+        self._deferred.add(task)
+        task.add_done_callback(self._deferred.discard)
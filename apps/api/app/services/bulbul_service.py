@@ -3,11 +3,18 @@ import base64
 import re
 from typing import Optional
 from app.config import get_settings
-from pydub import AudioSegment
-import io
+from app.services.http_client import get_http_client
+from app.utils.rate_limit import RateLimiter
+from app.utils.wav import WavFormatError, append_silence
 
 settings = get_settings()
 
+# Shared by every BulbulService in the process so parallel callers
+# (full-story builds, job workers, scripts) respect one provider budget.
+sarvam_rate_limiter = RateLimiter(
+    settings.sarvam_requests_per_sec, burst=settings.sarvam_rate_burst
+)
+
 # Language code mapping for Bulbul API
 LANGUAGE_CODES = {"en": "en-IN", "hi": "hi-IN", "kn": "kn-IN"}
 
@@ -29,14 +36,8 @@ def add_natural_pauses(text: str) -> str:
 def add_silence_to_audio(audio_bytes: bytes, silence_ms: int = 500) -> bytes:
     """Add silence at end of audio segment for natural pauses"""
     try:
-        audio = AudioSegment.from_wav(io.BytesIO(audio_bytes))
-        silence = AudioSegment.silent(duration=silence_ms)
-        audio_with_pause = audio + silence
-
-        buffer = io.BytesIO()
-        audio_with_pause.export(buffer, format="wav")
-        return buffer.getvalue()
-    except Exception as e:
+        return append_silence(audio_bytes, silence_ms)
+    except WavFormatError as e:
         print(f"Warning: Could not add silence: {e}")
         return audio_bytes
 
@@ -139,38 +140,39 @@ class BulbulService:
             "temperature": temperature,  # More expressive/human-like
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                print(f"Synthesizing: {speaker} ({bulbul_speaker}), {len(text)} chars")
-                response = await client.post(
-                    f"{self.base_url}/text-to-speech",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=60.0,
-                )
-                response.raise_for_status()
-
-                data = response.json()
-
-                # Extract audio from base64
-                if "audios" in data and len(data["audios"]) > 0:
-                    audio_b64 = data["audios"][0]
-                    audio_bytes = base64.b64decode(audio_b64)
-
-                    # IMPROVED: Add silence at end for natural pauses between nodes
-                    if add_pauses:
-                        audio_bytes = add_silence_to_audio(audio_bytes, silence_ms=800)
-
-                    return audio_bytes
-
-                return None
-
-            except httpx.HTTPError as e:
-                print(f"Bulbul API error: {e}")
-                return None
-            except Exception as e:
-                print(f"Unexpected error: {e}")
-                return None
+        client = get_http_client()
+        try:
+            await sarvam_rate_limiter.acquire()
+            print(f"Synthesizing: {speaker} ({bulbul_speaker}), {len(text)} chars")
+            response = await client.post(
+                f"{self.base_url}/text-to-speech",
+                headers=self.headers,
+                json=payload,
+                timeout=60.0,
+            )
+            response.raise_for_status()
+
+            data = response.json()
+
+            # Extract audio from base64
+            if "audios" in data and len(data["audios"]) > 0:
+                audio_b64 = data["audios"][0]
+                audio_bytes = base64.b64decode(audio_b64)
+
+                # IMPROVED: Add silence at end for natural pauses between nodes
+                if add_pauses:
+                    audio_bytes = add_silence_to_audio(audio_bytes, silence_ms=800)
+
+                return audio_bytes
+
+            return None
+
+        except httpx.HTTPError as e:
+            print(f"Bulbul API error: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            return None
 
     def get_speaker_for_character(self, character_name: str) -> str:
         """Get the appropriate Bulbul speaker voice for a character name"""
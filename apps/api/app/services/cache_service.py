@@ -1,15 +1,188 @@
+import asyncio
 import json
+import math
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 import redis.asyncio as redis
-from typing import Optional, Any
+from typing import Any, Awaitable, Callable, Iterable, Optional
+from uuid import uuid4
 from app.config import get_settings
+from app.services.response_cache import CachedResponse
 
 settings = get_settings()
 
+# Workers publish {"origin": instance_id, "keys": [...]} here on every write
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Delete the lock only if we still own it (compare-and-delete).
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+# Values written by get_or_compute start with a freshness header line:
+# "~f1 <soft expiry, epoch seconds> <seconds the compute took>\n"
+FRESHNESS_MARKER = b"~f1 "
+# Payload of a cached "no value" from get_or_compute (negative_ttl); plain
+# get() decodes it as null, i.e. a miss
+NEGATIVE_PAYLOAD = b"null"
+
+
+def jittered_ttl(ttl: float, jitter: float = 0.1) -> int:
+    """
+    TTL spread by +/- jitter (a fraction), so entries written together -
+    e.g. warmed on publish - don't all expire and get rebuilt together
+    """
+    return max(1, round(ttl * random.uniform(1 - jitter, 1 + jitter)))
+
+
+def audio_cache_key(node_id: str, language: str, speaker: str, code_mix: float = 0.0) -> str:
+    return f"audio:{node_id}:{language}:{speaker}:{code_mix:.2f}"
+
+
+def audio_cache_entry(
+    url: str,
+    checksum: Optional[str] = None,
+    duration_sec: Optional[float] = None,
+    file_size: Optional[int] = None,
+) -> dict:
+    entry = {"url": url, "checksum": checksum}
+    if duration_sec is not None or file_size is not None:
+        entry.update(duration_sec=duration_sec, file_size=file_size)
+    return entry
+
+
+def add_freshness(payload: bytes, soft_expires_at: float, delta: float) -> bytes:
+    return FRESHNESS_MARKER + f"{soft_expires_at:.3f} {delta:.4f}\n".encode() + payload
+
+
+def split_freshness(raw):
+    """
+    (payload, soft expiry, compute seconds) of a stored value. Values
+    written without a header (set/set_response) never go soft.
+    """
+    newline, marker = b"\n", FRESHNESS_MARKER
+    if isinstance(raw, str):
+        newline, marker = "\n", marker.decode()
+    if not raw.startswith(marker):
+        return raw, math.inf, 0.0
+    header, _, payload = raw.partition(newline)
+    _, soft_expires_at, delta = header.split()
+    return payload, float(soft_expires_at), float(delta)
+
+
+@dataclass(frozen=True)
+class Codec:
+    encode: Callable[[Any], bytes]
+    decode: Callable[[Any], Optional[Any]]
+
+
+JSON_CODEC = Codec(lambda value: json.dumps(value).encode(), json.loads)
+RESPONSE_CODEC = Codec(
+    lambda response: response.to_envelope(settings.response_cache_gzip_min_bytes),
+    CachedResponse.from_envelope,
+)
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: Any
+    soft_expires_at: float
+    delta: float
+
+    def should_refresh(self, beta: float = 1.0) -> bool:
+        """
+        XFetch early expiration: true once past the soft expiry, and before
+        it with a probability that rises as it nears - sooner for values
+        that took longer (delta) to compute - so one caller recomputes
+        ahead of time instead of everyone at the deadline.
+        """
+        gap = -self.delta * beta * math.log(1.0 - random.random())
+        return time.time() + gap >= self.soft_expires_at
+
+
+class LocalCache:
+    """
+    Size-bounded, TTL-bounded LRU of decoded values. Entries are shared with
+    callers, so cached values must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
 
 class CacheService:
-    def __init__(self):
+    def __init__(self, local_max_entries: Optional[int] = None):
         self.redis_url = settings.redis_url
         self._redis: Optional[redis.Redis] = None
+        self._redis_binary: Optional[redis.Redis] = None
+        self.instance_id = uuid4().hex
+        self.redis_hits = 0
+        self.redis_misses = 0
+
+        # In-process tier; only consulted while the invalidation listener
+        # is subscribed, so a lost subscription can't serve stale values.
+        if local_max_entries is None:
+            local_max_entries = settings.local_cache_max_entries
+        self.local: Optional[LocalCache] = (
+            LocalCache(local_max_entries, settings.local_cache_ttl_sec)
+            if local_max_entries > 0
+            else None
+        )
+        self._local_active = False
+        self._listener: Optional[asyncio.Task] = None
+        # Bumped on every remote invalidation; a Redis read that raced one
+        # is returned but not kept locally.
+        self._invalidations = 0
+        # get_or_compute calls running in this process, by key
+        self._computing: dict[str, asyncio.Future] = {}
+        self.recomputes = 0
+        self.stale_served = 0
     
     async def connect(self):
         """Connect to Redis"""
@@ -20,41 +193,427 @@ class CacheService:
                 decode_responses=True
             )
         return self._redis
+
+    async def connect_binary(self):
+        """Connection for raw byte values (pre-serialized responses)"""
+        if self._redis_binary is None:
+            self._redis_binary = await redis.from_url(
+                self.redis_url, decode_responses=False
+            )
+        return self._redis_binary
     
-    async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
+    @property
+    def local_enabled(self) -> bool:
+        return self.local is not None and self._local_active
+
+    async def _get_through(self, key: str, connect, decode) -> Optional[Any]:
+        """Local tier first, then Redis; Redis hits are kept locally"""
+        if self.local_enabled:
+            value = self.local.get(key)
+            if value is not None:
+                return value
+        invalidations = self._invalidations
         try:
-            r = await self.connect()
+            r = await connect()
             value = await r.get(key)
-            if value:
-                return json.loads(value)
-            return None
+            decoded = decode(value) if value else None
+            if decoded is None:
+                self.redis_misses += 1
+                return None
+            self.redis_hits += 1
+            if self.local_enabled and invalidations == self._invalidations:
+                self.local.set(key, decoded)
+            return decoded
         except Exception as e:
             print(f"Cache get error: {e}")
             return None
+
+    async def _set_through(
+        self, key: str, value: Any, encoded, ttl: int, connect, tags: Iterable[str] = ()
+    ):
+        if self.local_enabled:
+            self.local.set(key, value, ttl)
+        try:
+            r = await connect()
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.setex(key, ttl, encoded)
+                for tag in tags:
+                    # Tag sets outlive their members; stale members are harmless
+                    pipe.sadd(tag, key)
+                    pipe.expire(tag, ttl * 2)
+                pipe.publish(INVALIDATION_CHANNEL, self._invalidation_message(key))
+                await pipe.execute()
+        except Exception as e:
+            print(f"Cache set error: {e}")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from cache"""
+        value = await self._get_through(
+            key, self.connect, lambda raw: json.loads(split_freshness(raw)[0])
+        )
+        return value.value if isinstance(value, CacheEntry) else value
     
+    async def get_many(self, keys: list[str]) -> list[Optional[Any]]:
+        """get() for many keys: local tier, then one Redis MGET for the rest"""
+        values: list[Optional[Any]] = [None] * len(keys)
+        pending: list[int] = []
+        for index, key in enumerate(keys):
+            value = self.local.get(key) if self.local_enabled else None
+            if value is None:
+                pending.append(index)
+            else:
+                values[index] = value.value if isinstance(value, CacheEntry) else value
+        if not pending:
+            return values
+
+        invalidations = self._invalidations
+        try:
+            r = await self.connect()
+            raw_values = await r.mget([keys[index] for index in pending])
+        except Exception as e:
+            print(f"Cache get error: {e}")
+            return values
+        for index, raw in zip(pending, raw_values):
+            try:
+                value = json.loads(split_freshness(raw)[0]) if raw else None
+            except ValueError:
+                value = None
+            if value is None:
+                self.redis_misses += 1
+                continue
+            self.redis_hits += 1
+            values[index] = value
+            if self.local_enabled and invalidations == self._invalidations:
+                self.local.set(keys[index], value)
+        return values
+
     async def set(self, key: str, value: Any, ttl: int = 3600):
         """Set value in cache with TTL (seconds)"""
+        await self._set_through(key, value, json.dumps(value), ttl, self.connect)
+
+    async def get_response(self, key: str) -> Optional[CachedResponse]:
+        """Get a pre-serialized response body"""
+        value = await self._get_through(
+            key,
+            self.connect_binary,
+            lambda raw: CachedResponse.from_envelope(split_freshness(raw)[0]),
+        )
+        return value.value if isinstance(value, CacheEntry) else value
+
+    async def set_response(
+        self, key: str, response: CachedResponse, ttl: int = 600, tags: Iterable[str] = ()
+    ):
+        """
+        Cache a pre-serialized response body; large bodies are gzipped in
+        Redis. The key is added to each tag set so it can be found again
+        by whoever invalidates that group (see tagged_keys).
+        """
+        envelope = response.to_envelope(settings.response_cache_gzip_min_bytes)
+        await self._set_through(key, response, envelope, ttl, self.connect_binary, tags)
+
+    async def get_entry(self, key: str, codec: Codec = JSON_CODEC) -> Optional[CacheEntry]:
+        """A value with its freshness, as read by get_or_compute"""
+
+        def decode(raw) -> Optional[CacheEntry]:
+            payload, soft_expires_at, delta = split_freshness(raw)
+            if payload == NEGATIVE_PAYLOAD and soft_expires_at != math.inf:
+                return CacheEntry(None, soft_expires_at, delta)
+            value = codec.decode(payload)
+            return None if value is None else CacheEntry(value, soft_expires_at, delta)
+
+        entry = await self._get_through(key, self.connect_binary, decode)
+        if entry is not None and not isinstance(entry, CacheEntry):
+            # Kept locally by get()/get_response(): no soft expiry
+            entry = CacheEntry(entry, math.inf, 0.0)
+        return entry
+
+    async def set_entry(
+        self,
+        key: str,
+        value: Any,
+        soft_ttl: float,
+        hard_ttl: int,
+        codec: Codec = JSON_CODEC,
+        tags: Iterable[str] = (),
+        delta: float = 0.0,
+    ):
+        """
+        Store a value that goes stale after soft_ttl (get_or_compute then
+        refreshes it) and disappears after hard_ttl
+        """
+        entry = CacheEntry(value, time.time() + soft_ttl, delta)
+        encoded = add_freshness(codec.encode(value), entry.soft_expires_at, delta)
+        await self._set_through(
+            key, entry, encoded, max(1, int(max(hard_ttl, soft_ttl))), self.connect_binary, tags
+        )
+
+    async def set_entries(
+        self,
+        items: list[tuple[str, Any]],
+        soft_ttl: float,
+        hard_ttl: int,
+        codec: Codec = JSON_CODEC,
+    ):
+        """set_entry for many (key, value) pairs in one Redis pipeline"""
+        if not items:
+            return
+        soft_expires_at = time.time() + soft_ttl
+        ttl = max(1, int(max(hard_ttl, soft_ttl)))
+        if self.local_enabled:
+            for key, value in items:
+                self.local.set(key, CacheEntry(value, soft_expires_at, 0.0), ttl)
         try:
-            r = await self.connect()
-            await r.setex(key, ttl, json.dumps(value))
+            r = await self.connect_binary()
+            async with r.pipeline(transaction=False) as pipe:
+                for key, value in items:
+                    pipe.setex(key, ttl, add_freshness(codec.encode(value), soft_expires_at, 0.0))
+                pipe.publish(
+                    INVALIDATION_CHANNEL, self._invalidation_message(*(key for key, _ in items))
+                )
+                await pipe.execute()
         except Exception as e:
             print(f"Cache set error: {e}")
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        soft_ttl: float,
+        hard_ttl: Optional[int] = None,
+        codec: Codec = JSON_CODEC,
+        tags: Iterable[str] = (),
+        negative_ttl: float = 0,
+    ) -> Any:
+        """
+        Cached value of compute(), with stale-while-revalidate.
+
+        Fresh values are returned as is. Once a value is due for refresh
+        (past soft_ttl, or early per XFetch) the caller that wins the
+        Redis lock recomputes it while everyone else keeps getting the
+        stale value until hard_ttl. On a hard miss, callers that lose the
+        lock wait briefly for the winner's value before computing it
+        themselves. Within a process, callers share one compute per key.
+        A None result is cached for negative_ttl seconds, so those waiting
+        callers get the miss instead of timing out; with no negative_ttl
+        it is returned but not cached. Writing the key ends a cached miss.
+        """
+        hard_ttl = hard_ttl or int(soft_ttl)
+        entry = await self.get_entry(key, codec)
+        if entry is not None and not entry.should_refresh(settings.cache_xfetch_beta):
+            return entry.value
+
+        flight = self._computing.get(key)
+        if flight is not None:
+            if entry is not None:
+                self.stale_served += 1
+                return entry.value
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                # The leader was cancelled; this caller itself was not
+                if not flight.cancelled():
+                    raise
+
+        lock_key = f"lock:compute:{key}"
+        token = await self.acquire_lock(lock_key, settings.cache_lock_ttl_sec)
+        if token is None:
+            if entry is not None:
+                # Another worker is refreshing it
+                self.stale_served += 1
+                return entry.value
+            entry = await self._wait_for_entry(key, codec, settings.cache_lock_wait_sec)
+            if entry is not None:
+                return entry.value
+
+        future = asyncio.get_running_loop().create_future()
+        self._computing[key] = future
+        try:
+            started = time.monotonic()
+            value = await compute()
+            self.recomputes += 1
+            if value is not None:
+                await self.set_entry(
+                    key, value, soft_ttl, hard_ttl, codec, tags, time.monotonic() - started
+                )
+            elif negative_ttl > 0:
+                await self._set_negative(key, negative_ttl)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark as retrieved so an unobserved failure doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._computing.pop(key, None)
+            if token is not None:
+                await self.release_lock(lock_key, token)
+
+    async def _set_negative(self, key: str, ttl: float):
+        entry = CacheEntry(None, time.time() + ttl, 0.0)
+        encoded = add_freshness(NEGATIVE_PAYLOAD, entry.soft_expires_at, 0.0)
+        await self._set_through(key, entry, encoded, max(1, math.ceil(ttl)), self.connect_binary)
+
+    async def _wait_for_entry(
+        self, key: str, codec: Codec, timeout: float, interval: float = 0.05
+    ) -> Optional[CacheEntry]:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(interval)
+            entry = await self.get_entry(key, codec)
+            if entry is not None:
+                return entry
+        return None
+
+    async def tagged_keys(self, tag: str) -> list[str]:
+        """Keys cached with this tag (some may have expired since)"""
+        try:
+            r = await self.connect()
+            return sorted(await r.smembers(tag))
+        except Exception as e:
+            print(f"Cache tag error: {e}")
+            return []
     
-    async def delete(self, key: str):
-        """Delete key from cache"""
+    async def delete(self, *keys: str):
+        """Delete keys from cache"""
+        if not keys:
+            return
+        if self.local is not None:
+            for key in keys:
+                self.local.discard(key)
         try:
             r = await self.connect()
-            await r.delete(key)
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.delete(*keys)
+                pipe.publish(INVALIDATION_CHANNEL, self._invalidation_message(*keys))
+                await pipe.execute()
         except Exception as e:
             print(f"Cache delete error: {e}")
+
+    def _invalidation_message(self, *keys: str) -> str:
+        return json.dumps({"origin": self.instance_id, "keys": list(keys)})
+
+    def _handle_invalidation(self, data: str):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get("origin") == self.instance_id or self.local is None:
+            return
+        self._invalidations += 1
+        for key in message.get("keys", []):
+            self.local.discard(key)
+
+    async def listen_for_invalidations(self, retry_delay: float = 1.0):
+        """
+        Evict local entries that other workers overwrite or delete. The local
+        tier is switched off (and emptied) whenever we aren't subscribed.
+        """
+        while True:
+            pubsub = None
+            try:
+                r = await self.connect()
+                pubsub = r.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self._local_active = True
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache invalidation listener error: {e}")
+            finally:
+                self._local_active = False
+                self.local.clear()
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+            await asyncio.sleep(retry_delay)
+
+    async def start(self):
+        """Start the pub/sub listener that enables the local tier"""
+        if self.local is not None and self._listener is None:
+            self._listener = asyncio.create_task(self.listen_for_invalidations())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def close(self):
+        """Close the Redis connections (for scripts; the app keeps them open)"""
+        for client in (self._redis, self._redis_binary):
+            if client is not None:
+                await client.aclose()
+        self._redis = self._redis_binary = None
+
+    def stats(self) -> dict:
+        return {
+            "local_enabled": self.local_enabled,
+            "local": self.local.stats() if self.local is not None else None,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "recomputes": self.recomputes,
+            "stale_served": self.stale_served,
+        }
     
+    async def acquire_lock(self, key: str, ttl: int = 60) -> Optional[str]:
+        """
+        Try to take a cross-worker lock. Returns an owner token, or None if
+        another worker holds it. When Redis is unreachable the lock is granted
+        so callers degrade to in-process coordination only.
+        """
+        token = uuid4().hex
+        try:
+            r = await self.connect()
+            acquired = await r.set(key, token, nx=True, ex=ttl)
+            return token if acquired else None
+        except Exception as e:
+            print(f"Cache lock error: {e}")
+            return token
+
+    async def release_lock(self, key: str, token: str):
+        """Release a lock taken with acquire_lock if we still own it"""
+        try:
+            r = await self.connect()
+            await r.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+        except Exception as e:
+            print(f"Cache unlock error: {e}")
+
+    async def get_audio_entry(
+        self, node_id: str, language: str, speaker: str, code_mix: float = 0.0
+    ) -> Optional[dict]:
+        """Get cached {"url", "checksum"} for a specific audio variant."""
+        value = await self.get(audio_cache_key(node_id, language, speaker, code_mix))
+        if isinstance(value, str):
+            # Entries cached before checksums were stored hold just the URL
+            return {"url": value, "checksum": None}
+        return value
+
+    async def get_audio_entries(
+        self, variants: list[tuple[str, str, str, float]]
+    ) -> list[Optional[dict]]:
+        """get_audio_entry for many (node_id, language, speaker, code_mix) at once"""
+        values = await self.get_many([audio_cache_key(*variant) for variant in variants])
+        return [{"url": v, "checksum": None} if isinstance(v, str) else v for v in values]
+
     async def get_audio_url(
         self, node_id: str, language: str, speaker: str, code_mix: float = 0.0
     ) -> Optional[str]:
         """Get cached audio URL for a specific audio variant."""
-        key = f"audio:{node_id}:{language}:{speaker}:{code_mix:.2f}"
-        return await self.get(key)
+        entry = await self.get_audio_entry(node_id, language, speaker, code_mix)
+        return entry["url"] if entry else None
     
     async def set_audio_url(
         self,
@@ -64,7 +623,35 @@ class CacheService:
         url: str,
         code_mix: float = 0.0,
         ttl: int = 86400 * 30,
+        checksum: Optional[str] = None,
+        duration_sec: Optional[float] = None,
+        file_size: Optional[int] = None,
     ):
-        """Cache audio URL for 30 days for a specific audio variant."""
-        key = f"audio:{node_id}:{language}:{speaker}:{code_mix:.2f}"
-        await self.set(key, url, ttl)
+        """
+        Cache audio URL for 30 days for a specific audio variant; get_audio
+        re-checks it against audio_files every audio_entry_refresh_sec.
+        """
+        key = audio_cache_key(node_id, language, speaker, code_mix)
+        entry = audio_cache_entry(url, checksum, duration_sec, file_size)
+        await self.set_entry(key, entry, settings.audio_entry_refresh_sec, ttl)
+
+    async def set_audio_entries(
+        self,
+        entries: list[tuple[tuple[str, str, str, float], dict]],
+        ttl: int = 86400 * 30,
+    ):
+        """
+        set_audio_url for many ((node_id, language, speaker, code_mix),
+        audio_cache_entry) pairs, written in one Redis round trip
+        """
+        await self.set_entries(
+            [(audio_cache_key(*variant), entry) for variant, entry in entries],
+            settings.audio_entry_refresh_sec,
+            ttl,
+        )
+
+
+@lru_cache()
+def get_cache_service() -> CacheService:
+    """Process-wide CacheService, so every router shares one local tier"""
+    return CacheService()
@@ -0,0 +1,174 @@
+"""
+Circuit breaker in front of the database.
+
+When Postgres is unreachable every query first waits out a connection
+attempt, so during an outage each request would block for the full pool
+timeout before falling back. The breaker counts consecutive connection
+failures and, once it trips (open), rejects guarded queries immediately;
+the routers turn that into their JSON fallback or a 503. After
+reset_timeout one trial query is let through (half-open) and its outcome
+closes or re-opens the circuit. While open, a background task also probes
+the database with SELECT 1 so the circuit closes as soon as it is back,
+without waiting for live traffic.
+"""
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import (
+    DBAPIError,
+    InterfaceError,
+    OperationalError,
+    SQLAlchemyError,
+    TimeoutError as PoolTimeoutError,
+)
+
+from app.config import get_settings
+from app.database import engine
+
+settings = get_settings()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class DatabaseUnavailable(Exception):
+    """Raised for guarded queries that failed or were short-circuited"""
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """Errors meaning the database is unreachable, as opposed to a bad query"""
+    if isinstance(exc, (OSError, asyncio.TimeoutError, PoolTimeoutError)):
+        return True
+    if isinstance(exc, (OperationalError, InterfaceError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+async def ping_database():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        probe: Optional[Callable[[], Awaitable[Any]]] = ping_database,
+        probe_timeout: float = 3.0,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.probe_timeout = probe_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.short_circuited = 0
+        self._opened_at = 0.0
+        self._trial_started_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def allow(self) -> bool:
+        """Whether a query may go to the database right now"""
+        if self.state == CLOSED:
+            return True
+
+        now = time.monotonic()
+        if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and (
+            # One trial at a time; a trial that never reported back expires
+            self._trial_started_at is None
+            or now - self._trial_started_at >= self.reset_timeout
+        ):
+            self._trial_started_at = now
+            return True
+
+        self.short_circuited += 1
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        if self.state != OPEN:
+            self.trips += 1
+            print(f"Database circuit opened after {self.failures} failures")
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_started_at = None
+
+    async def execute(self, db, statement, **kwargs):
+        """db.execute() guarded by the breaker; raises DatabaseUnavailable"""
+        if not self.allow():
+            raise DatabaseUnavailable("Database circuit is open")
+        try:
+            result = await db.execute(statement, **kwargs)
+        except (SQLAlchemyError, OSError) as exc:
+            if is_connection_error(exc):
+                self.record_failure()
+            else:
+                # The database answered; the query itself was the problem
+                self.record_success()
+            raise DatabaseUnavailable(str(exc)) from exc
+        self.record_success()
+        return result
+
+    async def start(self):
+        if self._task is None and self.probe is not None:
+            self._task = asyncio.create_task(self._run(), name="db-circuit-probe")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reset_timeout)
+            if self.state == CLOSED:
+                continue
+            await self.probe_once()
+
+    async def probe_once(self) -> bool:
+        """Try the database out of band; closes the circuit on success"""
+        try:
+            await asyncio.wait_for(self.probe(), self.probe_timeout)
+        except Exception:
+            # Still down: stay open for another reset_timeout
+            self._open()
+            return False
+        self.record_success()
+        print("Database circuit closed after a successful probe")
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "short_circuited": self.short_circuited,
+        }
+
+
+@lru_cache()
+def get_db_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_threshold=settings.db_breaker_failure_threshold,
+        reset_timeout=settings.db_breaker_reset_timeout_sec,
+        probe_timeout=settings.db_breaker_probe_timeout_sec,
+    )
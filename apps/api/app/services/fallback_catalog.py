@@ -0,0 +1,294 @@
+"""
+Prebuilt story catalog from the bundled JSON files.
+
+While the database is unavailable, GET /stories and GET /stories/{slug} are
+served from scripts/story_*.json. The files are compiled once into a
+FallbackIndex: a slug lookup plus, per story and per translated language,
+the finished StoryResponse and StoryDetailResponse with their stable UUIDs
+and counts, so an outage costs a dict lookup per request rather than a
+re-parse of every story. FallbackCatalog recompiles the index when a file
+is added, removed or modified, checking at most once per reload interval.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional
+from uuid import NAMESPACE_URL, UUID, uuid5
+
+from app.config import get_settings
+from app.schemas.story import StoryDetailResponse, StoryResponse
+from app.services.story_graph import (
+    GraphCharacter,
+    GraphChoice,
+    GraphNode,
+    StoryGraph,
+    assemble_graph,
+    freeze_texts,
+)
+from app.utils.age_range import parse_age_range
+
+settings = get_settings()
+
+FALLBACK_STORIES_DIR = Path(__file__).resolve().parents[2] / "scripts"
+
+
+def stable_uuid(*parts: str) -> UUID:
+    return uuid5(NAMESPACE_URL, ":".join(parts))
+
+
+def select_translation(
+    translations: Mapping[str, Any], requested_language: str
+) -> tuple[Optional[str], Optional[dict[str, Any]]]:
+    if not translations:
+        return None, None
+
+    if requested_language in translations:
+        return requested_language, translations[requested_language]
+    if "en" in translations:
+        return "en", translations["en"]
+
+    first_language = sorted(translations.keys())[0]
+    return first_language, translations[first_language]
+
+
+@dataclass(frozen=True)
+class FallbackStory:
+    slug: str
+    region: str
+    age_range: str
+    age_bounds: Optional[tuple[int, int]]
+    # Raw translation entries; picks the language exactly like the DB path
+    translations: Mapping[str, Any]
+    summaries: Mapping[str, StoryResponse]
+    details: Mapping[str, StoryDetailResponse]
+
+    def summary(self, requested_language: str) -> Optional[StoryResponse]:
+        language, translation = select_translation(self.translations, requested_language)
+        return self.summaries.get(language) if translation else None
+
+    def detail(self, requested_language: str) -> Optional[StoryDetailResponse]:
+        language, translation = select_translation(self.translations, requested_language)
+        return self.details.get(language) if translation else None
+
+
+@dataclass(frozen=True)
+class FallbackIndex:
+    stories: tuple[FallbackStory, ...]
+    by_slug: Mapping[str, FallbackStory]
+
+
+def compile_fallback_graph(slug: str, data: dict[str, Any]) -> Optional[StoryGraph]:
+    """A story file as a StoryGraph with stable ids, localized like the DB path"""
+    raw_nodes = data.get("nodes")
+    nodes_data = sorted(
+        [n for n in raw_nodes if isinstance(n, dict)] if isinstance(raw_nodes, list) else [],
+        key=lambda x: int(x.get("display_order", 0) or 0),
+    )
+    if not nodes_data:
+        return None
+
+    characters: dict[str, GraphCharacter] = {}
+    for char in data.get("characters", []):
+        if not isinstance(char, dict):
+            continue
+        char_slug = str(char.get("slug", "")).strip()
+        if not char_slug:
+            continue
+        characters[char_slug] = GraphCharacter(
+            id=stable_uuid("fallback", "story", slug, "character", char_slug),
+            slug=char_slug,
+            name=str(char.get("name", char_slug)),
+            names=freeze_texts(char.get("name_translations")),
+            voice_profile=str(char.get("voice_profile", "narrator")),
+            bulbul_speaker=str(char.get("bulbul_speaker", "meera")),
+            avatar_url=char.get("avatar_url"),
+        )
+
+    def node_id(order: int) -> UUID:
+        return stable_uuid("fallback", "story", slug, "node", str(order))
+
+    orders = {int(node.get("display_order", 0) or 0) for node in nodes_data}
+    nodes: list[GraphNode] = []
+    for node in nodes_data:
+        order = int(node.get("display_order", 0) or 0)
+        raw_choices = node.get("choices")
+        choices = []
+        for idx, choice in enumerate(raw_choices if isinstance(raw_choices, list) else []):
+            if not isinstance(choice, dict):
+                continue
+            choice_key = str(choice.get("choice_key", f"C{idx+1}"))
+            next_order = choice.get("next_node_order")
+            choices.append(
+                GraphChoice(
+                    id=stable_uuid(
+                        "fallback", "story", slug, "node", str(order), "choice", choice_key
+                    ),
+                    node_id=node_id(order),
+                    choice_key=choice_key,
+                    texts=freeze_texts(choice.get("text")),
+                    next_node_id=node_id(next_order)
+                    if isinstance(next_order, int) and next_order in orders
+                    else None,
+                )
+            )
+        character = characters.get(str(node.get("character_slug", "")))
+        nodes.append(
+            GraphNode(
+                id=node_id(order),
+                node_type=str(node.get("node_type", "narration")),
+                display_order=order,
+                is_start=bool(node.get("is_start")),
+                is_end=bool(node.get("is_end")),
+                texts=freeze_texts(node.get("text")),
+                character_id=character.id if character else None,
+                choices=tuple(choices),
+            )
+        )
+
+    story_id = stable_uuid("fallback", "story", slug)
+    return assemble_graph(story_id, slug, "fallback", nodes, list(characters.values()))
+
+
+def compile_fallback_story(
+    data: dict[str, Any], created_at: datetime
+) -> Optional[FallbackStory]:
+    """Prebuild every language's list entry and detail for one story file"""
+    slug = str(data.get("slug", "")).strip()
+    translations = data.get("translations")
+    if not slug or not isinstance(translations, dict):
+        return None
+
+    raw_nodes = data.get("nodes")
+    choice_count = sum(
+        len(node["choices"])
+        for node in (raw_nodes if isinstance(raw_nodes, list) else [])
+        if isinstance(node, dict) and isinstance(node.get("choices"), list)
+    )
+    graph = compile_fallback_graph(slug, data)
+    story_id = stable_uuid("fallback", "story", slug)
+    age_range = str(data.get("age_range", "") or "all")
+    region = str(data.get("region", "unknown"))
+    duration_min = int(data.get("duration_min", 0) or 0)
+    cover_image = str(data.get("cover_image", ""))
+
+    summaries: dict[str, StoryResponse] = {}
+    details: dict[str, StoryDetailResponse] = {}
+    for language, translation in translations.items():
+        if not translation:
+            continue
+        common = dict(
+            id=story_id,
+            slug=slug,
+            title=str(translation.get("title", slug)),
+            description=str(translation.get("description", "")),
+            language=language,
+            age_range=age_range,
+            region=region,
+            moral=data.get("moral"),
+            duration_min=duration_min,
+            cover_image=cover_image,
+            created_at=created_at,
+        )
+        summaries[language] = StoryResponse(
+            **common,
+            character_count=len(data.get("characters", [])),
+            choice_count=choice_count,
+            is_completed_translation=True,
+        )
+        if graph is not None:
+            nodes = graph.node_responses(language)
+            details[language] = StoryDetailResponse(
+                **common,
+                available_languages=sorted(translations.keys()),
+                characters=graph.character_responses(language),
+                nodes=nodes,
+                start_node_id=next((node.id for node in nodes if node.is_start), nodes[0].id),
+                updated_at=created_at,
+            )
+
+    return FallbackStory(
+        slug=slug,
+        region=region,
+        age_range=age_range,
+        age_bounds=parse_age_range(data.get("age_range", "")),
+        translations=MappingProxyType(dict(translations)),
+        summaries=MappingProxyType(summaries),
+        details=MappingProxyType(details),
+    )
+
+
+def build_fallback_index(
+    stories_data: Iterable[dict[str, Any]], created_at: Optional[datetime] = None
+) -> FallbackIndex:
+    created_at = created_at or datetime.now(timezone.utc)
+    stories: list[FallbackStory] = []
+    by_slug: dict[str, FallbackStory] = {}
+    for data in stories_data:
+        story = compile_fallback_story(data, created_at)
+        if story is None:
+            continue
+        stories.append(story)
+        by_slug.setdefault(story.slug, story)
+    return FallbackIndex(stories=tuple(stories), by_slug=MappingProxyType(by_slug))
+
+
+class FallbackCatalog:
+    """The compiled index of a directory of story files, rebuilt when they change"""
+
+    def __init__(self, directory: Path = FALLBACK_STORIES_DIR, reload_interval: float = 5.0):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        # Fixed for the catalog's lifetime so "newest"/"oldest" cursors stay valid
+        self.created_at = datetime.now(timezone.utc)
+        self._index: Optional[FallbackIndex] = None
+        self._signature: Optional[tuple] = None
+        self._checked_at = 0.0
+        self.builds = 0
+
+    def _paths(self) -> list[Path]:
+        return sorted(self.directory.glob("story_*.json"))
+
+    def signature(self) -> tuple:
+        entries = []
+        for path in self._paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def _read(self) -> list[dict[str, Any]]:
+        stories: list[dict[str, Any]] = []
+        for json_path in self._paths():
+            try:
+                with json_path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    stories.append(data)
+            except Exception:
+                continue
+        return stories
+
+    def index(self) -> FallbackIndex:
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.reload_interval:
+            return self._index
+        self._checked_at = now
+
+        signature = self.signature()
+        if self._index is None or signature != self._signature:
+            self._index = build_fallback_index(self._read(), self.created_at)
+            self._signature = signature
+            self.builds += 1
+        return self._index
+
+
+@lru_cache()
+def get_fallback_catalog() -> FallbackCatalog:
+    return FallbackCatalog(reload_interval=settings.fallback_reload_interval_sec)
@@ -0,0 +1,58 @@
+"""
+Shared outbound HTTP client.
+
+One long-lived httpx.AsyncClient is reused by the Sarvam and storage services
+so connections (and TLS sessions) to api.sarvam.ai / Supabase stay warm
+instead of a new handshake per call. The app lifespan closes it on shutdown;
+scripts should call close_http_client() before exiting.
+"""
+
+from typing import Optional
+
+import httpx
+
+from app.config import get_settings
+
+try:  # HTTP/2 needs the optional 'h2' package (pip install "httpx[http2]")
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+settings = get_settings()
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """Create a pooled client from settings"""
+    http2 = settings.http2_enabled and HTTP2_AVAILABLE
+    if settings.http2_enabled and not HTTP2_AVAILABLE:
+        print("⚠️  HTTP2_ENABLED is set but 'h2' is not installed - using HTTP/1.1")
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_sec,
+        ),
+        timeout=httpx.Timeout(settings.http_timeout_sec),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_http_client()
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
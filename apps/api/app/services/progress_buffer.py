@@ -0,0 +1,636 @@
+"""
+Write-behind buffer for user progress.
+
+POST /users/progress and make_choice record a ProgressDelta per
+(user, story) instead of rewriting the UserProgress row in the request
+transaction. Pending deltas live in a progress store - in-process for a
+single worker, or in Redis so every worker drains the same buffer - and a
+background task applies them in batches, every flush interval or as soon
+as max_pending keys are waiting. GET /users/progress flushes the reader's
+own pending keys first - with the Redis store, including those recorded
+by other workers. A batch another worker has already taken is not in the
+store until that worker commits it, so a read can briefly miss it.
+
+A batch is written as one multi-row upsert per delta shape. If that fails
+on a bad row, each delta is retried in its own SAVEPOINT so the others
+still commit; a delta that keeps failing is dead-lettered after
+max_attempts. While the database is unreachable whole batches go back to
+the store, and once the in-process store is full new writes bypass it
+and are applied within the request again.
+
+Choices are appended to progress_events (one small row each) and only a
+count is kept on the progress row, so a write never rewrites play history.
+Batched flushes and the "direct" write mode both go through
+progress_upsert(), so there is one definition of how progress changes.
+"""
+
+import asyncio
+import json
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.progress import ProgressEvent, UserProgress
+from app.models.user import User
+from app.services.cache_service import CacheService, LocalCache, get_cache_service
+from app.services.db_circuit import is_connection_error
+
+settings = get_settings()
+
+ProgressKey = tuple[UUID, UUID]
+
+# Users known to exist; progress rows reference users.id
+known_users = LocalCache(max_entries=10000, ttl=300)
+
+
+@dataclass(frozen=True)
+class ChoiceMade:
+    node_id: UUID
+    choice_key: str
+    made_at: datetime
+
+
+def _uuid(value: Optional[str]) -> Optional[UUID]:
+    return UUID(value) if value else None
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+@dataclass
+class ProgressDelta:
+    """Changes to one (user, story) progress row, applied in order"""
+
+    user_id: UUID
+    story_id: UUID
+    current_node_id: Optional[UUID] = None
+    completion_percentage: Optional[float] = None
+    # None leaves the stored flag alone; completed_sticky ORs it in
+    is_completed: Optional[bool] = None
+    completed_sticky: bool = False
+    play_count: int = 0
+    total_time_sec: int = 0
+    choices: list[ChoiceMade] = field(default_factory=list)
+    last_played_at: Optional[datetime] = None
+    # Flushes this delta has failed in (connection errors don't count)
+    attempts: int = 0
+
+    @property
+    def key(self) -> ProgressKey:
+        return (self.user_id, self.story_id)
+
+    def merge(self, later: "ProgressDelta"):
+        """Fold a later delta for the same key into this one"""
+        if later.current_node_id is not None:
+            self.current_node_id = later.current_node_id
+        if later.completion_percentage is not None:
+            self.completion_percentage = later.completion_percentage
+        if later.is_completed is not None:
+            self.is_completed = later.is_completed
+            self.completed_sticky = later.completed_sticky
+        else:
+            self.completed_sticky = self.completed_sticky or later.completed_sticky
+        self.play_count += later.play_count
+        self.total_time_sec += later.total_time_sec
+        self.choices.extend(later.choices)
+        if later.last_played_at is not None and (
+            self.last_played_at is None or later.last_played_at > self.last_played_at
+        ):
+            self.last_played_at = later.last_played_at
+        self.attempts = max(self.attempts, later.attempts)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=_json_default)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "ProgressDelta":
+        data = json.loads(raw)
+        data.update(
+            user_id=UUID(data["user_id"]),
+            story_id=UUID(data["story_id"]),
+            current_node_id=_uuid(data.get("current_node_id")),
+            last_played_at=_datetime(data.get("last_played_at")),
+            choices=[
+                ChoiceMade(UUID(c["node_id"]), c["choice_key"], _datetime(c["made_at"]))
+                for c in data.get("choices", [])
+            ],
+        )
+        return cls(**data)
+
+
+def merge_deltas(deltas: Iterable[ProgressDelta]) -> list[ProgressDelta]:
+    """Merge deltas (oldest first) into one per key"""
+    merged: dict[ProgressKey, ProgressDelta] = {}
+    for delta in deltas:
+        existing = merged.get(delta.key)
+        if existing is None:
+            merged[delta.key] = delta
+        else:
+            existing.merge(delta)
+    return list(merged.values())
+
+
+def upsert_shape(delta: ProgressDelta) -> tuple[bool, bool, bool]:
+    """
+    Which columns a delta changes on an existing row: (completion flag,
+    completion percentage, play count). Deltas of one shape share an
+    ON CONFLICT clause, so they can be written in one statement.
+    """
+    completed = bool(delta.is_completed) or delta.completed_sticky
+    return (
+        delta.is_completed is not None or delta.completed_sticky,
+        delta.completion_percentage is not None or completed,
+        delta.play_count > 0,
+    )
+
+
+def _insert_values(delta: ProgressDelta) -> dict:
+    completed = bool(delta.is_completed) or delta.completed_sticky
+    return dict(
+        user_id=delta.user_id,
+        story_id=delta.story_id,
+        current_node_id=delta.current_node_id,
+        choices_count=len(delta.choices),
+        is_completed=completed,
+        completion_percentage=100.0 if completed else (delta.completion_percentage or 0.0),
+        # The first play counts even when it didn't start at a start node
+        play_count=max(1, delta.play_count),
+        total_time_sec=max(0, delta.total_time_sec),
+        last_played_at=delta.last_played_at,
+    )
+
+
+def progress_upsert(dialect: str, deltas: list[ProgressDelta]):
+    """
+    One multi-row INSERT ... ON CONFLICT (user_id, story_id) DO UPDATE for
+    deltas of the same upsert_shape() and distinct keys. Existing rows are
+    updated from the excluded row and counters are incremented in SQL, so
+    concurrent writers never race on uq_user_story_progress or lose each
+    other's increments. PostgreSQL in production; SQLite (3.24+) has the
+    same syntax for local tests.
+    """
+    sets_completed, sets_percentage, counts_play = upsert_shape(deltas[0])
+    insert = sqlite_insert if dialect == "sqlite" else pg_insert
+    table = UserProgress.__table__
+    stmt = insert(UserProgress).values([_insert_values(delta) for delta in deltas])
+    excluded = stmt.excluded
+
+    updates = {
+        "total_time_sec": func.coalesce(table.c.total_time_sec, 0) + excluded.total_time_sec,
+        "choices_count": func.coalesce(table.c.choices_count, 0) + excluded.choices_count,
+        # NULL in the excluded row means the delta left the column alone
+        "current_node_id": func.coalesce(excluded.current_node_id, table.c.current_node_id),
+        "last_played_at": func.coalesce(excluded.last_played_at, table.c.last_played_at),
+        "updated_at": func.now(),
+    }
+    if counts_play:
+        updates["play_count"] = func.coalesce(table.c.play_count, 0) + excluded.play_count
+
+    if sets_completed:
+        is_completed = excluded.is_completed
+        updates["is_completed"] = is_completed
+    else:
+        # Completion flag untouched; the percentage only moves while incomplete
+        is_completed = func.coalesce(table.c.is_completed, False)
+    if sets_percentage:
+        updates["completion_percentage"] = case(
+            (is_completed, 100.0), else_=excluded.completion_percentage
+        )
+
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.story_id], set_=updates
+    )
+
+
+def choice_events(delta: ProgressDelta) -> list[ProgressEvent]:
+    return [
+        ProgressEvent(
+            user_id=delta.user_id,
+            story_id=delta.story_id,
+            node_id=choice.node_id,
+            choice_key=choice.choice_key,
+            made_at=choice.made_at,
+        )
+        for choice in delta.choices
+    ]
+
+
+async def upsert_progress(db, delta: ProgressDelta) -> UserProgress:
+    """Write one delta in a single statement and append its choice events"""
+    result = await db.execute(
+        progress_upsert(db.bind.dialect.name, [delta]).returning(UserProgress),
+        execution_options={"populate_existing": True},
+    )
+    progress = result.scalar_one()
+    if delta.choices:
+        db.add_all(choice_events(delta))
+    return progress
+
+
+async def write_deltas(db, deltas: list[ProgressDelta]):
+    """Upsert deltas (distinct keys) with one statement per shape, plus events"""
+    shapes: dict[tuple, list[ProgressDelta]] = {}
+    for delta in deltas:
+        shapes.setdefault(upsert_shape(delta), []).append(delta)
+    for group in shapes.values():
+        await db.execute(progress_upsert(db.bind.dialect.name, group))
+    events = [event for delta in deltas for event in choice_events(delta)]
+    if events:
+        db.add_all(events)
+    await db.flush()
+
+
+class InMemoryProgressStore:
+    """Process-local pending deltas, merged per key; lost if the worker dies"""
+
+    def __init__(self, max_keys: int = 10000, dead_letter_max: int = 100):
+        self.max_keys = max(1, max_keys)
+        self._pending: dict[ProgressKey, ProgressDelta] = {}
+        self.dead_letters: deque[ProgressDelta] = deque(maxlen=dead_letter_max)
+
+    async def push(self, delta: ProgressDelta) -> Optional[int]:
+        """Add a delta; returns the pending key count, or None when full"""
+        existing = self._pending.get(delta.key)
+        if existing is not None:
+            existing.merge(delta)
+        elif len(self._pending) >= self.max_keys:
+            return None
+        else:
+            self._pending[delta.key] = delta
+        return len(self._pending)
+
+    async def take(self, user_id: Optional[UUID], limit: int) -> list[ProgressDelta]:
+        """Remove a batch: up to limit keys, or every key of one user"""
+        if user_id is None:
+            keys = list(islice(self._pending, limit))
+        else:
+            keys = [key for key in self._pending if key[0] == user_id]
+        return [self._pending.pop(key) for key in keys]
+
+    async def requeue(self, deltas: list[ProgressDelta]):
+        # Deltas recorded while the batch was in flight are newer; keep order
+        for delta in deltas:
+            newer = self._pending.get(delta.key)
+            if newer is not None:
+                delta.merge(newer)
+            self._pending[delta.key] = delta
+
+    async def pending(self, user_id: UUID, story_id: UUID) -> Optional[ProgressDelta]:
+        return self._pending.get((user_id, story_id))
+
+    async def size(self) -> int:
+        return len(self._pending)
+
+    async def dead_letter(self, delta: ProgressDelta):
+        self.dead_letters.append(delta)
+
+
+class RedisProgressStore:
+    """
+    Pending deltas shared by all workers: one Redis list per user (oldest
+    first) plus a set of users with pending writes. Deltas are merged when
+    a batch is taken, so any worker can flush any user; a taken batch is
+    visible to no worker but the one writing it.
+    """
+
+    def __init__(
+        self,
+        cache_service: CacheService,
+        prefix: str = "progress:buffer",
+        dead_letter_max: int = 1000,
+    ):
+        self.cache_service = cache_service
+        self.prefix = prefix
+        self.users_key = f"{prefix}:users"
+        self.dead_letter_key = f"{prefix}:dead"
+        self.dead_letter_max = dead_letter_max
+
+    def _user_key(self, user_id) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    async def push(self, delta: ProgressDelta) -> Optional[int]:
+        """Add a delta; returns the number of users with pending writes"""
+        r = await self.cache_service.connect()
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._user_key(delta.user_id), delta.to_json())
+            pipe.sadd(self.users_key, str(delta.user_id))
+            pipe.scard(self.users_key)
+            *_, size = await pipe.execute()
+        return size
+
+    async def take(self, user_id: Optional[UUID], limit: int) -> list[ProgressDelta]:
+        """Remove a batch: the lists of up to limit users, or of one user"""
+        r = await self.cache_service.connect()
+        if user_id is None:
+            user_ids = await r.spop(self.users_key, limit) or []
+        else:
+            # Its set member stays; whoever pops it later finds an empty list
+            user_ids = [str(user_id)]
+        if not user_ids:
+            return []
+        async with r.pipeline(transaction=True) as pipe:
+            for pending_user in user_ids:
+                pipe.lrange(self._user_key(pending_user), 0, -1)
+                pipe.delete(self._user_key(pending_user))
+            results = await pipe.execute()
+        return merge_deltas(
+            ProgressDelta.from_json(raw) for items in results[0::2] for raw in items
+        )
+
+    async def requeue(self, deltas: list[ProgressDelta]):
+        """Put deltas back ahead of anything recorded while they were in flight"""
+        if not deltas:
+            return
+        by_user: dict[UUID, list[str]] = {}
+        for delta in deltas:
+            by_user.setdefault(delta.user_id, []).append(delta.to_json())
+        r = await self.cache_service.connect()
+        async with r.pipeline(transaction=True) as pipe:
+            for pending_user, items in by_user.items():
+                pipe.lpush(self._user_key(pending_user), *reversed(items))
+                pipe.sadd(self.users_key, str(pending_user))
+            await pipe.execute()
+
+    async def pending(self, user_id: UUID, story_id: UUID) -> Optional[ProgressDelta]:
+        r = await self.cache_service.connect()
+        items = await r.lrange(self._user_key(user_id), 0, -1)
+        deltas = [ProgressDelta.from_json(raw) for raw in items]
+        merged = merge_deltas(delta for delta in deltas if delta.story_id == story_id)
+        return merged[0] if merged else None
+
+    async def size(self) -> int:
+        r = await self.cache_service.connect()
+        return await r.scard(self.users_key)
+
+    async def dead_letter(self, delta: ProgressDelta):
+        r = await self.cache_service.connect()
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.lpush(self.dead_letter_key, delta.to_json())
+            pipe.ltrim(self.dead_letter_key, 0, self.dead_letter_max - 1)
+            await pipe.execute()
+
+
+def build_progress_store(backend: str, cache_service: CacheService, max_keys: int = 10000):
+    if backend == "redis":
+        return RedisProgressStore(cache_service)
+    return InMemoryProgressStore(max_keys=max_keys)
+
+
+class ProgressBuffer:
+    """Queues progress deltas in a store and flushes them in batches"""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        flush_interval: float = 2.0,
+        max_pending: int = 500,
+        max_attempts: int = 3,
+        store=None,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self.max_attempts = max(1, max_attempts)
+        self.store = store if store is not None else InMemoryProgressStore()
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+        self.bypassed = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    async def record(self, delta: ProgressDelta) -> bool:
+        """
+        Queue a delta; wakes the flusher once the size threshold is hit.
+        False when the store is full or unreachable - write it directly.
+        """
+        try:
+            size = await self.store.push(delta)
+        except Exception as e:
+            print(f"Progress buffer unavailable, writing directly: {e}")
+            size = None
+        if size is None:
+            self.bypassed += 1
+            return False
+        if size >= self.max_pending:
+            self._wakeup.set()
+        return True
+
+    async def pending(self, user_id: UUID, story_id: UUID) -> Optional[ProgressDelta]:
+        try:
+            return await self.store.pending(user_id, story_id)
+        except Exception as e:
+            print(f"Progress buffer read error: {e}")
+            return None
+
+    @asynccontextmanager
+    async def paused(self):
+        """
+        Hold off this process's flushes, so stored rows and pending deltas
+        can be read together: a batch being flushed is in neither until its
+        transaction commits
+        """
+        async with self._lock:
+            yield
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="progress-flusher")
+
+    async def stop(self):
+        """Stop the flusher and persist whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Failing deltas are dead-lettered after max_attempts, so this ends
+        while await self.flush():
+            pass
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # A batch already being written finishes even if we're cancelled
+            written = await asyncio.shield(self.flush())
+            try:
+                if written and await self.store.size() >= self.max_pending:
+                    self._wakeup.set()
+            except Exception as e:
+                print(f"Progress buffer size error: {e}")
+
+    async def flush(self, user_id: Optional[UUID] = None) -> int:
+        """
+        Write one batch of pending deltas (up to max_pending keys, or every
+        key of one user) in a single transaction; returns the rows written
+        """
+        async with self._lock:
+            try:
+                batch = await self.store.take(user_id, self.max_pending)
+            except Exception as e:
+                print(f"Progress buffer read error: {e}")
+                return 0
+            if not batch:
+                return 0
+
+            try:
+                async with self.session_factory() as db:
+                    failed = await self.write_batch(db, batch)
+                    await db.commit()
+            except Exception as e:
+                print(f"Progress flush error: {e}")
+                self.failed_flushes += 1
+                if is_connection_error(e):
+                    # Nothing wrong with the deltas; keep them all
+                    await self._requeue(batch)
+                else:
+                    await self._retry_later(batch)
+                return 0
+
+            await self._retry_later(failed)
+            written = len(batch) - len(failed)
+            self.flushed += written
+            return written
+
+    async def _requeue(self, deltas: list[ProgressDelta]):
+        try:
+            await self.store.requeue(deltas)
+        except Exception as e:
+            print(f"Progress buffer lost {len(deltas)} deltas: {e}")
+
+    async def _retry_later(self, failed: list[ProgressDelta]):
+        """Requeue failed deltas, dead-lettering those out of attempts"""
+        retry = []
+        for delta in failed:
+            delta.attempts += 1
+            if delta.attempts < self.max_attempts:
+                retry.append(delta)
+                continue
+            self.dead_lettered += 1
+            print(
+                f"Dead-lettering progress delta after {delta.attempts} attempts: "
+                f"{delta.to_json()}"
+            )
+            try:
+                await self.store.dead_letter(delta)
+            except Exception as e:
+                print(f"Progress dead-letter error: {e}")
+        await self._requeue(retry)
+
+    @staticmethod
+    async def write_batch(db, deltas: list[ProgressDelta]) -> list[ProgressDelta]:
+        """
+        Upsert a batch within the caller's transaction: one statement per
+        shape, or - if that fails on a bad row - one SAVEPOINT per delta.
+        Returns the deltas that could not be written; connection errors
+        propagate so the caller keeps the whole batch.
+        """
+        try:
+            await write_deltas(db, deltas)
+            return []
+        except Exception as e:
+            if is_connection_error(e):
+                raise
+            print(f"Progress batch failed, retrying per delta: {e}")
+            await db.rollback()
+
+        failed = []
+        for delta in deltas:
+            try:
+                async with db.begin_nested():
+                    await write_deltas(db, [delta])
+            except Exception as e:
+                if is_connection_error(e):
+                    raise
+                print(f"Progress delta for {delta.key} failed: {e}")
+                failed.append(delta)
+        return failed
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if isinstance(self.store, RedisProgressStore) else "memory",
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "dead_lettered": self.dead_lettered,
+            "bypassed": self.bypassed,
+        }
+
+
+@lru_cache()
+def get_progress_buffer() -> ProgressBuffer:
+    return ProgressBuffer(
+        flush_interval=settings.progress_flush_interval_sec,
+        max_pending=settings.progress_flush_max_pending,
+        max_attempts=settings.progress_flush_max_attempts,
+        store=build_progress_store(
+            settings.progress_buffer_backend,
+            get_cache_service(),
+            max_keys=settings.progress_buffer_max_keys,
+        ),
+    )
+
+
+async def user_exists(db: AsyncSession, user_id: UUID) -> bool:
+    """Whether progress can be recorded for a user (rows reference users.id)"""
+    key = str(user_id)
+    if known_users.get(key):
+        return True
+    result = await db.execute(select(User.id).where(User.id == user_id))
+    if result.scalar() is None:
+        return False
+    known_users.set(key, True)
+    return True
+
+
+async def record_progress(db: AsyncSession, delta: ProgressDelta) -> Optional[UserProgress]:
+    """
+    Buffer a progress change, or in "direct" mode (or when the buffer
+    can't take it) apply it within the request's transaction and return
+    the row. Callers check the user and story exist first.
+    """
+    if settings.progress_write_mode == "buffer" and await get_progress_buffer().record(delta):
+        return None
+
+    progress = await upsert_progress(db, delta)
+    await db.flush()
+    return progress
+
+
+async def choice_count(db: AsyncSession, user_id: UUID, story_id: UUID) -> int:
+    """Choices made so far: the stored count plus buffered ones"""
+    buffer = get_progress_buffer()
+    async with buffer.paused():
+        result = await db.execute(
+            select(UserProgress.choices_count).where(
+                UserProgress.user_id == user_id,
+                UserProgress.story_id == story_id,
+            )
+        )
+        stored = result.scalar() or 0
+        pending = await buffer.pending(user_id, story_id)
+    return stored + (len(pending.choices) if pending else 0)
@@ -0,0 +1,159 @@
+"""
+Per-story progress index.
+
+display_order is not path depth in a branching story, so completion is
+computed from the story graph instead: for every node we store its depth
+from the start and the shortest/longest number of steps left to an end
+node. The index is built when a story is seeded or published, kept on
+Story.progress_index, and makes progress updates a dictionary lookup.
+
+Traversal follows the player: a choice node moves to its choices' targets,
+any other non-end node advances to the next display_order.
+"""
+
+from collections import deque
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.story import Story, StoryChoice, StoryNode
+
+INDEX_VERSION = 1
+
+
+def story_successors(
+    nodes: Iterable[Any], choices: Iterable[Any]
+) -> tuple[dict[str, list[str]], set[str], set[str], int]:
+    """Adjacency (by str node id), start ids, end ids and max display_order"""
+    nodes = list(nodes)
+    by_order = {node.display_order: str(node.id) for node in nodes}
+    targets: dict[str, list[str]] = {}
+    for choice in choices:
+        if choice.next_node_id:
+            targets.setdefault(str(choice.node_id), []).append(str(choice.next_node_id))
+
+    successors: dict[str, list[str]] = {}
+    for node in nodes:
+        node_id = str(node.id)
+        if node.is_end:
+            successors[node_id] = []
+        elif node.node_type == "choice" and targets.get(node_id):
+            successors[node_id] = targets[node_id]
+        else:
+            following = by_order.get(node.display_order + 1)
+            successors[node_id] = [following] if following else []
+
+    starts = {str(node.id) for node in nodes if node.is_start}
+    if not starts and nodes:
+        starts = {str(min(nodes, key=lambda n: n.display_order).id)}
+    ends = {str(node.id) for node in nodes if node.is_end}
+    max_order = max((node.display_order for node in nodes), default=1) or 1
+    return successors, starts, ends, max_order
+
+
+def _bfs(sources: set[str], edges: dict[str, list[str]]) -> dict[str, int]:
+    distance = {source: 0 for source in sources}
+    queue = deque(sources)
+    while queue:
+        current = queue.popleft()
+        for following in edges.get(current, []):
+            if following not in distance:
+                distance[following] = distance[current] + 1
+                queue.append(following)
+    return distance
+
+
+def _longest_remaining(successors: dict[str, list[str]], ends: set[str]) -> dict[str, int]:
+    """Longest step count to an end node; edges that close a loop are ignored"""
+    longest: dict[str, int] = {}
+    visiting: set[str] = set()
+
+    for root in successors:
+        if root in longest:
+            continue
+        # Iterative post-order DFS (stories can be long chains)
+        stack = [(root, iter(successors[root]))]
+        visiting.add(root)
+        while stack:
+            node_id, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                visiting.discard(node_id)
+                best = 0 if node_id in ends else None
+                for following in successors[node_id]:
+                    if longest.get(following) is not None:
+                        candidate = longest[following] + 1
+                        best = candidate if best is None else max(best, candidate)
+                longest[node_id] = best
+            elif child not in longest and child not in visiting and child in successors:
+                visiting.add(child)
+                stack.append((child, iter(successors[child])))
+    return {node_id: steps for node_id, steps in longest.items() if steps is not None}
+
+
+def build_progress_index(nodes: Iterable[Any], choices: Iterable[Any]) -> dict:
+    """Build the JSON-serializable index stored on Story.progress_index"""
+    successors, starts, ends, max_order = story_successors(nodes, choices)
+
+    predecessors: dict[str, list[str]] = {}
+    for node_id, following in successors.items():
+        for target in following:
+            predecessors.setdefault(target, []).append(node_id)
+
+    depth = _bfs(starts, successors)
+    shortest = _bfs(ends, predecessors)
+    longest = _longest_remaining(successors, ends)
+
+    return {
+        "version": INDEX_VERSION,
+        "max_order": max_order,
+        "nodes": {
+            node_id: {
+                "depth": depth.get(node_id),
+                "min_remaining": shortest.get(node_id),
+                "max_remaining": longest.get(node_id),
+            }
+            for node_id in successors
+        },
+    }
+
+
+def completion_from_index(
+    index: Optional[dict], node_id: Any, display_order: int, is_end: bool
+) -> Optional[float]:
+    """
+    Percentage complete at a node: depth over depth plus the midpoint of the
+    remaining-path range. Falls back to display_order / max_order for nodes
+    the index can't place; returns None without a usable index.
+    """
+    if is_end:
+        return 100.0
+    if not index or index.get("version") != INDEX_VERSION:
+        return None
+
+    entry = index.get("nodes", {}).get(str(node_id))
+    if entry and entry.get("depth") is not None and entry.get("min_remaining") is not None:
+        remaining = (entry["min_remaining"] + (entry["max_remaining"] or entry["min_remaining"])) / 2
+        total = entry["depth"] + remaining
+        if total > 0:
+            return round(min(100.0, max(0.0, entry["depth"] / total * 100.0)), 2)
+
+    max_order = index.get("max_order") or 1
+    return min(100.0, max(0.0, display_order / max_order * 100.0))
+
+
+async def refresh_progress_index(db: AsyncSession, story: Story) -> dict:
+    """Rebuild and store a story's index; call when its nodes or choices change"""
+    result = await db.execute(select(StoryNode).where(StoryNode.story_id == story.id))
+    nodes = result.scalars().all()
+    choices = []
+    if nodes:
+        result = await db.execute(
+            select(StoryChoice).where(StoryChoice.node_id.in_([n.id for n in nodes]))
+        )
+        choices = result.scalars().all()
+
+    story.progress_index = build_progress_index(nodes, choices)
+    return story.progress_index
@@ -5,8 +5,9 @@ No credit card required!
 """
 
 import httpx
-from typing import Optional
+from typing import AsyncIterator, Optional
 from app.config import get_settings
+from app.services.http_client import get_http_client
 
 settings = get_settings()
 
@@ -80,32 +81,93 @@ class StorageService:
             # Upload via Supabase Storage API
             upload_url = f"{self.storage_url}/object/{self.bucket_name}/{file_path}"
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    upload_url,
-                    headers={
-                        "Authorization": f"Bearer {self.supabase_key}",
-                        "Content-Type": "audio/mpeg",
-                        "x-upsert": "true",  # Overwrite if exists
-                    },
-                    content=audio_bytes,
-                    timeout=30.0,
-                )
-
-                if response.status_code in [200, 201]:
-                    # Return public URL
-                    public_url = f"{self.storage_url}/object/public/{self.bucket_name}/{file_path}"
-                    print(f"✅ Uploaded to Supabase: {public_url}")
-                    return public_url
-                else:
-                    print(f"❌ Upload failed: {response.status_code}")
-                    print(f"Response: {response.text}")
-                    return None
+            client = get_http_client()
+            response = await client.post(
+                upload_url,
+                headers={
+                    "Authorization": f"Bearer {self.supabase_key}",
+                    "Content-Type": "audio/mpeg",
+                    "x-upsert": "true",  # Overwrite if exists
+                },
+                content=audio_bytes,
+                timeout=30.0,
+            )
+
+            if response.status_code in [200, 201]:
+                # Return public URL
+                public_url = f"{self.storage_url}/object/public/{self.bucket_name}/{file_path}"
+                print(f"✅ Uploaded to Supabase: {public_url}")
+                return public_url
+            else:
+                print(f"❌ Upload failed: {response.status_code}")
+                print(f"Response: {response.text}")
+                return None
 
         except Exception as e:
             print(f"❌ Storage upload error: {e}")
             return None
 
+    async def upload_audio_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        story_slug: str,
+        node_id: str,
+        language: str,
+        speaker: str,
+    ) -> Optional[str]:
+        """
+        Upload audio produced incrementally (chunked transfer encoding), so
+        the whole file never has to be held in memory.
+
+        Returns:
+            Public URL of uploaded file or None if failed
+        """
+        if not self.is_configured():
+            print("⚠️  Supabase storage not configured - skipping streamed upload")
+            return None
+
+        file_path = f"stories/{story_slug}/audio/{language}/{speaker}/{node_id}.mp3"
+        upload_url = f"{self.storage_url}/object/{self.bucket_name}/{file_path}"
+
+        try:
+            client = get_http_client()
+            response = await client.post(
+                upload_url,
+                headers={
+                    "Authorization": f"Bearer {self.supabase_key}",
+                    "Content-Type": "audio/mpeg",
+                    "x-upsert": "true",  # Overwrite if exists
+                },
+                content=chunks,
+                timeout=120.0,
+            )
+
+            if response.status_code in [200, 201]:
+                public_url = f"{self.storage_url}/object/public/{self.bucket_name}/{file_path}"
+                print(f"✅ Streamed upload to Supabase: {public_url}")
+                return public_url
+
+            print(f"❌ Streamed upload failed: {response.status_code}")
+            print(f"Response: {response.text}")
+            return None
+
+        except httpx.HTTPError as e:
+            print(f"❌ Storage streamed upload error: {e}")
+            return None
+
+    async def download_audio(self, url: str) -> Optional[bytes]:
+        """Fetch a previously uploaded audio file by its public URL"""
+        try:
+            client = get_http_client()
+            response = await client.get(url, timeout=30.0)
+            if response.status_code == 200:
+                return response.content
+            print(f"❌ Download failed: {response.status_code} {url}")
+            return None
+        except Exception as e:
+            print(f"❌ Storage download error: {e}")
+            return None
+
     async def delete_audio(self, file_path: str) -> bool:
         """Delete audio file from storage"""
         if not self.is_configured():
@@ -114,13 +176,13 @@ class StorageService:
         try:
             delete_url = f"{self.storage_url}/object/{self.bucket_name}/{file_path}"
 
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    delete_url,
-                    headers={"Authorization": f"Bearer {self.supabase_key}"},
-                    timeout=10.0,
-                )
-                return response.status_code in [200, 204]
+            client = get_http_client()
+            response = await client.delete(
+                delete_url,
+                headers={"Authorization": f"Bearer {self.supabase_key}"},
+                timeout=10.0,
+            )
+            return response.status_code in [200, 204]
 
         except Exception as e:
             print(f"Storage delete error: {e}")
@@ -0,0 +1,89 @@
+"""
+Pre-serialized API responses.
+
+Hot read endpoints cache the final JSON bytes instead of a model_dump()
+dict, so a hit is returned as a raw Response: no model rebuild, no
+re-validation and no second serialization. Large bodies are gzipped in
+Redis only; the in-process tier keeps them ready to send.
+
+Also holds the conditional-request helpers (ETag / If-None-Match).
+"""
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+ENVELOPE_VERSION = b"r1"
+ENCODING_IDENTITY = b"identity"
+ENCODING_GZIP = b"gzip"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+
+    def to_envelope(self, gzip_min_bytes: int = 0) -> bytes:
+        """Redis value: version, etag, encoding header lines, then the body"""
+        encoding, body = ENCODING_IDENTITY, self.body
+        if gzip_min_bytes and len(body) >= gzip_min_bytes:
+            encoding, body = ENCODING_GZIP, gzip.compress(body, compresslevel=6)
+        header = b"\n".join(
+            (ENVELOPE_VERSION, self.etag.encode(), self.media_type.encode(), encoding)
+        )
+        return header + b"\n" + body
+
+    @classmethod
+    def from_envelope(cls, value: bytes) -> Optional["CachedResponse"]:
+        parts = value.split(b"\n", 4)
+        if len(parts) != 5 or parts[0] != ENVELOPE_VERSION:
+            return None
+        _, etag, media_type, encoding, body = parts
+        if encoding == ENCODING_GZIP:
+            body = gzip.decompress(body)
+        elif encoding != ENCODING_IDENTITY:
+            return None
+        return cls(body=body, etag=etag.decode(), media_type=media_type.decode())
+
+    def render(self, headers: Optional[dict[str, str]] = None) -> Response:
+        return Response(
+            content=self.body,
+            media_type=self.media_type,
+            headers={"ETag": self.etag, **(headers or {})},
+        )
+
+
+def body_etag(body: bytes) -> str:
+    """Strong validator for an exact response body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def version_etag(*parts: Any) -> str:
+    """Strong validator derived from whatever versions the representation"""
+    key = ":".join(str(part) for part in parts).encode()
+    return f'"{hashlib.blake2b(key, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match check; uses weak comparison as RFC 9110 requires"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str, headers: Optional[dict[str, str]] = None) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+def build_cached_response(model: BaseModel, etag: Optional[str] = None) -> CachedResponse:
+    # model_dump_json serializes in pydantic-core without building a dict
+    body = model.model_dump_json().encode()
+    return CachedResponse(body=body, etag=etag or body_etag(body))
@@ -0,0 +1,95 @@
+"""
+Single-flight coordination for expensive, idempotent work (e.g. TTS synthesis).
+
+Concurrent callers for the same key inside one process share a single
+in-flight task. Across workers a short-lived Redis lock makes sure only one
+process runs the work; the others are told the work is already in progress.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from app.services.cache_service import CacheService
+
+
+class FlightInProgress(Exception):
+    """Raised when the work for a key is owned by another caller/worker."""
+
+    def __init__(self, key: str):
+        super().__init__(f"Work already in progress for {key}")
+        self.key = key
+
+
+class SingleFlight:
+    def __init__(
+        self,
+        cache_service: CacheService,
+        prefix: str = "singleflight",
+        lock_ttl: int = 120,
+    ):
+        self.cache_service = cache_service
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self._flights: dict[str, asyncio.Future] = {}
+
+    def is_in_flight(self, key: str) -> bool:
+        """Check whether this process is currently running work for key"""
+        return key in self._flights
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        wait_timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Run fn once per key.
+
+        Args:
+            key: Identity of the work (e.g. an audio variant)
+            fn: Coroutine factory performing the work
+            wait_timeout: How long followers wait for the leader (None = forever)
+
+        Returns:
+            The leader's result, shared with every concurrent follower
+
+        Raises:
+            FlightInProgress: another worker holds the lock, or a follower
+                gave up waiting for the in-process leader
+        """
+        existing = self._flights.get(key)
+        if existing is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(existing), wait_timeout)
+            except asyncio.TimeoutError as exc:
+                raise FlightInProgress(key) from exc
+            except asyncio.CancelledError:
+                # The leader was cancelled; this caller itself was not.
+                if existing.cancelled():
+                    raise FlightInProgress(key)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        try:
+            lock_key = f"{self.prefix}:{key}"
+            token = await self.cache_service.acquire_lock(lock_key, self.lock_ttl)
+            if token is None:
+                raise FlightInProgress(key)
+            try:
+                result = await fn()
+            finally:
+                await self.cache_service.release_lock(lock_key, token)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark as retrieved so an unobserved failure doesn't log a warning.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._flights.pop(key, None)
@@ -0,0 +1,127 @@
+"""
+Concurrent per-node synthesis for full-story audio.
+
+Segments are produced with a bounded number of in-flight requests, retried
+individually, and handed back in display_order so the caller can stitch the
+combined track. Existing per-node audio is reused when a fetcher is supplied.
+stream() yields segments in order while only a window of them is held in
+memory, for feeding a streaming encoder.
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from uuid import UUID
+
+SOURCE_REUSED = "reused"
+SOURCE_SYNTHESIZED = "synthesized"
+
+
+@dataclass(frozen=True)
+class SegmentRequest:
+    node_id: UUID
+    display_order: int
+    text: str
+    language: str
+    speaker: str
+
+
+@dataclass
+class SegmentResult:
+    request: SegmentRequest
+    audio_bytes: Optional[bytes] = None
+    source: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.source is not None
+
+
+SynthesizeFn = Callable[[SegmentRequest], Awaitable[Optional[bytes]]]
+FetchExistingFn = Callable[[SegmentRequest], Awaitable[Optional[bytes]]]
+
+
+class StoryAudioPipeline:
+    def __init__(
+        self,
+        synthesize: SynthesizeFn,
+        fetch_existing: Optional[FetchExistingFn] = None,
+        concurrency: int = 4,
+        max_retries: int = 2,
+        retry_backoff_sec: float = 0.5,
+    ):
+        self.synthesize = synthesize
+        self.fetch_existing = fetch_existing
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff_sec = retry_backoff_sec
+
+    async def stream(
+        self, requests: list[SegmentRequest]
+    ) -> AsyncIterator[SegmentResult]:
+        """
+        Yield results in display_order as soon as each is ready. At most
+        `concurrency` segments are in flight or buffered at any time.
+        """
+        remaining = iter(sorted(requests, key=lambda request: request.display_order))
+        window: deque[asyncio.Task] = deque()
+
+        def schedule_next():
+            request = next(remaining, None)
+            if request is not None:
+                window.append(asyncio.create_task(self._produce(request)))
+
+        for _ in range(self.concurrency):
+            schedule_next()
+
+        try:
+            while window:
+                result = await window[0]
+                window.popleft()
+                schedule_next()
+                yield result
+        finally:
+            for task in window:
+                task.cancel()
+            await asyncio.gather(*window, return_exceptions=True)
+
+    async def _produce(self, request: SegmentRequest) -> SegmentResult:
+        result = SegmentResult(request=request)
+
+        if self.fetch_existing is not None:
+            try:
+                existing = await self.fetch_existing(request)
+            except Exception as e:
+                print(f"Warning: could not reuse audio for node {request.node_id}: {e}")
+                existing = None
+            if existing:
+                result.audio_bytes = existing
+                result.source = SOURCE_REUSED
+                return result
+
+        for attempt in range(1, self.max_retries + 2):
+            result.attempts = attempt
+            try:
+                audio_bytes = await self.synthesize(request)
+            except ValueError as e:
+                # Configuration problems (e.g. missing API key) won't fix themselves
+                result.error = str(e)
+                return result
+            except Exception as e:
+                audio_bytes = None
+                result.error = str(e) or e.__class__.__name__
+            else:
+                result.error = None if audio_bytes else "Synthesis returned no audio"
+
+            if audio_bytes:
+                result.audio_bytes = audio_bytes
+                result.source = SOURCE_SYNTHESIZED
+                return result
+
+            if attempt <= self.max_retries:
+                await asyncio.sleep(self.retry_backoff_sec * attempt)
+
+        return result
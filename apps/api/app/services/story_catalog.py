@@ -0,0 +1,125 @@
+"""
+Story catalog summary.
+
+GET /stories reads one story_catalog row per story instead of aggregating
+characters, nodes/choices and translations on every uncached call. The
+table is maintained by the application: refresh_story_catalog() rebuilds
+the rows for some (or all) stories in a single INSERT ... SELECT ... ON
+CONFLICT statement, and must be called whenever a story, its translations,
+characters or choices are seeded or edited.
+"""
+
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import func, literal_column, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.story import (
+    Character,
+    Story,
+    StoryCatalog,
+    StoryChoice,
+    StoryNode,
+    StoryTranslation,
+)
+
+
+def catalog_source(story_ids: Optional[Iterable[UUID]] = None):
+    """SELECT producing story_catalog rows from the normalized tables"""
+    char_counts = (
+        select(Character.story_id, func.count(Character.id).label("n"))
+        .group_by(Character.story_id)
+        .subquery()
+    )
+    choice_counts = (
+        select(StoryNode.story_id, func.count(StoryChoice.id).label("n"))
+        .join(StoryChoice, StoryNode.id == StoryChoice.node_id)
+        .group_by(StoryNode.story_id)
+        .subquery()
+    )
+    translations = (
+        select(
+            StoryTranslation.story_id,
+            func.array_agg(
+                aggregate_order_by(StoryTranslation.language_code, StoryTranslation.language_code)
+            ).label("languages"),
+            func.jsonb_object_agg(
+                StoryTranslation.language_code,
+                func.jsonb_build_object(
+                    "title",
+                    StoryTranslation.title,
+                    "description",
+                    StoryTranslation.description,
+                    "is_complete",
+                    func.coalesce(StoryTranslation.is_complete, False),
+                ),
+            ).label("texts"),
+        )
+        .group_by(StoryTranslation.story_id)
+        .subquery()
+    )
+
+    query = (
+        select(
+            Story.id,
+            Story.slug,
+            Story.age_range,
+            Story.age_min,
+            Story.age_max,
+            Story.region,
+            Story.moral,
+            func.coalesce(Story.duration_min, 0),
+            Story.cover_image,
+            func.coalesce(Story.is_active, true()),
+            func.coalesce(char_counts.c.n, 0),
+            func.coalesce(choice_counts.c.n, 0),
+            func.coalesce(translations.c.languages, literal_column("'{}'::varchar[]")),
+            func.coalesce(translations.c.texts, literal_column("'{}'::jsonb")),
+            func.coalesce(Story.created_at, func.now()),
+        )
+        .outerjoin(char_counts, char_counts.c.story_id == Story.id)
+        .outerjoin(choice_counts, choice_counts.c.story_id == Story.id)
+        .outerjoin(translations, translations.c.story_id == Story.id)
+    )
+    if story_ids is not None:
+        query = query.where(Story.id.in_(list(story_ids)))
+    return query
+
+
+CATALOG_COLUMNS = [
+    "story_id",
+    "slug",
+    "age_range",
+    "age_min",
+    "age_max",
+    "region",
+    "moral",
+    "duration_min",
+    "cover_image",
+    "is_active",
+    "character_count",
+    "choice_count",
+    "available_languages",
+    "translations",
+    "created_at",
+]
+
+
+def catalog_upsert(story_ids: Optional[Iterable[UUID]] = None):
+    stmt = pg_insert(StoryCatalog).from_select(CATALOG_COLUMNS, catalog_source(story_ids))
+    return stmt.on_conflict_do_update(
+        index_elements=[StoryCatalog.story_id],
+        set_={
+            **{name: stmt.excluded[name] for name in CATALOG_COLUMNS[1:]},
+            "refreshed_at": func.now(),
+        },
+    )
+
+
+async def refresh_story_catalog(
+    db: AsyncSession, story_ids: Optional[Iterable[UUID]] = None
+):
+    """Rebuild catalog rows for the given stories, or for every story"""
+    await db.execute(catalog_upsert(story_ids))
@@ -0,0 +1,403 @@
+"""
+Compiled, immutable story graphs.
+
+A story's nodes, choices (edges keyed by (node_id, choice_key)) and
+characters are loaded once per story version and compiled into frozen
+lookups, so resolving a choice and building the next node's payload need no
+database work. Graphs are shared through Redis as JSON and kept compiled
+in-process; the Redis entry (served from the local tier when it is active)
+tells us whether our compiled copy is still current.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.config import get_settings
+from app.models.story import Character, Story, StoryChoice, StoryNode
+from app.schemas.story import CharacterResponse, ChoiceResponse, StoryNodeResponse
+from app.services.cache_service import CacheService, LocalCache, get_cache_service
+from app.services.progress_index import (
+    INDEX_VERSION,
+    build_progress_index,
+    completion_from_index,
+)
+
+settings = get_settings()
+
+# Bump when the serialized graph layout changes
+GRAPH_FORMAT = 2
+
+
+def localized(texts: Mapping[str, str], language: str, default: str = "") -> str:
+    return texts.get(language, texts.get("en", default))
+
+
+def freeze_texts(value: Any) -> Mapping[str, str]:
+    return MappingProxyType(dict(value) if isinstance(value, dict) else {})
+
+
+@dataclass(frozen=True)
+class GraphCharacter:
+    id: UUID
+    slug: str
+    name: str
+    names: Mapping[str, str]
+    voice_profile: str
+    bulbul_speaker: str
+    avatar_url: Optional[str]
+
+    def response(self, language: str) -> CharacterResponse:
+        return CharacterResponse(
+            id=self.id,
+            slug=self.slug,
+            name=localized(self.names, language, self.name),
+            voice_profile=self.voice_profile,
+            bulbul_speaker=self.bulbul_speaker,
+            avatar_url=self.avatar_url,
+        )
+
+
+@dataclass(frozen=True)
+class GraphChoice:
+    id: UUID
+    node_id: UUID
+    choice_key: str
+    texts: Mapping[str, str]
+    next_node_id: Optional[UUID]
+
+    def response(self, language: str) -> ChoiceResponse:
+        return ChoiceResponse(
+            id=self.id,
+            choice_key=self.choice_key,
+            text=localized(self.texts, language),
+            next_node_id=self.next_node_id,
+        )
+
+
+@dataclass(frozen=True)
+class GraphNode:
+    id: UUID
+    node_type: str
+    display_order: int
+    is_start: bool
+    is_end: bool
+    texts: Mapping[str, str]
+    character_id: Optional[UUID]
+    choices: tuple[GraphChoice, ...]
+
+
+@dataclass(frozen=True)
+class StoryGraph:
+    story_id: UUID
+    slug: str
+    version: str
+    nodes: Mapping[UUID, GraphNode]
+    edges: Mapping[tuple[UUID, str], GraphChoice]
+    characters: Mapping[UUID, GraphCharacter]
+    max_display_order: int
+    progress_index: Mapping[str, Any]
+
+    def node(self, node_id: Optional[UUID]) -> Optional[GraphNode]:
+        return self.nodes.get(node_id) if node_id is not None else None
+
+    def choice(self, node_id: UUID, choice_key: str) -> Optional[GraphChoice]:
+        return self.edges.get((node_id, choice_key))
+
+    def completion(self, node: GraphNode) -> float:
+        return completion_from_index(
+            self.progress_index, node.id, node.display_order, node.is_end
+        )
+
+    def node_response(self, node: GraphNode, language: str) -> StoryNodeResponse:
+        character = self.characters.get(node.character_id)
+        choices = None
+        if node.node_type == "choice" and node.choices:
+            choices = [choice.response(language) for choice in node.choices]
+        return StoryNodeResponse(
+            id=node.id,
+            node_type=node.node_type,
+            display_order=node.display_order,
+            is_start=node.is_start,
+            is_end=node.is_end,
+            text=localized(node.texts, language),
+            character=character.response(language) if character else None,
+            choices=choices,
+        )
+
+    def node_responses(self, language: str) -> list[StoryNodeResponse]:
+        """Every node, in display order, localized for one language"""
+        return [self.node_response(node, language) for node in self.nodes.values()]
+
+    def character_responses(self, language: str) -> list[CharacterResponse]:
+        return [character.response(language) for character in self.characters.values()]
+
+    def to_dict(self) -> dict:
+        return {
+            "format": GRAPH_FORMAT,
+            "story_id": str(self.story_id),
+            "slug": self.slug,
+            "version": self.version,
+            "progress_index": self.progress_index,
+            "characters": [
+                {
+                    "id": str(c.id),
+                    "slug": c.slug,
+                    "name": c.name,
+                    "names": dict(c.names),
+                    "voice_profile": c.voice_profile,
+                    "bulbul_speaker": c.bulbul_speaker,
+                    "avatar_url": c.avatar_url,
+                }
+                for c in self.characters.values()
+            ],
+            "nodes": [
+                {
+                    "id": str(n.id),
+                    "node_type": n.node_type,
+                    "display_order": n.display_order,
+                    "is_start": n.is_start,
+                    "is_end": n.is_end,
+                    "texts": dict(n.texts),
+                    "character_id": str(n.character_id) if n.character_id else None,
+                    "choices": [
+                        {
+                            "id": str(c.id),
+                            "choice_key": c.choice_key,
+                            "texts": dict(c.texts),
+                            "next_node_id": str(c.next_node_id) if c.next_node_id else None,
+                        }
+                        for c in n.choices
+                    ],
+                }
+                for n in self.nodes.values()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StoryGraph":
+        characters = [
+            GraphCharacter(
+                id=UUID(c["id"]),
+                slug=c["slug"],
+                name=c["name"],
+                names=freeze_texts(c["names"]),
+                voice_profile=c["voice_profile"],
+                bulbul_speaker=c["bulbul_speaker"],
+                avatar_url=c["avatar_url"],
+            )
+            for c in data["characters"]
+        ]
+        nodes = []
+        for n in data["nodes"]:
+            node_id = UUID(n["id"])
+            nodes.append(
+                GraphNode(
+                    id=node_id,
+                    node_type=n["node_type"],
+                    display_order=n["display_order"],
+                    is_start=n["is_start"],
+                    is_end=n["is_end"],
+                    texts=freeze_texts(n["texts"]),
+                    character_id=UUID(n["character_id"]) if n["character_id"] else None,
+                    choices=tuple(
+                        GraphChoice(
+                            id=UUID(c["id"]),
+                            node_id=node_id,
+                            choice_key=c["choice_key"],
+                            texts=freeze_texts(c["texts"]),
+                            next_node_id=UUID(c["next_node_id"]) if c["next_node_id"] else None,
+                        )
+                        for c in n["choices"]
+                    ),
+                )
+            )
+        return assemble_graph(
+            UUID(data["story_id"]),
+            data["slug"],
+            data["version"],
+            nodes,
+            characters,
+            data.get("progress_index"),
+        )
+
+
+def assemble_graph(
+    story_id: UUID,
+    slug: str,
+    version: str,
+    nodes: list[GraphNode],
+    characters: list[GraphCharacter],
+    progress_index: Optional[dict] = None,
+) -> StoryGraph:
+    if not progress_index or progress_index.get("version") != INDEX_VERSION:
+        # Stories saved before the index existed; GraphNode/GraphChoice have the
+        # attributes the builder reads
+        progress_index = build_progress_index(
+            nodes, [choice for node in nodes for choice in node.choices]
+        )
+    return StoryGraph(
+        story_id=story_id,
+        slug=slug,
+        version=version,
+        nodes=MappingProxyType({node.id: node for node in nodes}),
+        edges=MappingProxyType(
+            {
+                (node.id, choice.choice_key): choice
+                for node in nodes
+                for choice in node.choices
+            }
+        ),
+        characters=MappingProxyType({c.id: c for c in characters}),
+        max_display_order=max((node.display_order for node in nodes), default=1) or 1,
+        progress_index=progress_index,
+    )
+
+
+def story_version(story: Story) -> str:
+    stamp = story.updated_at.isoformat() if story.updated_at else ""
+    return f"{story.id}:{stamp}"
+
+
+def compile_story_graph(
+    story: Story,
+    nodes: list[StoryNode],
+    choices: list[StoryChoice],
+    characters: list[Character],
+) -> StoryGraph:
+    """Freeze ORM rows into a StoryGraph"""
+    choices_by_node: dict[UUID, list[StoryChoice]] = {}
+    for choice in choices:
+        choices_by_node.setdefault(choice.node_id, []).append(choice)
+
+    graph_nodes = [
+        GraphNode(
+            id=node.id,
+            node_type=node.node_type,
+            display_order=node.display_order,
+            is_start=bool(node.is_start),
+            is_end=bool(node.is_end),
+            texts=freeze_texts(node.text_content),
+            character_id=node.character_id,
+            choices=tuple(
+                GraphChoice(
+                    id=choice.id,
+                    node_id=node.id,
+                    choice_key=choice.choice_key,
+                    texts=freeze_texts(choice.text_content),
+                    next_node_id=choice.next_node_id,
+                )
+                for choice in sorted(
+                    choices_by_node.get(node.id, []), key=lambda c: c.choice_key
+                )
+            ),
+        )
+        for node in sorted(nodes, key=lambda n: n.display_order)
+    ]
+    graph_characters = [
+        GraphCharacter(
+            id=character.id,
+            slug=character.slug,
+            name=character.name,
+            names=freeze_texts(character.name_translations),
+            voice_profile=character.voice_profile,
+            bulbul_speaker=character.bulbul_speaker,
+            avatar_url=character.avatar_url,
+        )
+        for character in characters
+    ]
+    return assemble_graph(
+        story.id,
+        story.slug,
+        story_version(story),
+        graph_nodes,
+        graph_characters,
+        story.progress_index,
+    )
+
+
+def story_aggregate_query(slug: str):
+    """A story with its translations and characters, in one round trip"""
+    return (
+        select(Story)
+        .where(Story.slug == slug)
+        .options(joinedload(Story.translations), joinedload(Story.characters))
+    )
+
+
+def story_nodes_query(story_id: UUID):
+    """A story's nodes with their choices, in one round trip"""
+    return (
+        select(StoryNode)
+        .where(StoryNode.story_id == story_id)
+        .options(joinedload(StoryNode.choices))
+    )
+
+
+def compile_loaded_story(story: Story, nodes: list[StoryNode]) -> StoryGraph:
+    """Compile rows loaded by story_aggregate_query and story_nodes_query"""
+    return compile_story_graph(
+        story,
+        nodes,
+        [choice for node in nodes for choice in node.choices],
+        list(story.characters),
+    )
+
+
+async def load_story_graph(db: AsyncSession, slug: str) -> Optional[StoryGraph]:
+    """Load and compile a story graph from the database"""
+    result = await db.execute(story_aggregate_query(slug))
+    story = result.unique().scalar_one_or_none()
+    if not story:
+        return None
+
+    result = await db.execute(story_nodes_query(story.id))
+    return compile_loaded_story(story, result.unique().scalars().all())
+
+
+def graph_cache_key(slug: str) -> str:
+    return f"story_graph:v{GRAPH_FORMAT}:{slug}"
+
+
+class StoryGraphStore:
+    """Compiled graphs in-process, serialized graphs in Redis, DB on a miss"""
+
+    def __init__(self, cache_service: CacheService, max_graphs: int = 64):
+        self.cache_service = cache_service
+        self._compiled = LocalCache(max_graphs, ttl=float("inf"))
+
+    async def get(self, db: AsyncSession, slug: str) -> Optional[StoryGraph]:
+        key = graph_cache_key(slug)
+        cached = await self.cache_service.get(key)
+        if cached:
+            compiled = self._compiled.get(key)
+            if compiled is not None and compiled.version == cached.get("version"):
+                return compiled
+            graph = StoryGraph.from_dict(cached)
+            self._compiled.set(key, graph)
+            return graph
+
+        graph = await load_story_graph(db, slug)
+        if graph is None:
+            return None
+        self._compiled.set(key, graph)
+        await self.cache_service.set(
+            key, graph.to_dict(), ttl=settings.story_graph_cache_ttl_sec
+        )
+        return graph
+
+    async def invalidate(self, slug: str):
+        key = graph_cache_key(slug)
+        self._compiled.discard(key)
+        await self.cache_service.delete(key)
+
+
+@lru_cache()
+def get_story_graph_store() -> StoryGraphStore:
+    return StoryGraphStore(get_cache_service())
@@ -0,0 +1,226 @@
+"""
+Story listing pages.
+
+GET /stories is one keyset-paginated scan of story_catalog: a StorySort
+picks the order (ties broken by story id) and an opaque StoryCursor marks
+the last row of the previous page. The query lives here rather than in
+the router so the publish hook can re-render cached pages after an edit.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.story import StoryCatalog
+from app.schemas.story import StoryListResponse, StoryResponse
+from app.services.fallback_catalog import select_translation
+from app.utils.age_range import parse_age_range
+
+# Tag set of every cached listing page; any story write can reorder them
+STORY_LIST_TAG = "stories:tag:list"
+DEFAULT_PAGE_SIZE = 20
+
+
+@dataclass(frozen=True)
+class StorySort:
+    """A listing order: one story_catalog column, ties broken by story id"""
+
+    attribute: str
+    descending: bool = False
+
+    def column(self):
+        return getattr(StoryCatalog, self.attribute)
+
+    def order_by(self) -> tuple:
+        if self.descending:
+            return self.column().desc(), StoryCatalog.story_id.desc()
+        return self.column().asc(), StoryCatalog.story_id.asc()
+
+    def value(self, story: Any) -> Any:
+        return getattr(story, self.attribute)
+
+    def dump(self, value: Any) -> Any:
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def load(self, raw: Any) -> Any:
+        if self.attribute == "created_at":
+            return datetime.fromisoformat(raw)
+        if self.attribute == "duration_min":
+            return int(raw)
+        return str(raw)
+
+
+STORY_SORTS = {
+    "newest": StorySort("created_at", descending=True),
+    "oldest": StorySort("created_at"),
+    "shortest": StorySort("duration_min"),
+    "longest": StorySort("duration_min", descending=True),
+    "slug": StorySort("slug"),
+}
+DEFAULT_STORY_SORT = "newest"
+
+
+@dataclass(frozen=True)
+class StoryCursor:
+    """Keyset position: the last row's sort value and id, opaque to clients"""
+
+    value: Any
+    id: UUID
+
+    def encode(self, sort: StorySort) -> str:
+        raw = json.dumps([sort.dump(self.value), str(self.id)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str, sort: StorySort) -> Optional["StoryCursor"]:
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            value, story_id = json.loads(base64.urlsafe_b64decode(padded))
+            return cls(sort.load(value), UUID(story_id))
+        except (ValueError, TypeError):
+            return None
+
+    def precedes(self, sort: StorySort, story: Any) -> bool:
+        """Whether a story sorts after this cursor (Python twin of keyset_filter)"""
+        key, position = (sort.value(story), story.id), (self.value, self.id)
+        return key < position if sort.descending else key > position
+
+
+def age_range_filter(age_range: str):
+    """
+    SQL twin of the Python overlap check: numeric "low-high" ranges match
+    stories whose age_min/age_max bounds overlap, anything else by exact value
+    """
+    requested_range = parse_age_range(age_range)
+    if requested_range is None:
+        return StoryCatalog.age_range == age_range
+    return and_(
+        StoryCatalog.age_min <= requested_range[1],
+        StoryCatalog.age_max >= requested_range[0],
+    )
+
+
+def keyset_filter(sort: StorySort, cursor: StoryCursor):
+    """Rows strictly after the cursor in (sort key, id) order"""
+    column, story_id = sort.column(), StoryCatalog.story_id
+    if sort.descending:
+        return or_(column < cursor.value, and_(column == cursor.value, story_id < cursor.id))
+    return or_(column > cursor.value, and_(column == cursor.value, story_id > cursor.id))
+
+
+def story_list_cache_key(
+    language: str,
+    age_range: Optional[str],
+    region: Optional[str],
+    available_language: Optional[str],
+    sort: str,
+    limit: int,
+    cursor: Optional[str],
+) -> str:
+    """One cache entry per page of a filtered, sorted listing"""
+    return ":".join(
+        (
+            "stories:v4:list",
+            language,
+            age_range or "all",
+            region or "all",
+            available_language or "any",
+            sort,
+            str(limit),
+            cursor or "first",
+        )
+    )
+
+
+def list_pagination(
+    sort: str, limit: int, cursor: Optional[str], next_cursor: Optional[str]
+) -> dict[str, Any]:
+    return {
+        "limit": limit,
+        "sort": sort,
+        "cursor": cursor,
+        "next_cursor": next_cursor,
+        "has_next": next_cursor is not None,
+        "has_prev": cursor is not None,
+    }
+
+
+async def fetch_story_page(
+    db: AsyncSession,
+    requested_language: str,
+    age_range: Optional[str] = None,
+    region: Optional[str] = None,
+    available_language: Optional[str] = None,
+    sort: str = DEFAULT_STORY_SORT,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    execute: Optional[Callable[[AsyncSession, Any], Awaitable[Any]]] = None,
+) -> StoryListResponse:
+    """
+    One page of the listing from story_catalog. sort and cursor must already
+    be valid; execute defaults to db.execute (the router passes its guard)
+    """
+    story_sort = STORY_SORTS[sort]
+    page_cursor = StoryCursor.decode(cursor, story_sort) if cursor else None
+
+    # One indexed scan of the catalog summary (plus a lookahead row)
+    query = select(StoryCatalog).where(
+        StoryCatalog.is_active == True,
+        func.cardinality(StoryCatalog.available_languages) > 0,
+    )
+    if available_language:
+        query = query.where(StoryCatalog.available_languages.contains([available_language]))
+    if age_range:
+        query = query.where(age_range_filter(age_range))
+    if region:
+        query = query.where(StoryCatalog.region == region)
+    if page_cursor:
+        query = query.where(keyset_filter(story_sort, page_cursor))
+    query = query.order_by(*story_sort.order_by()).limit(limit + 1)
+
+    result = await execute(db, query) if execute else await db.execute(query)
+    entries = result.scalars().all()
+    has_next = len(entries) > limit
+    entries = entries[:limit]
+
+    stories = []
+    for entry in entries:
+        language_code, translation = select_translation(
+            entry.translations or {}, requested_language
+        )
+        if not translation:
+            continue
+
+        stories.append(
+            StoryResponse(
+                id=entry.story_id,
+                slug=entry.slug,
+                title=translation.get("title") or entry.slug,
+                description=translation.get("description") or "",
+                language=language_code,
+                age_range=entry.age_range,
+                region=entry.region,
+                moral=entry.moral,
+                duration_min=entry.duration_min or 0,
+                cover_image=entry.cover_image or "",
+                character_count=entry.character_count or 0,
+                choice_count=entry.choice_count or 0,
+                is_completed_translation=bool(translation.get("is_complete")),
+                created_at=entry.created_at,
+            )
+        )
+
+    next_cursor = None
+    if has_next and entries:
+        last = entries[-1]
+        next_cursor = StoryCursor(story_sort.value(last), last.story_id).encode(story_sort)
+    return StoryListResponse(
+        data=stories,
+        pagination=list_pagination(sort, limit, cursor, next_cursor),
+    )
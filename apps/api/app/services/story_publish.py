@@ -0,0 +1,155 @@
+"""
+Story publish hook.
+
+Every write to a story's content - seeding, an edit script, a future admin
+endpoint - ends with publish_story(). In one transaction it bumps
+updated_at, rebuilds the progress index when the graph changed, re-renders
+the per-language detail snapshots and refreshes the story's catalog row.
+After the commit it brings the caches in line:
+
+- the compiled story graph is dropped (Redis and in-process)
+- every cached detail key of the story (one per requested language, found
+  through its tag set) is overwritten with the new snapshot, so readers
+  switch versions without a miss and a rebuild stampede
+- the default first listing page of each of its languages is re-rendered
+  and every other cached listing page is dropped
+
+Rewritten entries get jittered TTLs so keys warmed together don't go
+stale together, and are refreshed through CacheService.get_or_compute.
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Any, Mapping, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.story import Story
+from app.services.cache_service import (
+    RESPONSE_CODEC,
+    CacheService,
+    get_cache_service,
+    jittered_ttl,
+)
+from app.services.fallback_catalog import select_translation
+from app.services.progress_index import refresh_progress_index
+from app.services.response_cache import CachedResponse, build_cached_response
+from app.services.story_catalog import refresh_story_catalog
+from app.services.story_graph import get_story_graph_store
+from app.services.story_listing import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_STORY_SORT,
+    STORY_LIST_TAG,
+    fetch_story_page,
+    story_list_cache_key,
+)
+from app.services.story_snapshot import (
+    publish_story_snapshots,
+    story_detail_cache_key,
+    story_detail_etag,
+    story_detail_tag,
+)
+
+settings = get_settings()
+
+
+def story_cache_ttls() -> tuple[int, int]:
+    """(soft, hard) TTLs for a story list/detail entry"""
+    soft_ttl = jittered_ttl(settings.story_cache_ttl_sec, settings.story_cache_ttl_jitter)
+    return soft_ttl, soft_ttl + settings.story_cache_stale_sec
+
+
+async def publish_story(
+    db: AsyncSession, slug: str, graph_changed: bool = False
+) -> Optional[str]:
+    """
+    Publish a story's current rows and commit; returns the snapshot version,
+    or None if there is no such story. Pass graph_changed when nodes or
+    choices were added, removed or relinked.
+    """
+    result = await db.execute(select(Story).where(Story.slug == slug))
+    story = result.scalar_one_or_none()
+    if story is None:
+        return None
+
+    # Child-row edits don't touch the stories row, so bump the version here
+    story.updated_at = datetime.now(timezone.utc)
+    if graph_changed:
+        await refresh_progress_index(db, story)
+    await db.flush()
+
+    version = await publish_story_snapshots(db, slug)
+    await refresh_story_catalog(db, [story.id])
+    details = {
+        translation.language_code: translation.content_json["detail"]
+        for translation in story.translations
+        if version and (translation.content_json or {}).get("version") == version
+    }
+    await db.commit()
+
+    # Only after the commit, or a concurrent miss could re-cache old rows
+    await refresh_story_caches(db, story.id, slug, story.updated_at, details)
+    return version
+
+
+async def refresh_story_caches(
+    db: AsyncSession,
+    story_id: UUID,
+    slug: str,
+    updated_at: Optional[datetime],
+    details: Mapping[str, Any],
+    cache_service: Optional[CacheService] = None,
+):
+    """Rewrite or drop every cached list/detail entry a story appears in"""
+    cache_service = cache_service or get_cache_service()
+    await get_story_graph_store().invalidate(slug)
+    stale: set[str] = set()
+
+    # Details: one key per language clients asked for, each served the
+    # translation get_story would pick for it
+    tag = story_detail_tag(slug)
+    cached_keys = await cache_service.tagged_keys(tag)
+    requested = set(details) | {key.rsplit(":", 1)[-1] for key in cached_keys}
+    warmed: set[str] = set()
+    for requested_language in sorted(requested):
+        language, detail = select_translation(details, requested_language)
+        if detail is None:
+            continue
+        key = story_detail_cache_key(slug, requested_language)
+        body = json.dumps(detail, ensure_ascii=False, separators=(",", ":")).encode()
+        etag = story_detail_etag(story_id, updated_at, requested_language)
+        await cache_service.set_entry(
+            key,
+            CachedResponse(body=body, etag=etag),
+            *story_cache_ttls(),
+            codec=RESPONSE_CODEC,
+            tags=[tag],
+        )
+        warmed.add(key)
+    stale.update(set(cached_keys) - warmed)
+
+    # Listings: any page may now order differently, so drop them all but
+    # re-render the default first page of each of the story's languages
+    warmed = set()
+    try:
+        for language in sorted(details):
+            key = story_list_cache_key(
+                language, None, None, None, DEFAULT_STORY_SORT, DEFAULT_PAGE_SIZE, None
+            )
+            page = await fetch_story_page(db, language)
+            await cache_service.set_entry(
+                key,
+                build_cached_response(page),
+                *story_cache_ttls(),
+                codec=RESPONSE_CODEC,
+                tags=[STORY_LIST_TAG],
+            )
+            warmed.add(key)
+    except Exception as e:
+        print(f"Story list warm error: {e}")
+    stale.update(set(await cache_service.tagged_keys(STORY_LIST_TAG)) - warmed)
+
+    await cache_service.delete(*sorted(stale))
@@ -0,0 +1,151 @@
+"""
+Published per-language story snapshots.
+
+Publishing a story renders its full detail payload once per translation and
+stores it in StoryTranslation.content_json as
+
+    {"version": "<format>:<story id>:<updated_at>", "detail": {...}}
+
+GET /stories/{slug} reads the selected language's snapshot in a single
+query and returns its JSON text as the response body, so walking the
+text_content/name_translations of every node, choice and character happens
+at publish time instead of per request. A snapshot whose version doesn't
+match the story's current updated_at is ignored and the detail is
+assembled from the tables, so publish_story_snapshots must run again after
+a story is edited (and its updated_at bumped).
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import Text, case, cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.story import Story, StoryTranslation
+from app.schemas.story import StoryDetailResponse
+from app.services.response_cache import version_etag
+from app.services.story_graph import (
+    StoryGraph,
+    compile_loaded_story,
+    story_aggregate_query,
+    story_nodes_query,
+)
+
+# Bump when the snapshot document or the detail payload changes shape
+SNAPSHOT_FORMAT = 1
+# Bump when the story detail payload changes shape; part of keys and ETags
+STORY_DETAIL_VERSION = "v3"
+
+
+def story_detail_cache_key(slug: str, requested_language: str) -> str:
+    return f"stories:{STORY_DETAIL_VERSION}:detail:{slug}:{requested_language}"
+
+
+def story_detail_tag(slug: str) -> str:
+    """Tag set of a story's cached detail keys, one per requested language"""
+    return f"stories:tag:detail:{slug}"
+
+
+def story_detail_etag(story_id: Any, updated_at: Optional[datetime], language: str) -> str:
+    """ETag for a story's detail in one requested language"""
+    stamp = updated_at.isoformat() if updated_at else ""
+    return version_etag(STORY_DETAIL_VERSION, story_id, stamp, language)
+
+
+def snapshot_version(story_id: Any, updated_at) -> str:
+    stamp = updated_at.isoformat() if updated_at else ""
+    return f"{SNAPSHOT_FORMAT}:{story_id}:{stamp}"
+
+
+def render_story_detail(
+    story: Story,
+    graph: StoryGraph,
+    translation: StoryTranslation,
+    available_languages: list[str],
+) -> StoryDetailResponse:
+    """The detail payload for one translation of a compiled story"""
+    language = translation.language_code
+    nodes = graph.node_responses(language)
+    return StoryDetailResponse(
+        id=story.id,
+        slug=story.slug,
+        title=translation.title,
+        description=translation.description or "",
+        language=language,
+        age_range=story.age_range,
+        region=story.region,
+        moral=story.moral,
+        duration_min=story.duration_min or 0,
+        cover_image=story.cover_image or "",
+        available_languages=available_languages,
+        characters=graph.character_responses(language),
+        nodes=nodes,
+        start_node_id=next((node.id for node in nodes if node.is_start), nodes[0].id),
+        created_at=story.created_at,
+        updated_at=story.updated_at,
+    )
+
+
+def snapshot_query(slug: str, requested_language: str):
+    """
+    The snapshot of the language get_story would pick (requested, then
+    English, then the first code), with the story version it must match
+    """
+    preference = case(
+        (StoryTranslation.language_code == requested_language, 0),
+        (StoryTranslation.language_code == "en", 1),
+        else_=2,
+    )
+    return (
+        select(
+            Story.id,
+            Story.updated_at,
+            StoryTranslation.content_json["version"].as_string().label("snapshot_version"),
+            # The stored JSON text, so it can be sent without parsing it
+            cast(StoryTranslation.content_json["detail"], Text).label("snapshot"),
+        )
+        .join(StoryTranslation, StoryTranslation.story_id == Story.id)
+        .where(Story.slug == slug, Story.is_active == True)
+        .order_by(preference, StoryTranslation.language_code)
+        .limit(1)
+    )
+
+
+def current_snapshot(row) -> Optional[bytes]:
+    """The row's snapshot body if it was published for the current version"""
+    if row is None or not row.snapshot or row.snapshot == "null":
+        return None
+    if row.snapshot_version != snapshot_version(row.id, row.updated_at):
+        return None
+    return row.snapshot.encode()
+
+
+async def publish_story_snapshots(db: AsyncSession, slug: str) -> Optional[str]:
+    """
+    Render and store every translation's snapshot for the story's current
+    version; returns that version, or None if there is no such story
+    """
+    result = await db.execute(
+        story_aggregate_query(slug).execution_options(populate_existing=True)
+    )
+    story = result.unique().scalar_one_or_none()
+    if story is None:
+        return None
+
+    result = await db.execute(story_nodes_query(story.id))
+    nodes = result.unique().scalars().all()
+    if not nodes:
+        return None
+
+    graph = compile_loaded_story(story, nodes)
+    translations = list(story.translations)
+    available_languages = sorted(t.language_code for t in translations) or ["en"]
+    version = snapshot_version(story.id, story.updated_at)
+    for translation in translations:
+        detail = render_story_detail(story, graph, translation, available_languages)
+        translation.content_json = {
+            "version": version,
+            "detail": detail.model_dump(mode="json"),
+        }
+    await db.flush()
+    return version
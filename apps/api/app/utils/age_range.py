@@ -0,0 +1,27 @@
+"""
+Age ranges such as "4-8".
+
+Stories store the raw string for display and its integer bounds (age_min,
+age_max) for filtering; ranges that aren't "low-high" (e.g. "all") have no
+bounds and only ever match the exact same string.
+"""
+
+from typing import Optional
+
+
+def parse_age_range(value: Optional[str]) -> Optional[tuple[int, int]]:
+    if not value or "-" not in value:
+        return None
+    low, high = value.split("-", 1)
+    try:
+        low_i = int(low.strip())
+        high_i = int(high.strip())
+        if low_i > high_i:
+            low_i, high_i = high_i, low_i
+        return low_i, high_i
+    except ValueError:
+        return None
+
+
+def ranges_overlap(a: tuple[int, int], b: tuple[int, int]) -> bool:
+    return a[0] <= b[1] and b[0] <= a[1]
@@ -0,0 +1,141 @@
+"""
+Byte-level helpers for PCM WAV audio.
+
+Bulbul returns plain PCM WAV, so padding and stitching segments only needs
+the RIFF header: sample data is sliced through memoryviews and joined into the
+output in a single copy, without decoding through pydub or spawning ffmpeg.
+"""
+
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+HEADER_SIZE = 44
+
+
+class WavFormatError(ValueError):
+    """Raised for input that is not a PCM WAV this module can handle"""
+
+
+@dataclass(frozen=True)
+class WavInfo:
+    sample_rate: int
+    channels: int
+    sample_width: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+    @property
+    def frames(self) -> int:
+        return self.data_size // self.frame_size
+
+    @property
+    def duration_sec(self) -> float:
+        return self.frames / self.sample_rate
+
+
+def parse_wav_header(wav_bytes: bytes) -> WavInfo:
+    """Walk the RIFF chunks and locate the fmt and data chunks"""
+    view = memoryview(wav_bytes)
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        raise WavFormatError("Not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset : offset + 4])
+        (chunk_size,) = struct.unpack_from("<I", view, offset + 4)
+        body = offset + 8
+
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or body + 16 > len(view):
+                raise WavFormatError("fmt chunk too short")
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from(
+                "<HHIIHH", view, body
+            )
+            if audio_format not in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE):
+                raise WavFormatError(f"Unsupported WAV encoding {audio_format:#06x}")
+            if not channels or not sample_rate or bits % 8:
+                raise WavFormatError("Invalid fmt chunk")
+            fmt = (sample_rate, channels, bits // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise WavFormatError("data chunk before fmt chunk")
+            # Streamed WAVs may leave the size at 0 or 0xFFFFFFFF; trust the buffer
+            available = len(view) - body
+            data_size = chunk_size if 0 < chunk_size <= available else available
+            sample_rate, channels, sample_width = fmt
+            frame_size = channels * sample_width
+            return WavInfo(
+                sample_rate=sample_rate,
+                channels=channels,
+                sample_width=sample_width,
+                data_offset=body,
+                data_size=data_size - data_size % frame_size,
+            )
+
+        # Chunks are word-aligned
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise WavFormatError("No data chunk found")
+
+
+def pcm_view(wav_bytes: bytes, info: WavInfo) -> memoryview:
+    """Zero-copy view of the sample data"""
+    return memoryview(wav_bytes)[info.data_offset : info.data_offset + info.data_size]
+
+
+def wav_duration_sec(wav_bytes: bytes) -> Optional[float]:
+    """Length in seconds, rounded as audio_files stores it; None if not a PCM WAV"""
+    try:
+        return round(parse_wav_header(wav_bytes).duration_sec, 2)
+    except WavFormatError:
+        return None
+
+
+def build_wav_header(
+    sample_rate: int, channels: int, sample_width: int, data_size: int
+) -> bytes:
+    """Canonical 44-byte PCM header"""
+    frame_size = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        HEADER_SIZE - 8 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        WAVE_FORMAT_PCM,
+        channels,
+        sample_rate,
+        sample_rate * frame_size,
+        frame_size,
+        sample_width * 8,
+        b"data",
+        data_size,
+    )
+
+
+def silence_frames(info: WavInfo, silence_ms: int) -> int:
+    return info.sample_rate * max(0, silence_ms) // 1000
+
+
+def append_silence(wav_bytes: bytes, silence_ms: int) -> bytes:
+    """Return the WAV with `silence_ms` of silence appended"""
+    info = parse_wav_header(wav_bytes)
+    padding = silence_frames(info, silence_ms) * info.frame_size
+    data_size = info.data_size + padding
+
+    header = build_wav_header(
+        info.sample_rate, info.channels, info.sample_width, data_size
+    )
+    # 8-bit PCM is unsigned, so its silence is the midpoint rather than zero
+    silence = b"\x80" * padding if info.sample_width == 1 else bytes(padding)
+    # join() sizes the result up front and copies each part exactly once
+    return b"".join((header, pcm_view(wav_bytes, info), silence))
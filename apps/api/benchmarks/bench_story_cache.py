@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark: story detail cache hits, dict cache vs pre-serialized bytes.
+
+Serves one large StoryDetailResponse through FastAPI (in-process ASGI, no
+network) the old way - cached model_dump dict rebuilt into the model and
+re-serialized by response_model - and the new way - cached bytes returned
+as a raw Response. Both the Redis-hit path (value stored as a string or
+envelope) and the in-process tier path are measured.
+
+Usage: python benchmarks/bench_story_cache.py [--nodes 300] [--requests 500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import httpx
+from fastapi import FastAPI
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.schemas.story import (
+    CharacterResponse,
+    ChoiceResponse,
+    StoryDetailResponse,
+    StoryNodeResponse,
+)
+from app.services.response_cache import CachedResponse, build_cached_response
+
+
+def build_story(node_count: int) -> StoryDetailResponse:
+    now = datetime.now(timezone.utc)
+    characters = [
+        CharacterResponse(
+            id=uuid4(),
+            slug=f"character-{i}",
+            name=f"Character {i}",
+            voice_profile="warm",
+            bulbul_speaker="shubh",
+            avatar_url=None,
+        )
+        for i in range(4)
+    ]
+    nodes = []
+    for order in range(1, node_count + 1):
+        is_choice = order % 5 == 0
+        nodes.append(
+            StoryNodeResponse(
+                id=uuid4(),
+                node_type="choice" if is_choice else "narration",
+                display_order=order,
+                is_start=order == 1,
+                is_end=order == node_count,
+                text="Once upon a time in a small village by the river. " * 6,
+                character=characters[order % len(characters)],
+                choices=[
+                    ChoiceResponse(
+                        id=uuid4(), choice_key=key, text=f"Choice {key}", next_node_id=uuid4()
+                    )
+                    for key in ("A", "B")
+                ]
+                if is_choice
+                else None,
+            )
+        )
+    return StoryDetailResponse(
+        id=uuid4(),
+        slug="benchmark-story",
+        title="Benchmark Story",
+        description="A long story used for benchmarking",
+        language="en",
+        age_range="4-8",
+        region="pan-indian",
+        moral="Measure before optimizing",
+        duration_min=30,
+        cover_image="",
+        available_languages=["en", "hi", "kn"],
+        characters=characters,
+        nodes=nodes,
+        start_node_id=nodes[0].id,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def build_app(story: StoryDetailResponse) -> FastAPI:
+    app = FastAPI()
+    cached_dict = story.model_dump(mode="json")
+    redis_string = json.dumps(cached_dict)
+    cached_bytes = build_cached_response(story)
+    redis_envelope = cached_bytes.to_envelope(gzip_min_bytes=4096)
+
+    @app.get("/dict/redis", response_model=StoryDetailResponse)
+    async def dict_redis():
+        return StoryDetailResponse(**json.loads(redis_string))
+
+    @app.get("/dict/local", response_model=StoryDetailResponse)
+    async def dict_local():
+        return StoryDetailResponse(**cached_dict)
+
+    @app.get("/bytes/redis", response_model=StoryDetailResponse)
+    async def bytes_redis():
+        return CachedResponse.from_envelope(redis_envelope).render()
+
+    @app.get("/bytes/local", response_model=StoryDetailResponse)
+    async def bytes_local():
+        return cached_bytes.render()
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> list[float]:
+    for _ in range(20):  # warm up
+        await client.get(path)
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(path)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    story = build_story(args.nodes)
+    app = build_app(story)
+    body_kb = len(story.model_dump_json()) / 1024
+    print(f"Story detail with {args.nodes} nodes ({body_kb:.0f} KB), {args.requests} hits each\n")
+    print(f"{'path':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {}
+        for path in ("/dict/redis", "/bytes/redis", "/dict/local", "/bytes/local"):
+            timings = sorted(await measure(client, path, args.requests))
+            results[path] = statistics.mean(timings)
+            print(
+                f"{path:<14}{results[path]:>10.3f}{statistics.median(timings):>10.3f}"
+                f"{timings[int(len(timings) * 0.95)]:>10.3f}"
+            )
+
+    print(
+        f"\nspeedup: redis hit {results['/dict/redis'] / results['/bytes/redis']:.1f}x, "
+        f"local hit {results['/dict/local'] / results['/bytes/local']:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Benchmark: assembling an uncached story detail from database rows.
+
+Builds a synthetic story (500 nodes by default) as ORM-shaped rows and
+compares the old get_story assembly - five queries (story, translations,
+characters, nodes, choices) and a per-node scan of the character list
+comparing str(id) - with the current one: story_aggregate_query plus
+story_nodes_query (two round trips) compiled through the story graph, with
+characters looked up by UUID. Database latency is simulated per query with
+--rtt-ms, so the numbers show both the round-trip and the CPU difference.
+
+Usage: python benchmarks/bench_story_detail.py [--nodes 500] [--rtt-ms 1.5] [--runs 50]
+(imports the app, so DATABASE_URL must be set; no connection is made)
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.schemas.story import (
+    CharacterResponse,
+    ChoiceResponse,
+    StoryDetailResponse,
+    StoryNodeResponse,
+)
+from app.services.progress_index import build_progress_index
+from app.services.story_graph import compile_loaded_story, localized
+
+LANGUAGES = ("en", "hi", "kn")
+
+
+def build_rows(node_count: int, character_count: int = 8):
+    now = datetime.now(timezone.utc)
+    story = SimpleNamespace(
+        id=uuid4(),
+        slug="benchmark-story",
+        age_range="4-8",
+        region="pan-indian",
+        moral="Measure before optimizing",
+        duration_min=30,
+        cover_image="",
+        progress_index=None,
+        created_at=now,
+        updated_at=now,
+    )
+    story.translations = [
+        SimpleNamespace(language_code=lang, title=f"Story {lang}", description="")
+        for lang in LANGUAGES
+    ]
+    story.characters = [
+        SimpleNamespace(
+            id=uuid4(),
+            slug=f"character-{i}",
+            name=f"Character {i}",
+            name_translations={lang: f"Character {i} ({lang})" for lang in LANGUAGES},
+            voice_profile="warm",
+            bulbul_speaker="shubh",
+            avatar_url=None,
+        )
+        for i in range(character_count)
+    ]
+
+    nodes = [
+        SimpleNamespace(
+            id=uuid4(),
+            story_id=story.id,
+            node_type="choice" if order % 5 == 0 else "narration",
+            display_order=order,
+            is_start=order == 1,
+            is_end=order == node_count,
+            text_content={lang: f"Node {order} text in {lang}. " * 6 for lang in LANGUAGES},
+            # The last characters speak most, the worst case for a linear scan
+            character_id=story.characters[-1 - order % 3].id,
+            choices=[],
+        )
+        for order in range(1, node_count + 1)
+    ]
+    for index, node in enumerate(nodes):
+        if node.node_type == "choice":
+            node.choices = [
+                SimpleNamespace(
+                    id=uuid4(),
+                    node_id=node.id,
+                    choice_key=key,
+                    text_content={lang: f"Choice {key} ({lang})" for lang in LANGUAGES},
+                    next_node_id=nodes[min(index + offset, node_count - 1)].id,
+                )
+                for offset, key in ((1, "A"), (2, "B"))
+            ]
+    # Published stories carry their progress index (see seed_stories.py)
+    story.progress_index = build_progress_index(nodes, [c for n in nodes for c in n.choices])
+    return story, nodes
+
+
+class LatencyDB:
+    """Hands back prepared rows after a simulated round trip"""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.round_trips = 0
+
+    async def fetch(self, rows):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt)
+        return rows
+
+
+async def legacy_detail(db: LatencyDB, story, nodes, language: str) -> StoryDetailResponse:
+    story = await db.fetch(story)
+    translations = await db.fetch(story.translations)
+    translation = next(t for t in translations if t.language_code == language)
+    char_rows = await db.fetch(story.characters)
+    characters = [
+        CharacterResponse(
+            id=char.id,
+            slug=char.slug,
+            name=char.name_translations.get(language, char.name),
+            voice_profile=char.voice_profile,
+            bulbul_speaker=char.bulbul_speaker,
+            avatar_url=char.avatar_url,
+        )
+        for char in char_rows
+    ]
+    node_rows = await db.fetch(nodes)
+    choices_by_node = {}
+    for choice in await db.fetch([c for n in node_rows for c in n.choices]):
+        choices_by_node.setdefault(choice.node_id, []).append(choice)
+
+    responses = []
+    for node in sorted(node_rows, key=lambda x: x.display_order):
+        character = None
+        if node.character_id:
+            for char in characters:
+                if str(char.id) == str(node.character_id):
+                    character = char
+                    break
+        choices = None
+        if node.node_type == "choice" and choices_by_node.get(node.id):
+            choices = [
+                ChoiceResponse(
+                    id=choice.id,
+                    choice_key=choice.choice_key,
+                    text=localized(choice.text_content, language),
+                    next_node_id=choice.next_node_id,
+                )
+                for choice in choices_by_node[node.id]
+            ]
+        responses.append(
+            StoryNodeResponse(
+                id=node.id,
+                node_type=node.node_type,
+                display_order=node.display_order,
+                is_start=node.is_start,
+                is_end=node.is_end,
+                text=localized(node.text_content, language),
+                character=character,
+                choices=choices,
+            )
+        )
+    return detail_response(story, translation, language, characters, responses)
+
+
+async def current_detail(db: LatencyDB, story, nodes, language: str) -> StoryDetailResponse:
+    story = await db.fetch(story)
+    translation = next(t for t in story.translations if t.language_code == language)
+    node_rows = await db.fetch(nodes)
+    graph = compile_loaded_story(story, node_rows)
+    characters = [c.response(language) for c in graph.characters.values()]
+    responses = [graph.node_response(node, language) for node in graph.nodes.values()]
+    return detail_response(story, translation, language, characters, responses)
+
+
+def detail_response(story, translation, language, characters, nodes) -> StoryDetailResponse:
+    return StoryDetailResponse(
+        id=story.id,
+        slug=story.slug,
+        title=translation.title,
+        description=translation.description,
+        language=language,
+        age_range=story.age_range,
+        region=story.region,
+        moral=story.moral,
+        duration_min=story.duration_min,
+        cover_image=story.cover_image,
+        available_languages=list(LANGUAGES),
+        characters=characters,
+        nodes=nodes,
+        start_node_id=nodes[0].id,
+        created_at=story.created_at,
+        updated_at=story.updated_at,
+    )
+
+
+async def measure(builder, story, nodes, rtt: float, runs: int):
+    db = LatencyDB(rtt)
+    await builder(db, story, nodes, "hi")  # warm up
+    timings = []
+    for _ in range(runs):
+        db.round_trips = 0
+        gc.collect()  # keep collector pauses out of the timed window
+        start = time.perf_counter()
+        await builder(db, story, nodes, "hi")
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings), db.round_trips
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=1.5)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    story, nodes = build_rows(args.nodes)
+    print(
+        f"Story detail with {args.nodes} nodes, {len(story.characters)} characters, "
+        f"{args.rtt_ms} ms per round trip, {args.runs} runs\n"
+    )
+    print(f"{'assembly':<10}{'queries':>9}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    results = {}
+    for name, builder in (("legacy", legacy_detail), ("current", current_detail)):
+        timings, round_trips = await measure(
+            builder, story, nodes, args.rtt_ms / 1000, args.runs
+        )
+        results[name] = statistics.mean(timings)
+        print(
+            f"{name:<10}{round_trips:>9}{results[name]:>10.3f}"
+            f"{statistics.median(timings):>10.3f}{timings[int(len(timings) * 0.95)]:>10.3f}"
+        )
+
+    print(f"\nspeedup: {results['legacy'] / results['current']:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call httpx.AsyncClient vs the shared pooled client.
+
+Starts a local stub of the Sarvam text-to-speech endpoint and measures
+requests/sec for BulbulService-style calls made both ways.
+
+Usage: python benchmarks/bench_tts_client.py [--requests 500] [--concurrency 10]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import bulbul_service as bulbul_module
+from app.services.bulbul_service import BulbulService
+from app.services.http_client import close_http_client
+
+STUB_AUDIO = base64.b64encode(b"RIFF" + b"\x00" * 2048).decode()
+STUB_BODY = json.dumps({"audios": [STUB_AUDIO]}).encode()
+
+
+async def handle_stub_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Minimal HTTP/1.1 keep-alive server answering every POST with fake audio"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            content_length = 0
+            keep_alive = True
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b""):
+                    break
+                name, _, value = header.decode().partition(":")
+                if name.lower() == "content-length":
+                    content_length = int(value.strip())
+                elif name.lower() == "connection" and value.strip().lower() == "close":
+                    keep_alive = False
+            if content_length:
+                await reader.readexactly(content_length)
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                + f"Content-Length: {len(STUB_BODY)}\r\n\r\n".encode()
+                + STUB_BODY
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionResetError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run_load(call, total: int, concurrency: int) -> float:
+    """Run `total` calls with bounded concurrency; returns requests/sec"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(total: int, concurrency: int):
+    server = await asyncio.start_server(handle_stub_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    service = BulbulService()
+    service.api_key = "bench"
+    service.base_url = base_url
+    payload = {"text": "Once upon a time", "target_language_code": "en-IN"}
+
+    async def per_call_client():
+        # Previous behaviour: a fresh client (and connection) for every call
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{base_url}/text-to-speech", json=payload, timeout=60.0
+            )
+            response.raise_for_status()
+            base64.b64decode(response.json()["audios"][0])
+
+    async def shared_client():
+        await service.synthesize("Once upon a time", "en", add_pauses=False)
+
+    # Silence per-call logging from the service during the run
+    bulbul_module.print = lambda *args, **kwargs: None
+
+    async with server:
+        await run_load(shared_client, min(50, total), concurrency)  # warm-up
+        per_call_rps = await run_load(per_call_client, total, concurrency)
+        shared_rps = await run_load(shared_client, total, concurrency)
+
+    await close_http_client()
+
+    print(f"Requests: {total}, concurrency: {concurrency}")
+    print(f"  per-call AsyncClient : {per_call_rps:8.1f} req/s")
+    print(f"  shared pooled client : {shared_rps:8.1f} req/s")
+    print(f"  speed-up             : {shared_rps / per_call_rps:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pydub vs the byte-level WAV helpers in app.utils.wav.
+
+Times what the audio pipeline does to every Bulbul response: appending
+trailing silence to the segment.
+
+Usage: python benchmarks/bench_wav.py [--seconds 6] [--rounds 20]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import wave
+
+from pydub import AudioSegment
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.wav import append_silence
+
+SAMPLE_RATE = 44100  # speech_sample_rate requested from Bulbul
+SILENCE_MS = 800
+
+
+def make_segment(seconds: float) -> bytes:
+    frames = int(SAMPLE_RATE * seconds)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(os.urandom(frames * 2))
+    return buffer.getvalue()
+
+
+def pydub_append_silence(wav_bytes: bytes) -> bytes:
+    audio = AudioSegment.from_wav(io.BytesIO(wav_bytes))
+    audio += AudioSegment.silent(duration=SILENCE_MS, frame_rate=SAMPLE_RATE)
+    buffer = io.BytesIO()
+    audio.export(buffer, format="wav")
+    return buffer.getvalue()
+
+
+def bench(label: str, fn, rounds: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    per_call_ms = (time.perf_counter() - start) / rounds * 1000
+    print(f"  {label:<10} {per_call_ms:9.2f} ms/op")
+    return per_call_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    segment = make_segment(args.seconds)
+    print(f"{args.seconds:.1f}s mono 16-bit @ {SAMPLE_RATE} Hz, {args.rounds} rounds\n")
+
+    print(f"Append {SILENCE_MS} ms silence:")
+    slow = bench("pydub", lambda: pydub_append_silence(segment), args.rounds)
+    fast = bench("wav", lambda: append_silence(segment, SILENCE_MS), args.rounds)
+    print(f"  speedup    {slow / fast:9.1f}x")
+
+    # Both paths must produce identical sample data
+    with wave.open(io.BytesIO(pydub_append_silence(segment)), "rb") as expected, wave.open(
+        io.BytesIO(append_silence(segment, SILENCE_MS)), "rb"
+    ) as actual:
+        assert expected.readframes(expected.getnframes()) == actual.readframes(
+            actual.getnframes()
+        ), "sample data differs"
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Run this to fix mismatched voice/character issues.
 """
 
 import asyncio
+import hashlib
 import sys
 import os
 
@@ -18,6 +19,8 @@ from app.models.story import StoryNode, Story, Character
 from app.services.bulbul_service import BulbulService
 from app.services.r2_service import R2Service
 from app.services.cache_service import CacheService
+from app.services.http_client import close_http_client
+from app.utils.wav import wav_duration_sec
 from app.config import get_settings
 
 settings = get_settings()
@@ -54,16 +57,13 @@ async def clear_story_audio(story_slug: str = None):
             await db.commit()
             print(f"Deleted {result.rowcount} audio files from database")
 
-        # Clear Redis audio cache keys
+        # Clear Redis audio cache keys; deletes go through CacheService so
+        # workers' local tiers drop them too
         try:
-            import redis.asyncio as aioredis
-
-            r = aioredis.from_url("redis://localhost:6379")
-            keys = await r.keys("audio:*")
-            if keys:
-                await r.delete(*keys)
+            r = await cache_service.connect()
+            keys = [key async for key in r.scan_iter(match="audio:*")]
+            await cache_service.delete(*keys)
             print(f"Cleared {len(keys)} Redis audio cache keys")
-            await r.aclose()
         except Exception as e:
             print(f"Warning: Could not clear Redis cache: {e}")
 
@@ -147,19 +147,29 @@ async def regenerate_story_audio(story_slug: str, language: str = "en"):
                     continue
 
                 # Save to database
+                checksum = hashlib.sha256(audio_bytes).hexdigest()
+                duration_sec = wav_duration_sec(audio_bytes)
                 audio_file = AudioFile(
                     node_id=node.id,
                     language_code=language,
                     speaker_id=speaker,
                     r2_url=audio_url,
+                    duration_sec=duration_sec,
                     file_size=len(audio_bytes),
+                    checksum=checksum,
                 )
                 db.add(audio_file)
                 await db.flush()
 
                 # Cache
                 await cache_service.set_audio_url(
-                    str(node.id), language, speaker, audio_url
+                    str(node.id),
+                    language,
+                    speaker,
+                    audio_url,
+                    checksum=checksum,
+                    duration_sec=duration_sec,
+                    file_size=len(audio_bytes),
                 )
                 print(f"    ✓ Generated and saved")
             else:
@@ -180,12 +190,16 @@ async def main():
     parser.add_argument("--language", default="en", help="Language code (en, hi, kn)")
     args = parser.parse_args()
 
-    print(f"Clearing audio for {args.story}...")
-    await clear_story_audio(args.story)
+    try:
+        print(f"Clearing audio for {args.story}...")
+        await clear_story_audio(args.story)
 
-    if not args.clear_only:
-        print(f"\nRegenerating audio for {args.story}...")
-        await regenerate_story_audio(args.story, args.language)
+        if not args.clear_only:
+            print(f"\nRegenerating audio for {args.story}...")
+            await regenerate_story_audio(args.story, args.language)
+    finally:
+        await cache_service.close()
+        await close_http_client()
 
     print("\nDone!")
 
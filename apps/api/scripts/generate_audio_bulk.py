@@ -5,6 +5,7 @@ Generates audio for all stories, all languages, and all speakers
 """
 
 import asyncio
+import hashlib
 import os
 import sys
 from sqlalchemy import select
@@ -19,6 +20,8 @@ from app.models.audio import AudioFile
 from app.services.bulbul_service import BulbulService
 from app.services.r2_service import R2Service
 from app.services.cache_service import CacheService
+from app.services.http_client import close_http_client
+from app.utils.wav import wav_duration_sec
 
 
 class BulkAudioGenerator:
@@ -118,19 +121,29 @@ class BulkAudioGenerator:
                             continue
 
                         # Save to database
+                        checksum = hashlib.sha256(audio_bytes).hexdigest()
+                        duration_sec = wav_duration_sec(audio_bytes)
                         new_audio = AudioFile(
                             node_id=node.id,
                             language_code=language,
                             speaker_id=speaker,
                             r2_url=audio_url,
+                            duration_sec=duration_sec,
                             file_size=len(audio_bytes),
+                            checksum=checksum,
                         )
                         db.add(new_audio)
                         await db.flush()
 
                         # Cache
                         await self.cache_service.set_audio_url(
-                            str(node.id), language, speaker, audio_url
+                            str(node.id),
+                            language,
+                            speaker,
+                            audio_url,
+                            checksum=checksum,
+                            duration_sec=duration_sec,
+                            file_size=len(audio_bytes),
                         )
 
                         print(f"✓ ({len(audio_bytes)} bytes)")
@@ -175,9 +188,12 @@ async def main():
         print("⚠️  R2 credentials not configured - audio will not be uploaded to CDN")
         print("Continuing anyway (URLs will be placeholders)...\n")
 
-    async with AsyncSessionLocal() as db:
-        generator = BulkAudioGenerator()
-        generated, skipped, failed = await generator.generate_all_audio(db)
+    try:
+        async with AsyncSessionLocal() as db:
+            generator = BulkAudioGenerator()
+            generated, skipped, failed = await generator.generate_all_audio(db)
+    finally:
+        await close_http_client()
 
     if failed > 0:
         sys.exit(1)
@@ -2,7 +2,6 @@
 """Regenerate all audio for a story with all speakers"""
 
 import asyncio
-import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy import select, delete
 import sys
@@ -13,6 +12,8 @@ from app.config import get_settings
 from app.models.audio import AudioFile
 from app.models.story import StoryNode
 from app.services.bulbul_service import BulbulService
+from app.services.cache_service import CacheService
+from app.services.http_client import close_http_client
 
 SPEAKERS = [
     "ajji",
@@ -30,7 +31,8 @@ LANGUAGES = ["en", "hi", "kn"]
 async def regenerate_all_audio(story_id: str):
     settings = get_settings()
 
-    redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+    # Deletes go through CacheService so workers' local tiers drop them too
+    cache_service = CacheService()
     engine = create_async_engine(
         settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
     )
@@ -56,7 +58,7 @@ async def regenerate_all_audio(story_id: str):
                 for speaker in SPEAKERS:
                     # Clear Redis (key format must match cache_service: node:lang:speaker:code_mix)
                     key = f"audio:{node.id}:{lang}:{speaker}:0.00"
-                    await redis_client.delete(key)
+                    await cache_service.delete(key)
 
                     # Get text
                     text = node.text_content.get(lang, node.text_content.get("en", ""))
@@ -72,8 +74,9 @@ async def regenerate_all_audio(story_id: str):
                     else:
                         print(f"  ✗ Failed for {node.id[:8]}")
 
-    await redis_client.aclose()
+    await cache_service.close()
     await engine.dispose()
+    await close_http_client()
     print(f"\n✅ Generated {count} audio files")
 
 
@@ -14,6 +14,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import AsyncSessionLocal, engine
 from app.models import Base, Story, StoryTranslation, Character, StoryNode, StoryChoice
+from app.services.progress_index import build_progress_index
+from app.services.story_catalog import refresh_story_catalog
+from app.services.story_publish import publish_story
 
 
 async def seed_database():
@@ -26,6 +29,7 @@ async def seed_database():
             stories_dir / "story_clever_crow.json",
             stories_dir / "story_punyakoti.json"
         ]
+        seeded_slugs = []
         
         for story_file in story_files:
             if not story_file.exists():
@@ -105,6 +109,7 @@ async def seed_database():
                 nodes[node_data["display_order"]] = node
             
             # Add choices
+            choices = []
             for node_data in data["nodes"]:
                 if node_data.get("choices"):
                     current_node = nodes[node_data["display_order"]]
@@ -117,10 +122,21 @@ async def seed_database():
                             next_node_id=next_node.id if next_node else None
                         )
                         db.add(choice)
+                        choices.append(choice)
+
+            # Completion / path-depth index used by progress updates
+            story.progress_index = build_progress_index(nodes.values(), choices)
+            seeded_slugs.append(data["slug"])
             
             print(f"✅ Story '{data['slug']}' added successfully!")
         
+        # Listing reads the catalog summary, so rebuild it from what's now stored
+        await db.flush()
+        await refresh_story_catalog(db)
         await db.commit()
+        # Render each language's detail snapshot and rewarm the API caches
+        for slug in seeded_slugs:
+            await publish_story(db, slug)
         print("🎉 All stories seeded successfully!")
 
 
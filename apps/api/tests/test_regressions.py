@@ -1,5 +1,8 @@
+import asyncio
+import io
 import json
 import unittest
+import wave
 from datetime import datetime, timezone
 from decimal import Decimal
 from types import SimpleNamespace
@@ -8,6 +11,7 @@ from unittest.mock import AsyncMock, patch
 
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
 
 from app.routers import audio as audio_router
@@ -15,7 +19,17 @@ from app.routers import choices as choices_router
 from app.routers import stories as stories_router
 from app.routers import users as users_router
 from app.database import build_pooler_connect_args, normalize_database_url
-from app.schemas.story import MakeChoiceRequest
+from app.services.response_cache import CachedResponse, body_etag
+from app.services import progress_buffer
+from app.services.db_circuit import OPEN, CircuitBreaker
+from app.services.fallback_catalog import build_fallback_index
+from app.services.progress_index import build_progress_index
+from app.services.story_graph import compile_story_graph
+from app.services.story_snapshot import publish_story_snapshots, snapshot_version
+from app.services.http_client import close_http_client, get_http_client
+from app.services.audio_encoder import AudioEncodingError, EncoderUnavailable, encode_mp3_stream
+from app.services.audio_jobs import AudioJob, AudioJobWorker, InMemoryJobQueue, JobDeferred
+from app.schemas.story import MakeChoiceRequest, StoryDetailResponse, StoryListResponse
 
 
 class FakeScalars:
@@ -35,15 +49,24 @@ class FakeResult:
     def scalar_one_or_none(self):
         return self._scalar
 
+    def scalar_one(self):
+        return self._scalar
+
     def scalar(self):
         return self._scalar
 
     def scalars(self):
         return FakeScalars(self._scalars)
 
+    def unique(self):
+        return self
+
     def all(self):
         return list(self._rows)
 
+    def first(self):
+        return self._rows[0] if self._rows else None
+
 
 class FakeDB:
     def __init__(self, results):
@@ -51,8 +74,11 @@ class FakeDB:
         self._index = 0
         self.flush = AsyncMock()
         self.rollback = AsyncMock()
+        self.bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+        self.statements = []
 
-    async def execute(self, *args, **kwargs):
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
         result = self._results[self._index]
         self._index += 1
         return result
@@ -60,84 +86,121 @@ class FakeDB:
     def add(self, _obj):
         return None
 
+    def add_all(self, objs):
+        self.added = list(objs)
+
 
 def fake_db(results):
     return FakeDB(results)
 
 
+def computed(value=None):
+    """Stand-in for CacheService.get_or_compute: a hit on value, else compute()"""
+
+    async def get_or_compute(key, compute, *args, **kwargs):
+        return value if value is not None else await compute()
+
+    return AsyncMock(side_effect=get_or_compute)
+
+
+def catalog_entry(**fields):
+    entry = dict(
+        story_id=uuid4(),
+        age_range="4-8",
+        age_min=4,
+        age_max=8,
+        region="pan-indian",
+        moral=None,
+        duration_min=3,
+        cover_image="",
+        character_count=0,
+        choice_count=0,
+        created_at=datetime.now(timezone.utc),
+    )
+    entry.update(fields)
+    return SimpleNamespace(**entry)
+
+
+def unpublished(story):
+    """snapshot_query row for a story without a current snapshot"""
+    return SimpleNamespace(
+        id=story.id, updated_at=story.updated_at, snapshot_version=None, snapshot=None
+    )
+
+
+def fallback_catalog(stories):
+    index = build_fallback_index(stories)
+    return SimpleNamespace(index=lambda: index)
+
+
+# Query() defaults don't apply when calling list_stories directly
+LIST_DEFAULTS = dict(region=None, available_language=None, sort="newest", limit=20, cursor=None)
+
+
+def wav_bytes(frames: int, sample_rate: int = 44100) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x01\x00" * frames)
+    return buffer.getvalue()
+
+
+async def fake_mp3_encoder(pcm_chunks, pcm_format):
+    async for _ in pcm_chunks:
+        yield b"mp3"
+
+
 class StoriesRegressionTests(unittest.IsolatedAsyncioTestCase):
     async def test_list_stories_falls_back_to_english_translation(self):
-        story = SimpleNamespace(
-            id=uuid4(),
+        entry = catalog_entry(
             slug="story-one",
-            age_range="4-8",
-            region="pan-indian",
-            moral="Be kind",
-            duration_min=3,
-            cover_image="",
-            created_at=datetime.now(timezone.utc),
-        )
-        en_translation = SimpleNamespace(
-            story_id=story.id,
-            language_code="en",
-            title="Story One",
-            description="English fallback",
-            is_complete=True,
-        )
-        db = fake_db(
-            [
-                FakeResult(rows=[(story, 2, 1)]),
-                FakeResult(scalars=[en_translation]),
-            ]
+            translations={
+                "en": {"title": "Story One", "description": "English fallback", "is_complete": True},
+                "kn": {"title": "ಕಥೆ", "description": "", "is_complete": True},
+            },
+            character_count=2,
+            choice_count=1,
         )
+        db = fake_db([FakeResult(scalars=[entry])])
 
         with patch.object(
-            stories_router.cache_service, "get", new=AsyncMock(return_value=None)
-        ), patch.object(stories_router.cache_service, "set", new=AsyncMock()):
+            stories_router.cache_service, "get_or_compute", new=computed()
+        ):
             response = await stories_router.list_stories(
                 language="hi",
                 age_range=None,
                 db=db,
+                **LIST_DEFAULTS,
             )
 
+        response = StoryListResponse.model_validate_json(response.body)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0].title, "Story One")
         self.assertEqual(response.data[0].language, "en")
+        self.assertEqual(response.data[0].character_count, 2)
+        # Listing is a single catalog query
+        self.assertEqual(len(db.statements), 1)
 
     async def test_list_stories_falls_back_to_any_available_translation(self):
-        story = SimpleNamespace(
-            id=uuid4(),
+        entry = catalog_entry(
             slug="story-kn",
-            age_range="5-8",
-            region="south-india",
-            moral="Be truthful",
-            duration_min=5,
-            cover_image="",
-            created_at=datetime.now(timezone.utc),
-        )
-        kn_translation = SimpleNamespace(
-            story_id=story.id,
-            language_code="kn",
-            title="ಕಥೆ",
-            description="Kannada only",
-            is_complete=True,
-        )
-        db = fake_db(
-            [
-                FakeResult(rows=[(story, 1, 0)]),
-                FakeResult(scalars=[kn_translation]),
-            ]
+            translations={"kn": {"title": "ಕಥೆ", "description": "Kannada only", "is_complete": True}},
         )
+        db = fake_db([FakeResult(scalars=[entry])])
 
         with patch.object(
-            stories_router.cache_service, "get", new=AsyncMock(return_value=None)
-        ), patch.object(stories_router.cache_service, "set", new=AsyncMock()):
+            stories_router.cache_service, "get_or_compute", new=computed()
+        ):
             response = await stories_router.list_stories(
                 language="hi",
                 age_range=None,
                 db=db,
+                **LIST_DEFAULTS,
             )
 
+        response = StoryListResponse.model_validate_json(response.body)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0].title, "ಕಥೆ")
         self.assertEqual(response.data[0].language, "kn")
@@ -146,6 +209,7 @@ class StoriesRegressionTests(unittest.IsolatedAsyncioTestCase):
         story = SimpleNamespace(
             id=uuid4(),
             slug="story-two",
+            progress_index=None,
             age_range="7-10",
             region="pan-indian",
             moral="Stay honest",
@@ -160,6 +224,17 @@ class StoriesRegressionTests(unittest.IsolatedAsyncioTestCase):
             title="Story Two",
             description="Fallback description",
         )
+        crow = SimpleNamespace(
+            id=uuid4(),
+            slug="crow",
+            name="Crow",
+            name_translations={"hi": "कौआ"},
+            voice_profile="wise",
+            bulbul_speaker="meera",
+            avatar_url=None,
+        )
+        story.translations = [en_translation]
+        story.characters = [crow]
         first_node = SimpleNamespace(
             id=uuid4(),
             node_type="narration",
@@ -167,7 +242,8 @@ class StoriesRegressionTests(unittest.IsolatedAsyncioTestCase):
             is_start=False,
             is_end=False,
             text_content={"en": "First"},
-            character_id=None,
+            character_id=crow.id,
+            choices=[],
         )
         second_node = SimpleNamespace(
             id=uuid4(),
@@ -177,30 +253,35 @@ class StoriesRegressionTests(unittest.IsolatedAsyncioTestCase):
             is_end=True,
             text_content={"en": "Second"},
             character_id=None,
+            choices=[],
         )
         db = fake_db(
             [
+                FakeResult(rows=[unpublished(story)]),
                 FakeResult(scalar=story),
-                FakeResult(scalars=[en_translation]),
-                FakeResult(scalars=[]),
                 FakeResult(scalars=[second_node, first_node]),
-                FakeResult(scalars=[]),
             ]
         )
 
         with patch.object(
-            stories_router.cache_service, "get", new=AsyncMock(return_value=None)
-        ), patch.object(stories_router.cache_service, "set", new=AsyncMock()):
-            response = await stories_router.get_story("story-two", language="hi", db=db)
+            stories_router.cache_service, "get_or_compute", new=computed()
+        ):
+            response = await stories_router.get_story("story-two", language="hi", if_none_match=None, db=db)
 
+        response = StoryDetailResponse.model_validate_json(response.body)
         self.assertEqual(response.language, "en")
         self.assertEqual(response.start_node_id, first_node.id)
         self.assertEqual(response.nodes[0].id, first_node.id)
+        self.assertEqual(response.nodes[0].character.id, crow.id)
+        self.assertEqual(response.nodes[0].character.name, "Crow")
+        self.assertIsNone(response.nodes[1].character)
+        self.assertEqual(len(db.statements), 3)
 
     async def test_get_story_falls_back_to_non_english_translation(self):
         story = SimpleNamespace(
             id=uuid4(),
             slug="story-three",
+            progress_index=None,
             age_range="7-10",
             region="pan-indian",
             moral="Stay honest",
@@ -215,6 +296,8 @@ class StoriesRegressionTests(unittest.IsolatedAsyncioTestCase):
             title="ಮೂರು",
             description="Kannada fallback",
         )
+        story.translations = [kn_translation]
+        story.characters = []
         node = SimpleNamespace(
             id=uuid4(),
             node_type="narration",
@@ -223,25 +306,122 @@ class StoriesRegressionTests(unittest.IsolatedAsyncioTestCase):
             is_end=False,
             text_content={"kn": "ಪಾಠ", "en": "lesson"},
             character_id=None,
+            choices=[],
         )
         db = fake_db(
             [
+                FakeResult(rows=[unpublished(story)]),
                 FakeResult(scalar=story),
-                FakeResult(scalars=[kn_translation]),
-                FakeResult(scalars=[]),
                 FakeResult(scalars=[node]),
-                FakeResult(scalars=[]),
             ]
         )
 
         with patch.object(
-            stories_router.cache_service, "get", new=AsyncMock(return_value=None)
-        ), patch.object(stories_router.cache_service, "set", new=AsyncMock()):
-            response = await stories_router.get_story("story-three", language="hi", db=db)
+            stories_router.cache_service, "get_or_compute", new=computed()
+        ):
+            response = await stories_router.get_story("story-three", language="hi", if_none_match=None, db=db)
 
+        response = StoryDetailResponse.model_validate_json(response.body)
         self.assertEqual(response.language, "kn")
         self.assertEqual(response.title, "ಮೂರು")
 
+    async def test_get_story_serves_published_snapshot_in_one_query(self):
+        now = datetime.now(timezone.utc)
+        story = SimpleNamespace(
+            id=uuid4(),
+            slug="story-five",
+            progress_index=None,
+            age_range="4-8",
+            region="pan-indian",
+            moral=None,
+            duration_min=2,
+            cover_image="",
+            created_at=now,
+            updated_at=now,
+            characters=[],
+        )
+        story.translations = [
+            SimpleNamespace(language_code=lang, title=f"Five {lang}", description="", content_json={})
+            for lang in ("en", "hi")
+        ]
+        node = SimpleNamespace(
+            id=uuid4(),
+            node_type="narration",
+            display_order=1,
+            is_start=True,
+            is_end=True,
+            text_content={"en": "Once", "hi": "एक बार"},
+            character_id=None,
+            choices=[],
+        )
+
+        version = await publish_story_snapshots(
+            fake_db([FakeResult(scalar=story), FakeResult(scalars=[node])]), "story-five"
+        )
+        document = story.translations[1].content_json
+        self.assertEqual(document["version"], version)
+        self.assertEqual(document["detail"]["nodes"][0]["text"], "एक बार")
+
+        row = SimpleNamespace(
+            id=story.id,
+            updated_at=story.updated_at,
+            snapshot_version=document["version"],
+            snapshot=json.dumps(document["detail"]),
+        )
+        db = fake_db([FakeResult(rows=[row])])
+        with patch.object(
+            stories_router.cache_service, "get_or_compute", new=computed()
+        ):
+            response = await stories_router.get_story(
+                "story-five", language="hi", if_none_match=None, db=db
+            )
+
+        self.assertEqual(len(db.statements), 1)
+        self.assertEqual(response.body, row.snapshot.encode())
+        self.assertEqual(
+            response.headers["etag"],
+            stories_router.story_detail_etag(story.id, story.updated_at, "hi"),
+        )
+        detail = StoryDetailResponse.model_validate_json(response.body)
+        self.assertEqual((detail.language, detail.available_languages), ("hi", ["en", "hi"]))
+
+    async def test_get_story_cache_hit_returns_stored_bytes_without_db(self):
+        body = b'{"slug":"story-one"}'
+        cached = CachedResponse(body=body, etag=body_etag(body))
+
+        with patch.object(
+            stories_router.cache_service, "get_or_compute", new=computed(cached)
+        ):
+            response = await stories_router.get_story("story-one", language="en", if_none_match=None, db=None)
+
+        self.assertEqual(response.body, body)
+        self.assertEqual(response.headers["etag"], cached.etag)
+
+    async def test_get_story_revalidates_from_snapshot_query_only(self):
+        story_id = uuid4()
+        updated_at = datetime(2026, 1, 2, tzinfo=timezone.utc)
+        etag = stories_router.story_detail_etag(story_id, updated_at, "hi")
+        row = SimpleNamespace(
+            id=story_id,
+            updated_at=updated_at,
+            snapshot_version=snapshot_version(story_id, updated_at),
+            snapshot='{"slug":"story-one"}',
+        )
+        # Only the snapshot query is answered; loading nodes would exhaust FakeDB.
+        db = fake_db([FakeResult(rows=[row])])
+
+        with patch.object(
+            stories_router.cache_service, "get_or_compute", new=computed()
+        ):
+            response = await stories_router.get_story(
+                "story-one", language="hi", if_none_match=f"W/{etag}", db=db
+            )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["etag"], etag)
+        self.assertIn("max-age", response.headers["cache-control"])
+        self.assertNotEqual(etag, stories_router.story_detail_etag(story_id, updated_at, "en"))
+
     async def test_list_stories_uses_fallback_when_database_unavailable(self):
         class FailingDB:
             async def execute(self, *args, **kwargs):
@@ -261,22 +441,98 @@ class StoriesRegressionTests(unittest.IsolatedAsyncioTestCase):
             "nodes": [],
         }
 
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, probe=None)
         with patch.object(
-            stories_router.cache_service, "get", new=AsyncMock(return_value=None)
+            stories_router.cache_service, "get_or_compute", new=computed()
         ), patch.object(
-            stories_router.cache_service, "set", new=AsyncMock()
-        ), patch.object(
-            stories_router, "load_fallback_stories", return_value=[fallback_story]
-        ):
+            stories_router, "get_fallback_catalog", return_value=fallback_catalog([fallback_story])
+        ), patch.object(stories_router, "get_db_breaker", return_value=breaker):
             response = await stories_router.list_stories(
                 language="kn",
                 age_range=None,
                 db=FailingDB(),
+                **LIST_DEFAULTS,
             )
+            self.assertEqual(breaker.state, OPEN)
 
+            # With the circuit open the database isn't tried at all
+            untouched = fake_db([])
+            again = await stories_router.list_stories(
+                language="kn", age_range=None, db=untouched, **LIST_DEFAULTS
+            )
+
+        response = StoryListResponse.model_validate_json(response.body)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0].slug, "fallback-story")
         self.assertEqual(response.data[0].title, "ಕಥೆ")
+        self.assertEqual(StoryListResponse.model_validate_json(again.body).data, response.data)
+        self.assertEqual(untouched.statements, [])
+        self.assertEqual(breaker.short_circuited, 1)
+
+    async def test_list_stories_pages_with_keyset_cursor(self):
+        entries = [
+            catalog_entry(
+                slug=f"story-{index}",
+                duration_min=index,
+                translations={"en": {"title": f"story-{index}", "is_complete": True}},
+            )
+            for index in range(3)
+        ]
+        # limit=2 fetches one lookahead row
+        db = fake_db([FakeResult(scalars=entries)])
+
+        with patch.object(
+            stories_router.cache_service, "get_or_compute", new=computed()
+        ) as cache_get:
+            response = await stories_router.list_stories(
+                language="en",
+                age_range="5-6",
+                db=db,
+                **{**LIST_DEFAULTS, "sort": "shortest", "limit": 2, "available_language": "en"},
+            )
+
+        page = StoryListResponse.model_validate_json(response.body)
+        self.assertEqual([story.slug for story in page.data], ["story-0", "story-1"])
+        self.assertTrue(page.pagination["has_next"])
+        cursor = stories_router.StoryCursor.decode(
+            page.pagination["next_cursor"], stories_router.STORY_SORTS["shortest"]
+        )
+        self.assertEqual((cursor.value, cursor.id), (1, entries[1].story_id))
+        self.assertIn(":en:shortest:2:first", cache_get.await_args.args[0])
+
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("FROM story_catalog", sql)
+        self.assertIn("story_catalog.age_min <= %(age_min_1)s", sql)
+        self.assertIn("story_catalog.age_max >= %(age_max_1)s", sql)
+        self.assertNotIn("split_part", sql)
+        self.assertIn("available_languages @>", sql)
+        self.assertIn("LIMIT", sql)
+
+    async def test_fallback_list_follows_cursor(self):
+        fallback_stories = [
+            {
+                "slug": slug,
+                "age_range": "4-8",
+                "region": "pan-indian",
+                "translations": {"en": {"title": slug}},
+            }
+            for slug in ("b-story", "a-story", "c-story")
+        ]
+
+        with patch.object(
+            stories_router, "get_fallback_catalog", return_value=fallback_catalog(fallback_stories)
+        ):
+            first = stories_router.build_story_list_from_fallback(
+                "en", None, sort="slug", limit=2
+            )
+            second = stories_router.build_story_list_from_fallback(
+                "en", None, sort="slug", limit=2, cursor=first.pagination["next_cursor"]
+            )
+
+        self.assertEqual([story.slug for story in first.data], ["a-story", "b-story"])
+        self.assertEqual([story.slug for story in second.data], ["c-story"])
+        self.assertFalse(second.pagination["has_next"])
+        self.assertTrue(second.pagination["has_prev"])
 
 
 class DatabaseConfigRegressionTests(unittest.TestCase):
@@ -302,6 +558,19 @@ class DatabaseConfigRegressionTests(unittest.TestCase):
         self.assertTrue(prepared_name.startswith("__asyncpg_stmt_"))
 
 
+class HttpClientRegressionTests(unittest.IsolatedAsyncioTestCase):
+    async def test_shared_client_is_reused_until_closed(self):
+        client = get_http_client()
+        self.assertIs(get_http_client(), client)
+
+        await close_http_client()
+
+        self.assertTrue(client.is_closed)
+        replacement = get_http_client()
+        self.assertIsNot(replacement, client)
+        await close_http_client()
+
+
 class AudioRegressionTests(unittest.IsolatedAsyncioTestCase):
     async def test_get_audio_returns_202_while_generating(self):
         node_id = uuid4()
@@ -319,7 +588,9 @@ class AudioRegressionTests(unittest.IsolatedAsyncioTestCase):
         )
 
         with patch.object(
-            audio_router.cache_service, "get_audio_url", new=AsyncMock(return_value=None)
+            audio_router.cache_service, "get_audio_entry", new=AsyncMock(return_value=None)
+        ), patch.object(
+            audio_router.cache_service, "get_or_compute", new=computed()
         ), patch.object(
             audio_router.cache_service, "set_audio_url", new=AsyncMock()
         ), patch.object(
@@ -330,6 +601,7 @@ class AudioRegressionTests(unittest.IsolatedAsyncioTestCase):
                 language=" HI ",
                 speaker=" Meera ",
                 code_mix=0.0,
+                if_none_match=None,
                 db=db,
             )
 
@@ -353,6 +625,7 @@ class AudioRegressionTests(unittest.IsolatedAsyncioTestCase):
             code_mix_ratio=Decimal("0.00"),
             duration_sec=Decimal("1.25"),
             file_size=4321,
+            checksum=None,
         )
         db = fake_db(
             [
@@ -365,7 +638,11 @@ class AudioRegressionTests(unittest.IsolatedAsyncioTestCase):
         db.flush.side_effect = IntegrityError(None, None, Exception("duplicate"))
 
         with patch.object(
-            audio_router.cache_service, "get_audio_url", new=AsyncMock(return_value=None)
+            audio_router.settings, "audio_generation_mode", "inline"
+        ), patch.object(
+            audio_router.cache_service, "get_audio_entry", new=AsyncMock(return_value=None)
+        ), patch.object(
+            audio_router.cache_service, "get_or_compute", new=computed()
         ), patch.object(
             audio_router.cache_service, "set_audio_url", new=AsyncMock()
         ), patch.object(
@@ -382,6 +659,7 @@ class AudioRegressionTests(unittest.IsolatedAsyncioTestCase):
                 language="EN",
                 speaker="MEERA",
                 code_mix=0.0,
+                if_none_match=None,
                 db=db,
             )
 
@@ -404,7 +682,7 @@ class AudioRegressionTests(unittest.IsolatedAsyncioTestCase):
                 return None
 
         with patch.object(
-            audio_router.cache_service, "get_audio_url", new=AsyncMock(return_value=None)
+            audio_router.cache_service, "get_or_compute", new=computed()
         ):
             with self.assertRaises(HTTPException) as ctx:
                 await audio_router.get_audio(
@@ -412,62 +690,742 @@ class AudioRegressionTests(unittest.IsolatedAsyncioTestCase):
                     language="en",
                     speaker="meera",
                     code_mix=0.0,
+                    if_none_match=None,
                     db=FailingDB(),
                 )
 
         self.assertEqual(ctx.exception.status_code, 503)
 
+    async def test_get_audio_coalesces_concurrent_synthesis(self):
+        node_id = uuid4()
+        node = SimpleNamespace(
+            id=node_id,
+            story_id=uuid4(),
+            text_content={"en": "Hello world"},
+        )
+        leader_db = fake_db(
+            [
+                FakeResult(scalar=None),
+                FakeResult(scalar=node),
+                FakeResult(scalar="story-slug"),
+            ]
+        )
+        follower_db = fake_db(
+            [
+                FakeResult(scalar=None),
+                FakeResult(scalar=node),
+            ]
+        )
+
+        async def slow_synthesize(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return b"audio-bytes"
+
+        synthesize = AsyncMock(side_effect=slow_synthesize)
+        upload = AsyncMock(return_value="https://audio.example.com/new.mp3")
+
+        with patch.object(
+            audio_router.settings, "audio_generation_mode", "inline"
+        ), patch.object(
+            audio_router.cache_service, "get_audio_entry", new=AsyncMock(return_value=None)
+        ), patch.object(
+            audio_router.cache_service, "get_or_compute", new=computed()
+        ), patch.object(
+            audio_router.cache_service, "set_audio_url", new=AsyncMock()
+        ), patch.object(
+            audio_router.cache_service, "acquire_lock", new=AsyncMock(return_value="token")
+        ), patch.object(
+            audio_router.cache_service, "release_lock", new=AsyncMock()
+        ), patch.object(
+            audio_router.bulbul_service, "synthesize", new=synthesize
+        ), patch.object(
+            audio_router.r2_service, "upload_audio", new=upload
+        ):
+            responses = await asyncio.gather(
+                audio_router.get_audio(
+                    node_id=node_id, language="en", speaker="meera", code_mix=0.0, db=leader_db
+                ),
+                audio_router.get_audio(
+                    node_id=node_id, language="en", speaker="meera", code_mix=0.0, db=follower_db
+                ),
+            )
+
+        synthesize.assert_awaited_once()
+        upload.assert_awaited_once()
+        self.assertEqual(
+            [r.audio_url for r in responses],
+            ["https://audio.example.com/new.mp3"] * 2,
+        )
+
+    async def test_get_audio_returns_202_when_other_worker_is_synthesizing(self):
+        node_id = uuid4()
+        node = SimpleNamespace(
+            id=node_id,
+            story_id=uuid4(),
+            text_content={"en": "Hello world"},
+        )
+        db = fake_db([FakeResult(scalar=None), FakeResult(scalar=node)])
+        synthesize = AsyncMock(return_value=b"audio-bytes")
+
+        with patch.object(
+            audio_router.settings, "audio_generation_mode", "inline"
+        ), patch.object(
+            audio_router.cache_service, "get_audio_entry", new=AsyncMock(return_value=None)
+        ), patch.object(
+            audio_router.cache_service, "get_or_compute", new=computed()
+        ), patch.object(
+            audio_router.cache_service, "acquire_lock", new=AsyncMock(return_value=None)
+        ), patch.object(
+            audio_router.bulbul_service, "synthesize", new=synthesize
+        ):
+            response = await audio_router.get_audio(
+                node_id=node_id,
+                language="en",
+                speaker="meera",
+                code_mix=0.0,
+                if_none_match=None,
+                db=db,
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers["retry-after"], "5")
+        synthesize.assert_not_awaited()
+
+    async def test_get_audio_enqueues_one_job_per_variant(self):
+        node_id = uuid4()
+        node = SimpleNamespace(
+            id=node_id,
+            story_id=uuid4(),
+            text_content={"en": "Hello world"},
+        )
+        queue = InMemoryJobQueue()
+        synthesize = AsyncMock(return_value=b"audio-bytes")
+
+        with patch.object(
+            audio_router.settings, "audio_generation_mode", "queue"
+        ), patch.object(audio_router, "audio_job_queue", new=queue), patch.object(
+            audio_router.cache_service, "get_audio_entry", new=AsyncMock(return_value=None)
+        ), patch.object(
+            audio_router.cache_service, "get_or_compute", new=computed()
+        ), patch.object(
+            audio_router.bulbul_service, "synthesize", new=synthesize
+        ):
+            for _ in range(2):
+                response = await audio_router.get_audio(
+                    node_id=node_id,
+                    language="en",
+                    speaker="meera",
+                    code_mix=0.0,
+                    if_none_match=None,
+                    db=fake_db([FakeResult(scalar=None), FakeResult(scalar=node)]),
+                )
+                self.assertEqual(response.status_code, 202)
+
+            status_response = await audio_router.get_audio_job_status(
+                node_id=node_id, language="en", speaker="meera", code_mix=0.0
+            )
+
+        self.assertEqual(queue._queue.qsize(), 1)
+        self.assertEqual(status_response.status, "queued")
+        synthesize.assert_not_awaited()
+
+    async def test_audio_job_worker_records_outcome(self):
+        queue = InMemoryJobQueue()
+        ok_job = AudioJob(str(uuid4()), "en", "meera")
+        bad_job = AudioJob(str(uuid4()), "en", "meera")
+
+        async def handler(job):
+            if job is bad_job:
+                raise HTTPException(status_code=503, detail="Sarvam down")
+
+        worker = AudioJobWorker(queue, handler, concurrency=2)
+        await queue.enqueue(ok_job)
+        await queue.enqueue(bad_job)
+        await worker.start()
+        try:
+            for _ in range(50):
+                states = [
+                    (await queue.get_status(job))["status"] for job in (ok_job, bad_job)
+                ]
+                if set(states) <= {"done", "failed"}:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await worker.stop()
+
+        self.assertEqual((await queue.get_status(ok_job))["status"], "done")
+        failed = await queue.get_status(bad_job)
+        self.assertEqual(failed["status"], "failed")
+        self.assertEqual(failed["detail"], "Sarvam down")
+        self.assertGreater(failed["retry_at"], failed["updated_at"])
+
+    async def test_failed_variant_answers_503_instead_of_reenqueueing(self):
+        node_id = uuid4()
+        node = SimpleNamespace(id=node_id, story_id=uuid4(), text_content={"en": "Hello"})
+        queue = InMemoryJobQueue()
+        job = AudioJob(str(node_id), "en", "meera", "0.00")
+        await queue.set_status(job, "failed", "Sarvam rejected the text", retry_after=60)
+
+        with patch.object(
+            audio_router.settings, "audio_generation_mode", "queue"
+        ), patch.object(audio_router, "audio_job_queue", new=queue), patch.object(
+            audio_router.cache_service, "get_or_compute", new=computed()
+        ):
+            with self.assertRaises(HTTPException) as raised:
+                await audio_router.get_audio(
+                    node_id=node_id,
+                    language="en",
+                    speaker="meera",
+                    code_mix=0.0,
+                    if_none_match=None,
+                    db=fake_db([FakeResult(scalar=None), FakeResult(scalar=node)]),
+                )
+            status_response = await audio_router.get_audio_job_status(
+                node_id=node_id, language="en", speaker="meera", code_mix=0.0
+            )
+
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(raised.exception.headers["Retry-After"], "60")
+        self.assertEqual(queue._queue.qsize(), 0)
+        self.assertEqual((status_response.status, status_response.retry_after), ("failed", 60))
+
+        # Once the backoff is over the variant is generated again
+        (await queue.get_status(job))["retry_at"] = 0
+        self.assertTrue(await queue.enqueue(job))
+
+    async def test_job_waiting_on_another_worker_stays_queued_and_reruns(self):
+        queue = InMemoryJobQueue()
+        job = AudioJob(str(uuid4()), "en", "meera")
+        runs = []
+
+        async def handler(job):
+            runs.append(job)
+            if len(runs) == 1:
+                raise JobDeferred(0.01, "Generating in another worker")
+
+        worker = AudioJobWorker(queue, handler)
+        await queue.enqueue(job)
+        await worker.process(await queue.dequeue(timeout=0.1))
+
+        deferred = await queue.get_status(job)
+        self.assertEqual(deferred["status"], "queued")
+        self.assertFalse(await queue.enqueue(job))
+
+        await worker.process(await queue.dequeue(timeout=1.0))
+        self.assertEqual(len(runs), 2)
+        self.assertEqual((await queue.get_status(job))["status"], "done")
+
+
+class AudioConditionalRequestTests(unittest.IsolatedAsyncioTestCase):
+    async def get_stored_audio(self, if_none_match):
+        node_id = uuid4()
+        entry = {"url": "https://audio.example.com/a.mp3", "checksum": "abc123"}
+        with patch.object(
+            audio_router.cache_service, "get_or_compute", new=computed(entry)
+        ):
+            return await audio_router.get_audio(
+                node_id=node_id,
+                language="en",
+                speaker="meera",
+                code_mix=0.0,
+                if_none_match=if_none_match,
+                db=fake_db([]),
+            )
+
+    async def test_matching_checksum_etag_returns_304(self):
+        response = await self.get_stored_audio('"other", "abc123"')
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["etag"], '"abc123"')
+
+    async def test_stored_audio_carries_etag_and_cache_control(self):
+        response = await self.get_stored_audio(None)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["etag"], '"abc123"')
+        self.assertIn("max-age", response.headers["cache-control"])
+        payload = json.loads(response.body)
+        self.assertEqual(payload["audio_url"], "https://audio.example.com/a.mp3")
+        self.assertNotIn("checksum", payload)
+
+
+class StoryAudioReuseRegressionTests(unittest.IsolatedAsyncioTestCase):
+    async def test_lookup_audio_variants_checks_cache_then_one_db_query(self):
+        cached_node, stored_node, missing_node = uuid4(), uuid4(), uuid4()
+        zero = Decimal("0.00")
+        stored = SimpleNamespace(
+            node_id=stored_node,
+            language_code="en",
+            speaker_id="shubh",
+            code_mix_ratio=zero,
+            r2_url="https://audio.example.com/stored.mp3",
+            duration_sec=None,
+            file_size=100,
+            checksum="abc123",
+        )
+        db = fake_db([FakeResult(scalars=[stored])])
+
+        async def cached_entries(variants):
+            return [
+                {"url": "https://audio.example.com/cached.mp3", "checksum": None}
+                if node_id == str(cached_node)
+                else None
+                for node_id, *_ in variants
+            ]
+
+        set_audio_entries = AsyncMock()
+        get_entries = AsyncMock(side_effect=cached_entries)
+        with patch.object(
+            audio_router.cache_service, "get_audio_entries", new=get_entries
+        ), patch.object(audio_router.cache_service, "set_audio_entries", new=set_audio_entries):
+            found = await audio_router.lookup_audio_variants(
+                db,
+                [
+                    (cached_node, "en", "shubh", zero),
+                    (stored_node, "en", "shubh", zero),
+                    (missing_node, "en", "shubh", zero),
+                ],
+            )
+
+        self.assertEqual(db._index, 1)
+        get_entries.assert_awaited_once()
+        self.assertEqual(
+            found[(cached_node, "en", "shubh", zero)].audio_url,
+            "https://audio.example.com/cached.mp3",
+        )
+        self.assertEqual(found[(stored_node, "en", "shubh", zero)].file_size, 100)
+        self.assertNotIn((missing_node, "en", "shubh", zero), found)
+        set_audio_entries.assert_awaited_once()
+        self.assertEqual(
+            set_audio_entries.await_args.args[0],
+            [
+                (
+                    (str(stored_node), "en", "shubh", 0.0),
+                    {
+                        "url": "https://audio.example.com/stored.mp3",
+                        "checksum": "abc123",
+                        "duration_sec": None,
+                        "file_size": 100,
+                    },
+                )
+            ],
+        )
+
+    async def test_story_manifest_resolves_all_nodes_in_two_queries(self):
+        story_id, zero = uuid4(), Decimal("0.00")
+        crow = SimpleNamespace(bulbul_speaker="Shubh")
+        cached, stored, missing, silent = (
+            SimpleNamespace(
+                id=uuid4(),
+                display_order=order,
+                text_content={"en": f"Node {order}"} if order < 4 else {"hi": "केवल"},
+                character=crow if order == 2 else None,
+            )
+            for order in (1, 2, 3, 4)
+        )
+        audio_file = SimpleNamespace(
+            node_id=stored.id,
+            language_code="en",
+            speaker_id="shubh",
+            code_mix_ratio=zero,
+            r2_url="https://audio.example.com/stored.mp3",
+            duration_sec=Decimal("2.5"),
+            file_size=100,
+            checksum="abc123",
+        )
+        db = fake_db(
+            [
+                FakeResult(scalars=[cached, stored, missing, silent]),
+                FakeResult(scalars=[audio_file]),
+            ]
+        )
+
+        async def cached_entries(variants):
+            return [
+                {"url": "https://audio.example.com/cached.mp3", "checksum": None}
+                if node_id == str(cached.id)
+                else None
+                for node_id, *_ in variants
+            ]
+
+        queue = InMemoryJobQueue()
+        with patch.object(
+            audio_router.cache_service, "get_audio_entries", new=AsyncMock(side_effect=cached_entries)
+        ), patch.object(
+            audio_router.cache_service, "set_audio_entries", new=AsyncMock()
+        ), patch.object(audio_router, "audio_job_queue", queue):
+            manifest = await audio_router.get_story_audio_manifest(
+                story_id, language="en", speaker=None, code_mix=0.0, enqueue=True, db=db
+            )
+
+        self.assertEqual(len(db.statements), 2)
+        self.assertEqual(
+            [(entry.display_order, entry.speaker, entry.status) for entry in manifest.nodes],
+            [(1, "meera", "ready"), (2, "shubh", "ready"), (3, "meera", "pending")],
+        )
+        self.assertEqual(manifest.nodes[1].duration_sec, 2.5)
+        self.assertEqual(manifest.nodes[1].file_size, 100)
+        self.assertEqual((manifest.ready, manifest.pending, manifest.queued), (2, 1, 1))
+        job = await queue.dequeue(timeout=0.1)
+        self.assertEqual((job.node_id, job.speaker), (str(missing.id), "meera"))
+
+    async def test_full_story_streams_segments_and_persists_only_new_audio(self):
+        story = SimpleNamespace(id=uuid4(), slug="story-one")
+        reused_node = SimpleNamespace(
+            id=uuid4(), display_order=1, text_content={"en": "one"}, character=None
+        )
+        fresh_node = SimpleNamespace(
+            id=uuid4(), display_order=2, text_content={"en": "two"}, character=None
+        )
+        db = fake_db(
+            [
+                FakeResult(scalars=[reused_node, fresh_node]),
+                FakeResult(scalars=[]),
+                FakeResult(),
+            ]
+        )
+
+        async def cached_entries(variants):
+            return [
+                {"url": "https://audio.example.com/one.wav", "checksum": None}
+                if node_id == str(reused_node.id)
+                else None
+                for node_id, *_ in variants
+            ]
+
+        encoded_pcm = []
+
+        async def fake_encoder(pcm_chunks, pcm_format):
+            async for chunk in pcm_chunks:
+                encoded_pcm.append(chunk)
+                yield b"mp3"
+
+        async def fake_upload_stream(chunks, **kwargs):
+            return "https://audio.example.com/full.mp3" if [c async for c in chunks] else None
+
+        upload = AsyncMock(return_value="https://audio.example.com/two.wav")
+        with patch.object(
+            audio_router.cache_service, "get_audio_entries", new=AsyncMock(side_effect=cached_entries)
+        ), patch.object(
+            audio_router.cache_service, "set_audio_entries", new=AsyncMock()
+        ), patch.object(
+            audio_router.r2_service, "download_audio", new=AsyncMock(return_value=wav_bytes(100))
+        ), patch.object(
+            audio_router.bulbul_service, "synthesize", new=AsyncMock(return_value=wav_bytes(50))
+        ), patch.object(
+            audio_router.r2_service, "upload_audio", new=upload
+        ), patch.object(
+            audio_router.r2_service, "upload_audio_stream", new=fake_upload_stream
+        ), patch.object(
+            audio_router.r2_service, "is_configured", return_value=True
+        ), patch.object(audio_router, "encode_mp3_stream", new=fake_encoder):
+            result = await audio_router.build_full_story_audio(db, story, "en")
+
+        upload.assert_awaited_once()
+        self.assertEqual(upload.await_args.kwargs["node_id"], str(fresh_node.id))
+        self.assertEqual(db._index, 3)
+        self.assertEqual(len(b"".join(encoded_pcm)), 150 * 2)
+        self.assertEqual(result["audio_url"], "https://audio.example.com/full.mp3")
+        self.assertEqual(result["segments_reused"], 1)
+        self.assertEqual(result["segments_synthesized"], 1)
+        self.assertEqual(result["file_size"], 6)
+
+    async def full_story_failure(self, encoder=None, upload_stream=None, configured=True):
+        """Status of build_full_story_audio for a one-node story that fails"""
+        story = SimpleNamespace(id=uuid4(), slug="story-one")
+        node = SimpleNamespace(id=uuid4(), display_order=1, text_content={"en": "one"}, character=None)
+        db = fake_db([FakeResult(scalars=[node]), FakeResult(scalars=[]), FakeResult()])
+
+        async def fake_upload_stream(chunks, **kwargs):
+            return "https://audio.example.com/full.mp3" if [c async for c in chunks] else None
+
+        with patch.object(
+            audio_router.cache_service, "get_audio_entries", new=AsyncMock(return_value=[None])
+        ), patch.object(
+            audio_router.cache_service, "set_audio_entries", new=AsyncMock()
+        ), patch.object(
+            audio_router.bulbul_service, "synthesize", new=AsyncMock(return_value=wav_bytes(50))
+        ), patch.object(
+            audio_router.r2_service, "upload_audio", new=AsyncMock(return_value=None)
+        ), patch.object(
+            audio_router.r2_service, "upload_audio_stream", new=upload_stream or fake_upload_stream
+        ), patch.object(
+            audio_router.r2_service, "is_configured", return_value=configured
+        ), patch.object(audio_router, "encode_mp3_stream", new=encoder or encode_mp3_stream):
+            with self.assertRaises(HTTPException) as raised:
+                await audio_router.build_full_story_audio(db, story, "en")
+        return raised.exception.status_code
+
+    async def test_full_story_reports_encoder_and_storage_failures(self):
+        async def missing_ffmpeg(pcm_chunks, pcm_format):
+            raise EncoderUnavailable("ffmpeg not found")
+            yield b""
+
+        async def undecodable(pcm_chunks, pcm_format):
+            async for _ in pcm_chunks:
+                raise AudioEncodingError("Could not decode audio segment")
+            yield b""
+
+        async def rejected_upload(chunks, **kwargs):
+            async for _ in chunks:
+                pass
+            return None
+
+        self.assertEqual(await self.full_story_failure(configured=False), 503)
+        self.assertEqual(await self.full_story_failure(encoder=missing_ffmpeg), 503)
+        self.assertEqual(await self.full_story_failure(encoder=undecodable), 500)
+        self.assertEqual(
+            await self.full_story_failure(encoder=fake_mp3_encoder, upload_stream=rejected_upload),
+            502,
+        )
+
+    async def test_full_story_segment_uploads_are_bounded(self):
+        story = SimpleNamespace(id=uuid4(), slug="story-one")
+        nodes = [
+            SimpleNamespace(id=uuid4(), display_order=i, text_content={"en": f"n{i}"}, character=None)
+            for i in range(6)
+        ]
+        db = fake_db([FakeResult(scalars=nodes), FakeResult(scalars=[]), FakeResult()])
+        in_flight, peak = 0, 0
+
+        async def slow_upload(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return None
+
+        async def fake_upload_stream(chunks, **kwargs):
+            return "https://audio.example.com/full.mp3" if [c async for c in chunks] else None
+
+        with patch.object(
+            audio_router.cache_service, "get_audio_entries", new=AsyncMock(return_value=[None] * 6)
+        ), patch.object(
+            audio_router.bulbul_service, "synthesize", new=AsyncMock(return_value=wav_bytes(10))
+        ), patch.object(
+            audio_router.r2_service, "upload_audio", new=slow_upload
+        ), patch.object(
+            audio_router.r2_service, "upload_audio_stream", new=fake_upload_stream
+        ), patch.object(
+            audio_router.r2_service, "is_configured", return_value=True
+        ), patch.object(
+            audio_router.settings, "full_story_concurrency", 2
+        ), patch.object(audio_router, "encode_mp3_stream", new=fake_mp3_encoder):
+            result = await audio_router.build_full_story_audio(db, story, "en")
+
+        self.assertEqual(result["segments_synthesized"], 6)
+        self.assertEqual(result["status"], "complete")
+        self.assertLessEqual(peak, 2)
+
+    async def test_manifest_reports_duration_of_audio_stored_by_full_story(self):
+        story = SimpleNamespace(id=uuid4(), slug="story-one")
+        node = SimpleNamespace(id=uuid4(), display_order=1, text_content={"en": "one"}, character=None)
+        cached = {}
+
+        async def set_audio_entries(entries):
+            for (node_id, language, speaker, _), entry in entries:
+                cached[(node_id, language, speaker)] = entry
+
+        async def cached_entries(variants):
+            return [cached.get((node_id, language, speaker)) for node_id, language, speaker, _ in variants]
+
+        async def fake_upload_stream(chunks, **kwargs):
+            return "https://audio.example.com/full.mp3" if [c async for c in chunks] else None
+
+        with patch.object(
+            audio_router.cache_service, "get_audio_entries", new=AsyncMock(side_effect=cached_entries)
+        ), patch.object(
+            audio_router.cache_service, "set_audio_entries", new=AsyncMock(side_effect=set_audio_entries)
+        ), patch.object(
+            audio_router.bulbul_service, "synthesize", new=AsyncMock(return_value=wav_bytes(22050))
+        ), patch.object(
+            audio_router.r2_service,
+            "upload_audio",
+            new=AsyncMock(return_value="https://audio.example.com/one.wav"),
+        ), patch.object(
+            audio_router.r2_service, "upload_audio_stream", new=fake_upload_stream
+        ), patch.object(
+            audio_router.r2_service, "is_configured", return_value=True
+        ), patch.object(audio_router, "encode_mp3_stream", new=fake_mp3_encoder):
+            db = fake_db([FakeResult(scalars=[node]), FakeResult(scalars=[]), FakeResult()])
+            await audio_router.build_full_story_audio(db, story, "en")
+            manifest = await audio_router.get_story_audio_manifest(
+                story.id,
+                language="en",
+                speaker=None,
+                code_mix=0.0,
+                enqueue=False,
+                db=fake_db([FakeResult(scalars=[node])]),
+            )
+
+        inserted = db.statements[2].compile(dialect=postgresql.dialect()).params
+        self.assertEqual(inserted["duration_sec_m0"], 0.5)
+        self.assertEqual(manifest.nodes[0].status, "ready")
+        self.assertEqual(manifest.nodes[0].duration_sec, 0.5)
+
 
 class ProgressRegressionTests(unittest.IsolatedAsyncioTestCase):
-    async def test_update_progress_keeps_completed_state(self):
+    async def test_update_progress_writes_single_upsert(self):
         story_id = uuid4()
         node_id = uuid4()
         user_id = uuid4()
-        story = SimpleNamespace(id=story_id)
-        node = SimpleNamespace(id=node_id, story_id=story_id, display_order=1, is_end=False)
-        progress = SimpleNamespace(
-            user_id=user_id,
+        node = SimpleNamespace(
+            id=node_id,
             story_id=story_id,
-            current_node_id=node_id,
-            play_count=2,
-            total_time_sec=120,
-            last_played_at=None,
-            is_completed=True,
-            completion_percentage=100.0,
+            node_type="narration",
+            display_order=1,
+            is_start=False,
+            is_end=False,
         )
+        story = SimpleNamespace(id=story_id, progress_index=build_progress_index([node], []))
+        progress = SimpleNamespace(user_id=user_id, story_id=story_id, choices_count=0)
         db = fake_db(
             [
                 FakeResult(scalar=story),
                 FakeResult(scalar=node),
+                FakeResult(scalar=user_id),
                 FakeResult(scalar=progress),
-                FakeResult(scalar=10),
             ]
         )
 
-        result = await users_router.update_progress(
-            user_id=user_id,
-            token_user_id=None,
+        with patch.object(progress_buffer.settings, "progress_write_mode", "direct"):
+            result = await users_router.update_progress(
+                user_id=user_id,
+                token_user_id=None,
+                story_id=story_id,
+                current_node_id=node_id,
+                is_completed=False,
+                time_spent_sec=5,
+                db=db,
+            )
+
+        self.assertEqual(result["success"], True)
+        # No SELECT of the progress row before writing it
+        upsert = db.statements[-1]
+        self.assertEqual(len(db.statements), 4)
+        self.assertEqual(upsert.table.name, "user_progress")
+        self.assertIn("ON CONFLICT (user_id, story_id) DO UPDATE", str(upsert.compile(dialect=postgresql.dialect())))
+
+    async def test_update_progress_is_buffered_without_touching_progress_row(self):
+        story_id = uuid4()
+        user_id = uuid4()
+        node = SimpleNamespace(
+            id=uuid4(),
             story_id=story_id,
-            current_node_id=node_id,
-            is_completed=False,
-            time_spent_sec=5,
-            db=db,
+            node_type="narration",
+            display_order=1,
+            is_start=True,
+            is_end=False,
+        )
+        story = SimpleNamespace(id=story_id, progress_index=build_progress_index([node], []))
+        buffer = progress_buffer.ProgressBuffer(session_factory=None)
+        # The user lookup is remembered after the first write
+        db = fake_db(
+            [FakeResult(scalar=story), FakeResult(scalar=node), FakeResult(scalar=user_id)]
         )
 
-        self.assertEqual(result["success"], True)
-        self.assertTrue(progress.is_completed)
-        self.assertEqual(float(progress.completion_percentage), 100.0)
+        with patch.object(progress_buffer.settings, "progress_write_mode", "buffer"), patch.object(
+            progress_buffer, "get_progress_buffer", return_value=buffer
+        ):
+            for _ in range(2):
+                db._index = 0
+                await users_router.update_progress(
+                    user_id=user_id,
+                    token_user_id=None,
+                    story_id=story_id,
+                    current_node_id=node.id,
+                    is_completed=False,
+                    time_spent_sec=5,
+                    db=db,
+                )
+
+        pending = await buffer.pending(user_id, story_id)
+        self.assertEqual(await buffer.store.size(), 1)
+        self.assertEqual((pending.play_count, pending.total_time_sec), (2, 10))
+        self.assertEqual(len(db.statements), 5)
+        db.flush.assert_not_awaited()
+
+    async def test_update_progress_rejects_unknown_user_before_buffering(self):
+        story_id, user_id = uuid4(), uuid4()
+        node = SimpleNamespace(
+            id=uuid4(),
+            story_id=story_id,
+            node_type="narration",
+            display_order=1,
+            is_start=True,
+            is_end=False,
+        )
+        story = SimpleNamespace(id=story_id, progress_index=build_progress_index([node], []))
+        buffer = progress_buffer.ProgressBuffer(session_factory=None)
+        db = fake_db([FakeResult(scalar=story), FakeResult(scalar=node), FakeResult(scalar=None)])
+
+        with patch.object(progress_buffer.settings, "progress_write_mode", "buffer"), patch.object(
+            progress_buffer, "get_progress_buffer", return_value=buffer
+        ):
+            with self.assertRaises(HTTPException) as raised:
+                await users_router.update_progress(
+                    user_id=user_id,
+                    token_user_id=None,
+                    story_id=story_id,
+                    current_node_id=node.id,
+                    is_completed=False,
+                    time_spent_sec=5,
+                    db=db,
+                )
+
+        self.assertEqual(raised.exception.status_code, 404)
+        self.assertEqual(await buffer.store.size(), 0)
+
+    async def test_choice_history_pages_with_cursor(self):
+        user_id, story_id = uuid4(), uuid4()
+        events = [
+            SimpleNamespace(
+                id=event_id,
+                story_id=story_id,
+                node_id=uuid4(),
+                choice_key="A",
+                made_at=datetime.now(timezone.utc),
+            )
+            for event_id in (9, 7, 4)
+        ]
+        buffer = AsyncMock()
+
+        with patch.object(users_router, "get_progress_buffer", return_value=buffer):
+            page = await users_router.get_choice_history(
+                user_id=user_id,
+                token_user_id=None,
+                story_id=story_id,
+                before=10,
+                limit=2,
+                db=fake_db([FakeResult(scalars=events)]),
+            )
+
+        buffer.flush.assert_awaited_once_with(user_id=user_id)
+        self.assertEqual([event.id for event in page.data], [9, 7])
+        self.assertEqual(page.next_cursor, 7)
 
 
 class ChoiceRegressionTests(unittest.IsolatedAsyncioTestCase):
-    async def test_make_choice_replaces_choice_history_list(self):
+    async def test_make_choice_appends_choice_event(self):
         story_id = uuid4()
         node_id = uuid4()
         next_node_id = uuid4()
         user_id = uuid4()
 
-        story = SimpleNamespace(id=story_id, slug="story-three")
-        current_node = SimpleNamespace(id=node_id, story_id=story_id)
+        story = SimpleNamespace(
+            id=story_id, slug="story-three", updated_at=None, progress_index=None, characters=[]
+        )
+        current_node = SimpleNamespace(
+            id=node_id,
+            story_id=story_id,
+            node_type="choice",
+            display_order=1,
+            is_start=True,
+            is_end=False,
+            text_content={"en": "Pick one"},
+            character_id=None,
+        )
         choice = SimpleNamespace(
             id=uuid4(),
             node_id=node_id,
@@ -485,47 +1443,117 @@ class ChoiceRegressionTests(unittest.IsolatedAsyncioTestCase):
             text_content={"en": "Next node"},
             character_id=None,
         )
-        original_choices = [
-            {
-                "node_id": str(uuid4()),
-                "choice_key": "B",
-                "made_at": datetime.now(timezone.utc).isoformat(),
-            }
-        ]
+        # Row as returned by the upsert (one earlier choice plus this one)
         progress = SimpleNamespace(
             user_id=user_id,
             story_id=story_id,
-            current_node_id=node_id,
-            choices_made=original_choices,
+            current_node_id=next_node_id,
+            choices_count=2,
             play_count=1,
             total_time_sec=0,
             is_completed=False,
             completion_percentage=0.0,
         )
+        end_node = SimpleNamespace(
+            id=uuid4(),
+            story_id=story_id,
+            node_type="narration",
+            display_order=4,
+            is_start=False,
+            is_end=True,
+            text_content={"en": "The end"},
+            character_id=None,
+        )
+        current_node.choices = [choice]
+        next_node.choices = end_node.choices = []
         db = fake_db(
             [
                 FakeResult(scalar=story),
-                FakeResult(scalar=current_node),
-                FakeResult(scalar=choice),
-                FakeResult(scalar=next_node),
-                FakeResult(scalar=4),
+                FakeResult(scalars=[next_node, current_node, end_node]),
+                FakeResult(scalar=user_id),
                 FakeResult(scalar=progress),
             ]
         )
 
-        response = await choices_router.make_choice(
-            slug="story-three",
-            request=MakeChoiceRequest(node_id=node_id, choice_key="A"),
-            user_id=user_id,
-            token_user_id=None,
-            language="en",
-            db=db,
-        )
+        graph_cache = choices_router.story_graph_store.cache_service
+        with patch.object(graph_cache, "get", new=AsyncMock(return_value=None)), patch.object(
+            graph_cache, "set", new=AsyncMock()
+        ), patch.object(progress_buffer.settings, "progress_write_mode", "direct"):
+            response = await choices_router.make_choice(
+                slug="story-three",
+                request=MakeChoiceRequest(node_id=node_id, choice_key="A"),
+                user_id=user_id,
+                token_user_id=None,
+                language="en",
+                db=db,
+            )
 
         self.assertEqual(response.success, True)
-        self.assertIsNot(progress.choices_made, original_choices)
-        self.assertEqual(len(progress.choices_made), 2)
+        (event,) = db.added
+        self.assertEqual((event.node_id, event.choice_key), (node_id, "A"))
         self.assertEqual(response.progress["choices_made_count"], 2)
+        self.assertEqual(response.progress["completion_percentage"], 50.0)
+        self.assertEqual(response.choice_made["choice_text"], "Choose A")
+
+    async def test_make_choice_resolves_from_cached_graph_without_db(self):
+        story = SimpleNamespace(
+            id=uuid4(), slug="story-four", updated_at=None, progress_index=None
+        )
+        start = SimpleNamespace(
+            id=uuid4(),
+            node_type="choice",
+            display_order=1,
+            is_start=True,
+            is_end=False,
+            text_content={"en": "Pick"},
+            character_id=None,
+        )
+        end = SimpleNamespace(
+            id=uuid4(),
+            node_type="narration",
+            display_order=2,
+            is_start=False,
+            is_end=True,
+            text_content={"en": "End", "kn": "ಅಂತ್ಯ"},
+            character_id=None,
+        )
+        choice = SimpleNamespace(
+            id=uuid4(),
+            node_id=start.id,
+            choice_key="A",
+            text_content={"en": "Go"},
+            next_node_id=end.id,
+        )
+        graph = compile_story_graph(story, [start, end], [choice], [])
+        serialized = json.loads(json.dumps(graph.to_dict()))
+
+        graph_cache = choices_router.story_graph_store.cache_service
+        with patch.object(graph_cache, "get", new=AsyncMock(return_value=serialized)):
+            response = await choices_router.make_choice(
+                slug="story-four",
+                request=MakeChoiceRequest(node_id=start.id, choice_key="A"),
+                user_id=None,
+                token_user_id=None,
+                language="kn",
+                db=fake_db([]),
+            )
+
+        self.assertEqual(response.next_node.id, end.id)
+        self.assertEqual(response.next_node.text, "ಅಂತ್ಯ")
+        self.assertEqual(response.progress["completion_percentage"], 100.0)
+
+        with self.assertRaises(HTTPException) as ctx, patch.object(
+            graph_cache, "get", new=AsyncMock(return_value=serialized)
+        ):
+            await choices_router.make_choice(
+                slug="story-four",
+                request=MakeChoiceRequest(node_id=start.id, choice_key="Z"),
+                user_id=None,
+                token_user_id=None,
+                language="en",
+                db=fake_db([]),
+            )
+        self.assertEqual(ctx.exception.status_code, 400)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,1091 @@
+import asyncio
+import io
+import json
+import struct
+import tempfile
+import time
+import unittest
+import wave
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.models.progress import UserProgress
+from app.models.story import Story
+from app.services.cache_service import (
+    INVALIDATION_CHANNEL,
+    CacheEntry,
+    CacheService,
+    LocalCache,
+    audio_cache_key,
+    jittered_ttl,
+    split_freshness,
+)
+from app.services.db_circuit import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    DatabaseUnavailable,
+)
+from app.services.fallback_catalog import FallbackCatalog, stable_uuid
+from app.services.progress_buffer import (
+    ChoiceMade,
+    InMemoryProgressStore,
+    ProgressBuffer,
+    ProgressDelta,
+    RedisProgressStore,
+    choice_count,
+    upsert_progress,
+)
+from app.services.progress_index import build_progress_index, completion_from_index
+from app.services.response_cache import CachedResponse, body_etag
+from app.services.story_audio import (
+    SOURCE_REUSED,
+    SOURCE_SYNTHESIZED,
+    SegmentRequest,
+    StoryAudioPipeline,
+)
+from app.services.story_catalog import catalog_upsert
+from app.services.story_graph import story_aggregate_query, story_nodes_query
+from app.services.story_listing import STORY_LIST_TAG, story_list_cache_key
+from app.services.story_publish import refresh_story_caches
+from app.services.story_snapshot import (
+    story_detail_cache_key,
+    story_detail_etag,
+    story_detail_tag,
+)
+from app.utils.wav import (
+    WavFormatError,
+    append_silence,
+    parse_wav_header,
+)
+
+
+def segment(order: int) -> SegmentRequest:
+    return SegmentRequest(
+        node_id=uuid4(),
+        display_order=order,
+        text=f"Node {order}",
+        language="en",
+        speaker="meera",
+    )
+
+
+async def streamed(pipeline: StoryAudioPipeline, requests) -> list:
+    return [result async for result in pipeline.stream(requests)]
+
+
+class StoryAudioPipelineTests(unittest.IsolatedAsyncioTestCase):
+    async def test_runs_concurrently_and_yields_display_order(self):
+        in_flight = 0
+        peak = 0
+
+        async def synthesize(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # Later nodes finish first to prove results are re-ordered.
+            await asyncio.sleep(0.01 * (10 - request.display_order))
+            in_flight -= 1
+            return f"audio-{request.display_order}".encode()
+
+        pipeline = StoryAudioPipeline(synthesize, concurrency=3)
+        results = await streamed(pipeline, [segment(order) for order in (5, 1, 3, 2, 4)])
+
+        self.assertEqual([r.request.display_order for r in results], [1, 2, 3, 4, 5])
+        self.assertEqual(results[0].audio_bytes, b"audio-1")
+        self.assertEqual(peak, 3)
+
+    async def test_retries_failed_segment_and_reports_partial_failure(self):
+        calls: dict[int, int] = {}
+
+        async def synthesize(request):
+            calls[request.display_order] = calls.get(request.display_order, 0) + 1
+            if request.display_order == 2 and calls[2] == 1:
+                return None  # transient failure, succeeds on retry
+            if request.display_order == 3:
+                raise RuntimeError("Sarvam 500")
+            return b"audio"
+
+        pipeline = StoryAudioPipeline(
+            synthesize, max_retries=2, retry_backoff_sec=0
+        )
+        results = await streamed(pipeline, [segment(1), segment(2), segment(3)])
+
+        self.assertTrue(results[1].ok)
+        self.assertEqual(results[1].attempts, 2)
+        self.assertFalse(results[2].ok)
+        self.assertEqual(results[2].attempts, 3)
+        self.assertEqual(results[2].error, "Sarvam 500")
+
+    async def test_reuses_existing_audio_before_synthesizing(self):
+        reused = segment(1)
+        missing = segment(2)
+        synthesized = []
+
+        async def fetch_existing(request):
+            return b"stored" if request is reused else None
+
+        async def synthesize(request):
+            synthesized.append(request.display_order)
+            return b"fresh"
+
+        pipeline = StoryAudioPipeline(synthesize, fetch_existing=fetch_existing)
+        results = await streamed(pipeline, [reused, missing])
+
+        self.assertEqual(synthesized, [2])
+        self.assertEqual(results[0].source, SOURCE_REUSED)
+        self.assertEqual(results[0].audio_bytes, b"stored")
+        self.assertEqual(results[1].source, SOURCE_SYNTHESIZED)
+
+    async def test_stream_yields_in_order_with_bounded_window(self):
+        started = []
+
+        async def synthesize(request):
+            started.append(request.display_order)
+            await asyncio.sleep(0.01 * (5 - request.display_order))
+            return f"audio-{request.display_order}".encode()
+
+        pipeline = StoryAudioPipeline(synthesize, concurrency=2)
+        orders = []
+        async for result in pipeline.stream([segment(order) for order in (3, 1, 4, 2)]):
+            orders.append(result.request.display_order)
+            # Only the yielded segment's successor window may have started.
+            self.assertLessEqual(len(started), len(orders) + 2)
+
+        self.assertEqual(orders, [1, 2, 3, 4])
+
+
+def make_wav(samples: bytes, sample_rate: int = 44100, extra_chunk: bytes = b"") -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples)
+    data = buffer.getvalue()
+    if not extra_chunk:
+        return data
+    # Insert an odd-sized LIST chunk between fmt and data, as some encoders do
+    body = data[:36] + b"LIST" + struct.pack("<I", len(extra_chunk)) + extra_chunk
+    if len(extra_chunk) % 2:
+        body += b"\x00"
+    body += data[36:]
+    return b"RIFF" + struct.pack("<I", len(body) - 8) + body[8:]
+
+
+def read_frames(wav_bytes: bytes) -> bytes:
+    with wave.open(io.BytesIO(wav_bytes), "rb") as wav:
+        return wav.readframes(wav.getnframes())
+
+
+class WavToolkitTests(unittest.TestCase):
+    def test_parse_skips_unknown_chunks(self):
+        info = parse_wav_header(make_wav(b"\x01\x00" * 10, extra_chunk=b"abc"))
+
+        self.assertEqual((info.sample_rate, info.channels, info.sample_width), (44100, 1, 2))
+        self.assertEqual(info.frames, 10)
+
+    def test_append_silence_pads_with_zero_frames(self):
+        padded = append_silence(make_wav(b"\x01\x00" * 10, sample_rate=8000), silence_ms=500)
+
+        self.assertEqual(read_frames(padded), b"\x01\x00" * 10 + b"\x00\x00" * 4000)
+
+    def test_rejects_invalid_input(self):
+        with self.assertRaises(WavFormatError):
+            parse_wav_header(b"RIFF" + b"\x00" * 40)
+
+
+def story_node(order: int, node_type: str = "narration", is_end: bool = False):
+    return SimpleNamespace(
+        id=uuid4(),
+        node_type=node_type,
+        display_order=order,
+        is_start=order == 1,
+        is_end=is_end,
+    )
+
+
+class ProgressIndexTests(unittest.TestCase):
+    def test_branching_story_uses_path_depth_not_display_order(self):
+        # 1 -> 2 (choice) -> A: 3 (end) | B: 4 -> 5 (end)
+        start, fork, short_end, detour, long_end = (
+            story_node(1),
+            story_node(2, "choice"),
+            story_node(3, is_end=True),
+            story_node(4),
+            story_node(5, is_end=True),
+        )
+        choices = [
+            SimpleNamespace(node_id=fork.id, next_node_id=short_end.id),
+            SimpleNamespace(node_id=fork.id, next_node_id=detour.id),
+        ]
+        index = build_progress_index([start, fork, short_end, detour, long_end], choices)
+
+        self.assertEqual(index["max_order"], 5)
+        self.assertEqual(
+            index["nodes"][str(fork.id)],
+            {"depth": 1, "min_remaining": 1, "max_remaining": 2},
+        )
+        # depth 2 with one step left, although display_order 4 of 5 reads as 80%
+        self.assertAlmostEqual(completion_from_index(index, detour.id, 4, False), 66.67)
+        self.assertEqual(completion_from_index(index, long_end.id, 5, True), 100.0)
+
+    def test_missing_or_stale_index_returns_none(self):
+        self.assertIsNone(completion_from_index(None, uuid4(), 1, False))
+        self.assertIsNone(completion_from_index({"version": 0}, uuid4(), 1, False))
+
+
+# The models use PostgreSQL UUID columns, which SQLite can't create, so the
+# table is declared by hand; the upsert itself runs unchanged.
+PROGRESS_DDL = """
+CREATE TABLE user_progress (
+    id CHAR(32) PRIMARY KEY,
+    user_id CHAR(32) NOT NULL,
+    story_id CHAR(32) NOT NULL,
+    current_node_id CHAR(32),
+    choices_count INTEGER,
+    is_completed BOOLEAN,
+    completion_percentage NUMERIC(5, 2),
+    play_count INTEGER,
+    total_time_sec INTEGER,
+    last_played_at DATETIME,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, story_id)
+)
+"""
+
+
+class SqliteSession:
+    """Async-session stand-in running progress upserts on in-memory SQLite"""
+
+    def __init__(self, engine=None, fail=False, bad_user=None):
+        if engine is None:
+            engine = create_engine("sqlite://")
+            with engine.begin() as conn:
+                conn.execute(text(PROGRESS_DDL))
+        self.bind = engine
+        self.session = Session(engine)
+        self.fail = fail
+        # Rows for this user violate the (here missing) users foreign key
+        self.bad_user = bad_user
+        self.events = []
+        self.executed = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.session.close()
+        return False
+
+    async def execute(self, statement, **kwargs):
+        self.executed += 1
+        if self.fail:
+            raise OperationalError("INSERT", {}, ConnectionRefusedError("db down"))
+        if self.bad_user and self.bad_user in statement.compile().params.values():
+            raise IntegrityError("INSERT", {}, Exception("violates fk_user_progress_user"))
+        return self.session.execute(statement, **kwargs)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        added = len(self.events)
+        try:
+            with self.session.begin_nested():
+                yield
+        except Exception:
+            del self.events[added:]
+            raise
+
+    async def rollback(self):
+        self.session.rollback()
+        self.events = []
+
+    def add_all(self, objs):
+        # progress_events isn't created here; keep the appended rows instead
+        self.events.extend(objs)
+
+    async def flush(self):
+        pass
+
+    async def commit(self):
+        self.session.commit()
+
+    def progress(self, user_id, story_id):
+        return self.session.scalars(
+            select(UserProgress)
+            .where(UserProgress.user_id == user_id, UserProgress.story_id == story_id)
+            .execution_options(populate_existing=True)
+        ).one()
+
+
+class ProgressBufferTests(unittest.IsolatedAsyncioTestCase):
+    async def test_flush_merges_deltas_into_one_batched_write(self):
+        user_id, story_id, new_story_id = uuid4(), uuid4(), uuid4()
+        session = SqliteSession()
+        await upsert_progress(
+            session, ProgressDelta(user_id, story_id, completed_sticky=True, play_count=3)
+        )
+        buffer = ProgressBuffer(session_factory=lambda: session)
+
+        last_node = uuid4()
+        await buffer.record(ProgressDelta(user_id, story_id, play_count=1, total_time_sec=5))
+        # A replay choice resets completion; the later node move wins
+        await buffer.record(
+            ProgressDelta(
+                user_id,
+                story_id,
+                current_node_id=last_node,
+                completion_percentage=40.0,
+                is_completed=False,
+                choices=[ChoiceMade(uuid4(), "B", datetime.now(timezone.utc))],
+            )
+        )
+        await buffer.record(ProgressDelta(user_id, new_story_id, play_count=1, total_time_sec=7))
+
+        self.assertEqual(await buffer.flush(), 2)
+        self.assertEqual(await buffer.store.size(), 0)
+
+        existing = session.progress(user_id, story_id)
+        self.assertEqual(existing.current_node_id, last_node)
+        self.assertEqual(existing.choices_count, 1)
+        self.assertEqual((existing.play_count, existing.total_time_sec), (4, 5))
+        self.assertFalse(existing.is_completed)
+        self.assertEqual(float(existing.completion_percentage), 40.0)
+        (event,) = session.events
+        self.assertEqual((event.story_id, event.choice_key), (story_id, "B"))
+
+        created = session.progress(user_id, new_story_id)
+        self.assertEqual((created.play_count, created.total_time_sec), (1, 7))
+
+    async def test_deltas_of_one_shape_share_a_multi_row_upsert(self):
+        user_id, node_id = uuid4(), uuid4()
+        session = SqliteSession()
+        stories = [uuid4() for _ in range(5)]
+        await upsert_progress(session, ProgressDelta(user_id, stories[0], total_time_sec=10))
+        buffer = ProgressBuffer(session_factory=lambda: session)
+        for story_id in stories:
+            await buffer.record(
+                ProgressDelta(user_id, story_id, current_node_id=node_id, total_time_sec=3)
+            )
+        executed = session.executed
+
+        self.assertEqual(await buffer.flush(), 5)
+
+        self.assertEqual(session.executed - executed, 1)
+        self.assertEqual(session.progress(user_id, stories[0]).total_time_sec, 13)
+        self.assertEqual(session.progress(user_id, stories[0]).current_node_id, node_id)
+        self.assertEqual(session.progress(user_id, stories[4]).total_time_sec, 3)
+
+    async def test_upsert_keeps_completed_state(self):
+        user_id, story_id = uuid4(), uuid4()
+        session = SqliteSession()
+        await upsert_progress(
+            session,
+            ProgressDelta(user_id, story_id, completed_sticky=True, total_time_sec=120),
+        )
+
+        progress = await upsert_progress(
+            session,
+            ProgressDelta(user_id, story_id, completion_percentage=10.0, total_time_sec=5),
+        )
+
+        self.assertTrue(progress.is_completed)
+        self.assertEqual(float(progress.completion_percentage), 100.0)
+        self.assertEqual(progress.total_time_sec, 125)
+
+    async def test_failed_flush_keeps_deltas_for_next_attempt(self):
+        user_id, story_id = uuid4(), uuid4()
+        buffer = ProgressBuffer(session_factory=lambda: SqliteSession(fail=True))
+        await buffer.record(ProgressDelta(user_id, story_id, total_time_sec=5))
+
+        self.assertEqual(await buffer.flush(), 0)
+        await buffer.record(ProgressDelta(user_id, story_id, total_time_sec=3))
+
+        pending = await buffer.pending(user_id, story_id)
+        self.assertEqual(pending.total_time_sec, 8)
+        # The database being down isn't the delta's fault
+        self.assertEqual(pending.attempts, 0)
+        self.assertEqual(buffer.stats()["failed_flushes"], 1)
+
+    async def test_bad_row_is_isolated_and_dead_lettered(self):
+        good, bad = uuid4(), uuid4()
+        session = SqliteSession(bad_user=bad)
+        buffer = ProgressBuffer(session_factory=lambda: session, max_attempts=2)
+        await buffer.record(ProgressDelta(bad, uuid4(), total_time_sec=1))
+        good_story = uuid4()
+        await buffer.record(ProgressDelta(good, good_story, total_time_sec=4))
+
+        self.assertEqual(await buffer.flush(), 1)
+        self.assertEqual(session.progress(good, good_story).total_time_sec, 4)
+        self.assertEqual(await buffer.store.size(), 1)
+
+        self.assertEqual(await buffer.flush(), 0)
+        self.assertEqual(await buffer.store.size(), 0)
+        (dead,) = buffer.store.dead_letters
+        self.assertEqual((dead.user_id, dead.attempts), (bad, 2))
+        self.assertEqual(buffer.stats()["dead_lettered"], 1)
+
+    async def test_full_store_sends_writes_direct(self):
+        buffer = ProgressBuffer(session_factory=None, store=InMemoryProgressStore(max_keys=1))
+        user_id = uuid4()
+
+        self.assertTrue(await buffer.record(ProgressDelta(user_id, uuid4())))
+        self.assertFalse(await buffer.record(ProgressDelta(user_id, uuid4())))
+        self.assertEqual(buffer.stats()["bypassed"], 1)
+
+    async def test_flush_for_one_user_leaves_others_pending(self):
+        reader, other = uuid4(), uuid4()
+        buffer = ProgressBuffer(session_factory=SqliteSession)
+        await buffer.record(ProgressDelta(reader, uuid4(), total_time_sec=1))
+        await buffer.record(ProgressDelta(other, uuid4(), total_time_sec=1))
+
+        self.assertEqual(await buffer.flush(user_id=reader), 1)
+        self.assertEqual(await buffer.store.size(), 1)
+
+    async def test_redis_store_lets_any_worker_flush_a_users_writes(self):
+        redis = FakeRedis()
+        cache = CacheService(local_max_entries=0)
+        patcher = patch.object(cache, "connect", new=AsyncMock(return_value=redis))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session = SqliteSession()
+        writer, reader = (
+            ProgressBuffer(session_factory=lambda: session, store=RedisProgressStore(cache))
+            for _ in range(2)
+        )
+        user_id, story_id = uuid4(), uuid4()
+        choice = ChoiceMade(uuid4(), "A", datetime.now(timezone.utc))
+        await writer.record(ProgressDelta(user_id, story_id, play_count=1, total_time_sec=2))
+        await writer.record(ProgressDelta(user_id, story_id, total_time_sec=3, choices=[choice]))
+
+        self.assertEqual(len((await reader.pending(user_id, story_id)).choices), 1)
+        self.assertEqual(await reader.flush(user_id=user_id), 1)
+
+        progress = session.progress(user_id, story_id)
+        self.assertEqual((progress.play_count, progress.total_time_sec), (1, 5))
+        self.assertEqual(session.events[0].made_at, choice.made_at)
+        self.assertIsNone(await writer.pending(user_id, story_id))
+        # The user's set member is left behind and popped as an empty list
+        self.assertEqual(await writer.flush(), 0)
+        self.assertEqual(await writer.store.size(), 0)
+
+    async def test_choice_count_waits_for_a_flush_in_flight(self):
+        user_id, story_id = uuid4(), uuid4()
+        session = SqliteSession()
+        committing, release = asyncio.Event(), asyncio.Event()
+        commit = session.commit
+
+        async def slow_commit():
+            committing.set()
+            await release.wait()
+            await commit()
+
+        session.commit = slow_commit
+        buffer = ProgressBuffer(session_factory=lambda: session)
+        choice = ChoiceMade(uuid4(), "A", datetime.now(timezone.utc))
+        await buffer.record(ProgressDelta(user_id, story_id, choices=[choice]))
+        flush = asyncio.create_task(buffer.flush())
+        await committing.wait()
+
+        with patch("app.services.progress_buffer.get_progress_buffer", return_value=buffer):
+            count = asyncio.create_task(choice_count(session, user_id, story_id))
+            await asyncio.sleep(0.01)
+            # The taken batch is in neither the store nor a committed row yet
+            self.assertFalse(count.done())
+            release.set()
+            self.assertEqual(await count, 1)
+        self.assertEqual(await flush, 1)
+
+    async def test_stop_flushes_pending_progress(self):
+        session = SqliteSession()
+        buffer = ProgressBuffer(session_factory=lambda: session, flush_interval=60)
+        await buffer.start()
+        user_id, story_id = uuid4(), uuid4()
+        await buffer.record(ProgressDelta(user_id, story_id, total_time_sec=1))
+
+        await buffer.stop()
+
+        self.assertFalse(buffer.is_running)
+        self.assertEqual(await buffer.store.size(), 0)
+        self.assertEqual(session.progress(user_id, story_id).total_time_sec, 1)
+
+
+class StoryCatalogTests(unittest.TestCase):
+    def test_refresh_is_one_upsert_scoped_to_the_given_stories(self):
+        sql = str(catalog_upsert([uuid4()]).compile(dialect=postgresql.dialect()))
+
+        self.assertTrue(sql.startswith("INSERT INTO story_catalog"))
+        self.assertIn("WHERE stories.id IN", sql)
+        self.assertIn("ON CONFLICT (story_id) DO UPDATE", sql)
+        self.assertNotIn("WHERE stories.id", str(catalog_upsert().compile(dialect=postgresql.dialect())))
+
+    def test_story_age_bounds_follow_age_range(self):
+        story = Story(slug="s", age_range="8 - 5", region="r")
+        self.assertEqual((story.age_min, story.age_max), (5, 8))
+
+        story.age_range = "all"
+        self.assertEqual((story.age_min, story.age_max), (None, None))
+        self.assertIn("stories.age_min", str(catalog_upsert().compile(dialect=postgresql.dialect())))
+
+
+class StoryAggregateQueryTests(unittest.TestCase):
+    def test_story_loads_in_two_statements(self):
+        story_sql = str(story_aggregate_query("crow").compile(dialect=postgresql.dialect()))
+        nodes_sql = str(story_nodes_query(uuid4()).compile(dialect=postgresql.dialect()))
+
+        self.assertIn("LEFT OUTER JOIN story_translations", story_sql)
+        self.assertIn("LEFT OUTER JOIN characters", story_sql)
+        self.assertIn("LEFT OUTER JOIN story_choices", nodes_sql)
+
+
+FALLBACK_STORY = {
+    "slug": "monkey",
+    "age_range": "4-8",
+    "region": "pan-indian",
+    "translations": {
+        "en": {"title": "Monkey"},
+        "hi": {"title": "बंदर"},
+    },
+    "characters": [{"slug": "monkey", "name": "Monkey"}],
+    "nodes": [
+        {
+            "display_order": 2,
+            "node_type": "end",
+            "is_end": True,
+            "text": {"en": "The end", "hi": "समाप्त"},
+        },
+        {
+            "display_order": 1,
+            "node_type": "choice",
+            "is_start": True,
+            "character_slug": "monkey",
+            "text": {"en": "Jump?", "hi": "कूदें?"},
+            "choices": [{"choice_key": "A", "text": {"en": "Yes"}, "next_node_order": 2}],
+        },
+    ],
+}
+
+
+class FallbackCatalogTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name)
+        self.write(FALLBACK_STORY)
+
+    def write(self, story, name="story_monkey.json"):
+        (self.directory / name).write_text(json.dumps(story), encoding="utf-8")
+
+    def test_index_prebuilds_each_language(self):
+        index = FallbackCatalog(self.directory).index()
+        story = index.by_slug["monkey"]
+
+        self.assertEqual(story.summary("hi").title, "बंदर")
+        self.assertEqual(story.summary("kn").language, "en")
+        self.assertEqual(story.summary("en").choice_count, 1)
+        self.assertIs(story.detail("hi"), story.detail("hi"))
+
+        detail = story.detail("hi")
+        start = stable_uuid("fallback", "story", "monkey", "node", "1")
+        self.assertEqual([node.display_order for node in detail.nodes], [1, 2])
+        self.assertEqual(detail.start_node_id, start)
+        self.assertEqual(detail.nodes[0].text, "कूदें?")
+        self.assertEqual(detail.nodes[0].character.slug, "monkey")
+        self.assertEqual(detail.nodes[0].choices[0].next_node_id, detail.nodes[1].id)
+
+    def test_index_rebuilds_only_when_files_change(self):
+        catalog = FallbackCatalog(self.directory, reload_interval=0)
+        first = catalog.index()
+        self.assertIs(catalog.index(), first)
+
+        self.write({**FALLBACK_STORY, "slug": "tiger"}, name="story_tiger.json")
+        second = catalog.index()
+
+        self.assertIsNot(second, first)
+        self.assertEqual(sorted(second.by_slug), ["monkey", "tiger"])
+        self.assertEqual(catalog.builds, 2)
+        # Ids and created_at are stable across rebuilds, so cursors survive
+        self.assertEqual(
+            second.by_slug["monkey"].summary("en"), first.by_slug["monkey"].summary("en")
+        )
+
+    def test_index_is_reused_within_reload_interval(self):
+        catalog = FallbackCatalog(self.directory, reload_interval=3600)
+        first = catalog.index()
+        self.write({**FALLBACK_STORY, "slug": "tiger"}, name="story_tiger.json")
+
+        self.assertIs(catalog.index(), first)
+
+
+class FlakyDB:
+    def __init__(self):
+        self.error: Exception = ConnectionRefusedError("db down")
+        self.calls = 0
+
+    async def execute(self, statement, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return "rows"
+
+
+class CircuitBreakerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_opens_after_consecutive_failures_and_short_circuits(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, probe=None)
+        db = FlakyDB()
+
+        for _ in range(3):
+            with self.assertRaises(DatabaseUnavailable):
+                await breaker.execute(db, "SELECT 1")
+
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(db.calls, 2)
+        self.assertEqual(breaker.stats()["short_circuited"], 1)
+
+    async def test_query_errors_do_not_trip_the_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, probe=None)
+        db = FlakyDB()
+        db.error = IntegrityError("INSERT", {}, Exception("duplicate"))
+
+        with self.assertRaises(DatabaseUnavailable):
+            await breaker.execute(db, "INSERT")
+        self.assertEqual(breaker.state, CLOSED)
+
+    async def test_half_open_allows_one_trial_that_closes_or_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, probe=None)
+        db = FlakyDB()
+        with self.assertRaises(DatabaseUnavailable):
+            await breaker.execute(db, "SELECT 1")
+
+        breaker.reset_timeout = 60
+        breaker._opened_at -= 60
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        breaker._opened_at -= 60
+        db.error = None
+        self.assertEqual(await breaker.execute(db, "SELECT 1"), "rows")
+        self.assertEqual(breaker.state, CLOSED)
+
+    async def test_background_probe_closes_the_circuit(self):
+        probe = AsyncMock(side_effect=[OSError("still down"), None])
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, probe=probe)
+        breaker.record_failure()
+
+        self.assertFalse(await breaker.probe_once())
+        self.assertEqual(breaker.state, OPEN)
+        self.assertTrue(await breaker.probe_once())
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.trips, 1)
+
+
+class FakePipeline:
+    """Runs commands as they are queued; execute() returns their results"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.results = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.redis.store[key] = value
+        self.results.append(True)
+
+    def sadd(self, tag, *members):
+        self.redis.sets.setdefault(tag, set()).update(members)
+        self.results.append(len(members))
+
+    def scard(self, key):
+        self.results.append(len(self.redis.sets.get(key, ())))
+
+    def expire(self, key, ttl):
+        self.results.append(True)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.redis.store.pop(key, None)
+            self.redis.lists.pop(key, None)
+        self.results.append(len(keys))
+
+    def rpush(self, key, *values):
+        self.redis.lists.setdefault(key, []).extend(values)
+        self.results.append(len(self.redis.lists[key]))
+
+    def lpush(self, key, *values):
+        items = self.redis.lists.setdefault(key, [])
+        items[:0] = reversed(values)
+        self.results.append(len(items))
+
+    def lrange(self, key, start, end):
+        items = self.redis.lists.get(key, [])
+        self.results.append(list(items[start : None if end == -1 else end + 1]))
+
+    def ltrim(self, key, start, end):
+        items = self.redis.lists.get(key, [])
+        self.redis.lists[key] = items[start : None if end == -1 else end + 1]
+        self.results.append(True)
+
+    def publish(self, channel, message):
+        self.redis.published.append((channel, json.loads(message)))
+        self.results.append(0)
+
+    async def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.sets = {}
+        self.lists = {}
+        self.published = []
+        self.get = AsyncMock(side_effect=lambda key: self.store.get(key))
+        self.smembers = AsyncMock(side_effect=lambda tag: set(self.sets.get(tag, ())))
+        self.mget = AsyncMock(side_effect=lambda keys: [self.store.get(key) for key in keys])
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.store.get(key) == token:
+            del self.store[key]
+
+    async def spop(self, key, count):
+        members = self.sets.get(key, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+
+    async def scard(self, key):
+        return len(self.sets.get(key, ()))
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return list(items[start : None if end == -1 else end + 1])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class LocalCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used_and_expired_entries(self):
+        local = LocalCache(max_entries=2, ttl=60)
+        local.set("a", 1)
+        local.set("b", 2)
+        local.get("a")
+        local.set("c", 3)
+
+        self.assertIsNone(local.get("b"))
+        self.assertEqual(local.get("a"), 1)
+        self.assertEqual(local.evictions, 1)
+
+        local.set("short", 4, ttl=0)
+        self.assertIsNone(local.get("short"))
+
+
+class CacheServiceTwoTierTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = FakeRedis()
+        self.cache = CacheService(local_max_entries=8)
+        self.cache._local_active = True  # as if the listener were subscribed
+        for name in ("connect", "connect_binary"):
+            patcher = patch.object(self.cache, name, new=AsyncMock(return_value=self.redis))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_repeat_reads_skip_redis_until_invalidated(self):
+        self.redis.store["story:x"] = json.dumps({"title": "v1"})
+
+        self.assertEqual(await self.cache.get("story:x"), {"title": "v1"})
+        self.assertEqual(await self.cache.get("story:x"), {"title": "v1"})
+        self.assertEqual(self.redis.get.await_count, 1)
+
+        # Another worker overwrites the key
+        self.redis.store["story:x"] = json.dumps({"title": "v2"})
+        self.cache._handle_invalidation(json.dumps({"origin": "other", "keys": ["story:x"]}))
+
+        self.assertEqual(await self.cache.get("story:x"), {"title": "v2"})
+        self.assertEqual(self.redis.get.await_count, 2)
+
+    async def test_writes_publish_invalidations_and_ignore_own_echo(self):
+        await self.cache.set("story:y", {"title": "mine"})
+        await self.cache.delete("story:z")
+
+        self.assertEqual(
+            self.redis.published,
+            [
+                (INVALIDATION_CHANNEL, {"origin": self.cache.instance_id, "keys": ["story:y"]}),
+                (INVALIDATION_CHANNEL, {"origin": self.cache.instance_id, "keys": ["story:z"]}),
+            ],
+        )
+        self.cache._handle_invalidation(
+            json.dumps({"origin": self.cache.instance_id, "keys": ["story:y"]})
+        )
+        self.assertEqual(await self.cache.get("story:y"), {"title": "mine"})
+        self.redis.get.assert_not_awaited()
+
+    async def test_response_envelope_round_trips_through_redis_gzipped(self):
+        body = json.dumps({"nodes": ["text"] * 2000}).encode()
+        cached = CachedResponse(body=body, etag=body_etag(body))
+
+        with patch.object(self.cache, "connect_binary", new=AsyncMock(return_value=self.redis)):
+            await self.cache.set_response("stories:detail", cached)
+            self.cache.local.clear()
+            restored = await self.cache.get_response("stories:detail")
+
+        self.assertLess(len(self.redis.store["stories:detail"]), len(body))
+        self.assertEqual(restored, cached)
+        self.assertEqual(restored.render().headers["etag"], cached.etag)
+
+    async def test_tagged_keys_are_found_and_deleted_in_one_message(self):
+        cached = CachedResponse(body=b"{}", etag=body_etag(b"{}"))
+        with patch.object(self.cache, "connect_binary", new=AsyncMock(return_value=self.redis)):
+            await self.cache.set_response("page:1", cached, tags=["pages"])
+            await self.cache.set_response("page:2", cached, tags=["pages"])
+
+        keys = await self.cache.tagged_keys("pages")
+        self.assertEqual(keys, ["page:1", "page:2"])
+
+        self.redis.published.clear()
+        await self.cache.delete(*keys)
+        self.assertEqual(self.redis.store, {})
+        self.assertEqual(
+            self.redis.published,
+            [(INVALIDATION_CHANNEL, {"origin": self.cache.instance_id, "keys": keys})],
+        )
+        self.assertIsNone(self.cache.local.get("page:1"))
+
+    async def test_audio_entries_are_read_with_one_mget(self):
+        await self.cache.set_audio_url("n1", "en", "meera", "https://a/1.mp3", checksum="c1")
+        self.redis.store["audio:n2:en:meera:0.00"] = json.dumps("https://a/2.mp3")
+        self.cache.local.clear()
+
+        entries = await self.cache.get_audio_entries(
+            [("n1", "en", "meera", 0.0), ("n2", "en", "meera", 0.0), ("n3", "en", "meera", 0.0)]
+        )
+
+        self.assertEqual(
+            entries,
+            [
+                {"url": "https://a/1.mp3", "checksum": "c1"},
+                {"url": "https://a/2.mp3", "checksum": None},
+                None,
+            ],
+        )
+        self.assertEqual(self.redis.mget.await_count, 1)
+        self.redis.get.assert_not_awaited()
+
+    async def test_audio_entries_are_written_in_one_pipeline(self):
+        entries = [
+            ((f"n{i}", "en", "meera", 0.0), {"url": f"https://a/{i}.mp3", "checksum": None})
+            for i in range(3)
+        ]
+        with patch.object(self.redis, "pipeline", wraps=self.redis.pipeline) as pipeline:
+            await self.cache.set_audio_entries(entries)
+
+        pipeline.assert_called_once()
+        self.assertEqual(
+            self.redis.published,
+            [
+                (
+                    INVALIDATION_CHANNEL,
+                    {
+                        "origin": self.cache.instance_id,
+                        "keys": [audio_cache_key(*variant) for variant, _ in entries],
+                    },
+                )
+            ],
+        )
+        self.cache.local.clear()
+        self.assertEqual(
+            await self.cache.get_audio_entries([variant for variant, _ in entries]),
+            [entry for _, entry in entries],
+        )
+
+    def test_jittered_ttl_stays_within_bounds(self):
+        ttls = {jittered_ttl(600, 0.1) for _ in range(200)}
+        self.assertTrue(all(540 <= ttl <= 660 for ttl in ttls))
+        self.assertGreater(len(ttls), 1)
+
+    async def test_local_tier_is_bypassed_without_subscription(self):
+        self.cache._local_active = False
+        self.redis.store["story:x"] = json.dumps({"title": "v1"})
+
+        await self.cache.get("story:x")
+        await self.cache.get("story:x")
+
+        self.assertEqual(self.redis.get.await_count, 2)
+        self.assertEqual(self.cache.local.stats()["size"], 0)
+
+
+
+class GetOrComputeTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = FakeRedis()
+        self.cache = CacheService(local_max_entries=0)
+        for name in ("connect", "connect_binary"):
+            patcher = patch.object(self.cache, name, new=AsyncMock(return_value=self.redis))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.compute = AsyncMock(side_effect=lambda: {"rev": self.compute.await_count})
+
+    async def test_computes_on_miss_then_serves_until_soft_expiry(self):
+        first = await self.cache.get_or_compute("k", self.compute, soft_ttl=60, hard_ttl=120)
+        second = await self.cache.get_or_compute("k", self.compute, soft_ttl=60, hard_ttl=120)
+
+        self.assertEqual((first, second), ({"rev": 1}, {"rev": 1}))
+        self.assertEqual(self.compute.await_count, 1)
+        # Plain readers see the value without the freshness header
+        self.assertEqual(await self.cache.get("k"), {"rev": 1})
+        self.assertNotIn("lock:compute:k", self.redis.store)
+
+    async def test_stale_value_is_served_while_another_worker_refreshes(self):
+        await self.cache.set_entry("k", {"rev": 0}, soft_ttl=-1, hard_ttl=120)
+        await self.redis.set("lock:compute:k", "other-worker")
+
+        value = await self.cache.get_or_compute("k", self.compute, soft_ttl=60, hard_ttl=120)
+
+        self.assertEqual(value, {"rev": 0})
+        self.compute.assert_not_awaited()
+        self.assertEqual(self.cache.stats()["stale_served"], 1)
+
+        # Lock released: the next caller refreshes it
+        del self.redis.store["lock:compute:k"]
+        value = await self.cache.get_or_compute("k", self.compute, soft_ttl=60, hard_ttl=120)
+        self.assertEqual(value, {"rev": 1})
+        self.assertEqual(await self.cache.get("k"), {"rev": 1})
+
+    async def test_concurrent_misses_in_one_process_share_one_compute(self):
+        release = asyncio.Event()
+
+        async def slow_compute():
+            await release.wait()
+            return {"rev": "shared"}
+
+        compute = AsyncMock(side_effect=slow_compute)
+        calls = [
+            asyncio.create_task(self.cache.get_or_compute("k", compute, soft_ttl=60))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(*calls), [{"rev": "shared"}] * 5)
+        self.assertEqual(compute.await_count, 1)
+
+    async def test_cached_miss_spares_lock_losers_the_wait(self):
+        missing = AsyncMock(return_value=None)
+        self.assertIsNone(
+            await self.cache.get_or_compute("k", missing, soft_ttl=60, negative_ttl=5)
+        )
+        # Another worker holds the lock, as if it were still computing
+        await self.redis.set("lock:compute:k", "other-worker")
+
+        started = time.monotonic()
+        with patch.object(self.cache, "_wait_for_entry", wraps=self.cache._wait_for_entry) as wait:
+            value = await self.cache.get_or_compute("k", missing, soft_ttl=60, negative_ttl=5)
+
+        self.assertIsNone(value)
+        self.assertEqual(missing.await_count, 1)
+        wait.assert_not_called()
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertIsNone(await self.cache.get("k"))
+
+        # Writing the value replaces the cached miss
+        await self.cache.set("k", {"rev": 1})
+        self.assertEqual(
+            await self.cache.get_or_compute("k", missing, soft_ttl=60, negative_ttl=5),
+            {"rev": 1},
+        )
+
+    async def test_audio_entries_are_rechecked_after_refresh_interval(self):
+        with patch("app.services.cache_service.settings.audio_entry_refresh_sec", -1):
+            await self.cache.set_audio_url("n1", "en", "meera", "https://a/old.mp3")
+        reload = AsyncMock(return_value={"url": "https://a/new.mp3", "checksum": "c2"})
+
+        value = await self.cache.get_or_compute(
+            audio_cache_key("n1", "en", "meera"), reload, soft_ttl=60, hard_ttl=120
+        )
+
+        self.assertEqual(value, {"url": "https://a/new.mp3", "checksum": "c2"})
+        reload.assert_awaited_once()
+
+    def test_xfetch_refreshes_slow_values_early(self):
+        entry = CacheEntry("v", soft_expires_at=time.time() + 10, delta=0.0)
+        self.assertFalse(entry.should_refresh())
+
+        slow = CacheEntry("v", soft_expires_at=time.time() + 10, delta=100.0)
+        with patch("app.services.cache_service.random.random", return_value=0.99):
+            self.assertTrue(slow.should_refresh())
+        with patch("app.services.cache_service.random.random", return_value=0.0):
+            self.assertFalse(slow.should_refresh())
+
+
+def stored_response(redis, key):
+    payload, soft_expires_at, _ = split_freshness(redis.store[key])
+    assert soft_expires_at > time.time()
+    return CachedResponse.from_envelope(payload)
+
+
+class StoryPublishCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_publish_rewrites_detail_keys_and_drops_other_list_pages(self):
+        redis = FakeRedis()
+        cache = CacheService(local_max_entries=0)
+        story_id, updated_at = uuid4(), datetime(2026, 1, 2, tzinfo=timezone.utc)
+        details = {"en": {"language": "en"}, "hi": {"language": "hi"}}
+
+        # Before the edit: a Tamil request (served English) and two list pages
+        old = CachedResponse(body=b"old", etag='"old"')
+        filtered_page = story_list_cache_key("en", "4-8", None, None, "newest", 20, None)
+        default_page = story_list_cache_key("en", None, None, None, "newest", 20, None)
+        with patch.object(cache, "connect", new=AsyncMock(return_value=redis)), patch.object(
+            cache, "connect_binary", new=AsyncMock(return_value=redis)
+        ):
+            await cache.set_response(
+                story_detail_cache_key("crow", "ta"), old, tags=[story_detail_tag("crow")]
+            )
+            for key in (filtered_page, default_page):
+                await cache.set_response(key, old, tags=[STORY_LIST_TAG])
+
+            empty = SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+            db = SimpleNamespace(execute=AsyncMock(return_value=empty))
+            graph_store = SimpleNamespace(invalidate=AsyncMock())
+            with patch("app.services.story_publish.get_story_graph_store", return_value=graph_store):
+                await refresh_story_caches(db, story_id, "crow", updated_at, details, cache)
+
+        graph_store.invalidate.assert_awaited_once_with("crow")
+        for requested, served in (("en", "en"), ("hi", "hi"), ("ta", "en")):
+            restored = stored_response(redis, story_detail_cache_key("crow", requested))
+            self.assertEqual(json.loads(restored.body), {"language": served})
+            self.assertEqual(restored.etag, story_detail_etag(story_id, updated_at, requested))
+
+        # Default first pages are re-rendered in place; other pages are dropped
+        self.assertNotIn(filtered_page, redis.store)
+        self.assertNotEqual(stored_response(redis, default_page).body, b"old")
+        self.assertIn(story_list_cache_key("hi", None, None, None, "newest", 20, None), redis.store)
+        self.assertEqual(db.execute.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,17 +55,19 @@ export interface StoryFilters {
   age_range?: string;
   region?: string;
   search?: string;
-  page?: number;
+  available_language?: string;
+  sort?: 'newest' | 'oldest' | 'shortest' | 'longest' | 'slug';
   limit?: number;
+  cursor?: string;
 }
 
 export interface StoryListResponse {
   data: Story[];
   pagination: {
-    page: number;
     limit: number;
-    total: number;
-    total_pages: number;
+    sort: string;
+    cursor?: string | null;
+    next_cursor?: string | null;
     has_next: boolean;
     has_prev: boolean;
   };
@@ -21,11 +21,18 @@ export interface TokenResponse {
 }
 
 export interface ChoiceRecord {
-  node_id: string;
+  id: number;
+  story_id: string;
+  node_id?: string;
   choice_key: string;
   made_at: string;
 }
 
+export interface ChoiceHistoryPage {
+  data: ChoiceRecord[];
+  next_cursor?: number | null;
+}
+
 export interface Progress {
   story_id: string;
   story_slug: string;
@@ -37,7 +44,7 @@ export interface Progress {
   play_count: number;
   total_time_sec: number;
   last_played_at?: string;
-  choices_made: ChoiceRecord[];
+  choices_made_count: number;
 }
 
 export interface ProgressSummary {